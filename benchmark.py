@@ -0,0 +1,219 @@
+"""End-to-end throughput benchmark of AccessibilityChecker against the local mock server.
+
+    python benchmark.py                       # 10, 300 and 10000 URLs
+    python benchmark.py --sizes 300 --workers 32 --scan-latency 1 --throttle-rate 0.02
+    python benchmark.py --sizes 300 --screenshots both   # per-page cost of screenshot capture
+    python benchmark.py --token-extraction 500           # /loading token parsing only
+    python benchmark.py --base-url https://acsbace.com --url-file urls.txt --sizes 20 \
+        --workers 4 --rate 2 --screenshots both           # real screenshot cost
+
+Reports pages per minute, per-phase latency percentiles and peak traced
+memory for each run size. With --screenshots both, every size is run with
+screenshot capture off and on and the change in per-page scan time is
+reported. --token-extraction compares reading the whole /loading body and
+searching the decoded text with the streaming early-exit parser.
+
+By default the scanner is the in-process mock and no network access is
+needed; a screenshot then costs exactly the mock's --screenshot-latency, so
+only --base-url (with real pages from --url-file) measures what screenshots
+cost on the real scanner.
+"""
+import argparse
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from urllib.parse import quote
+
+from checker import LOADING_CHUNK_BYTES, AccessibilityChecker, PHASE_COLUMNS, extract_token_from_stream
+from mock_server import MockScanner, start_server
+
+PHASES = list(PHASE_COLUMNS) + ['total']
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """Return ``{p: value}`` for the requested percentiles of ``values``"""
+    if not values:
+        return {p: None for p in points}
+    if len(values) == 1:
+        return {p: values[0] for p in points}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {p: cuts[p - 1] for p in points}
+
+
+def run_benchmark(size, base_url, args, screenshots=False):
+    checker = AccessibilityChecker(
+        base_url=base_url,
+        pool_size=args.workers,
+        poll_initial_delay=args.poll_initial_delay,
+        poll_interval=args.poll_interval,
+        poll_max_interval=args.poll_interval * 4,
+        poll_deadline=args.scan_latency * 10 + 30,
+        rate_limits={endpoint: (args.rate, args.rate) for endpoint in ('loading', 'evaluate', 'details')},
+        screenshots=screenshots,
+    )
+    if args.url_file:
+        with open(args.url_file, encoding='utf-8') as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith('#')][:size]
+        size = len(urls)
+    else:
+        urls = (f"https://example.edu/program-{i // 25}/page-{i}/" for i in range(size))
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    succeeded = 0
+    timings = {phase: [] for phase in PHASES}
+    for _, _, result, _ in checker.check_websites(urls, max_workers=args.workers):
+        if result:
+            succeeded += 1
+            for phase, column in list(PHASE_COLUMNS.items()) + [('total', 'totalMs')]:
+                timings[phase].append(result[column])
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'urls': size,
+        'screenshots': screenshots,
+        'succeeded': succeeded,
+        'elapsed_s': round(elapsed, 2),
+        'pages_per_min': round(size / elapsed * 60, 1),
+        'peak_mem_mb': round(peak / 2 ** 20, 2),
+        'phases_ms': {
+            phase: {f"p{p}": round(v, 1) if v is not None else None
+                    for p, v in percentiles(timings[phase]).items()}
+            for phase in PHASES
+        },
+    }
+
+
+def print_report(report):
+    mode = 'screenshots on' if report['screenshots'] else 'screenshots off'
+    print(f"\n{report['urls']} URLs ({mode}): {report['succeeded']} succeeded in {report['elapsed_s']}s "
+          f"-> {report['pages_per_min']} pages/min, peak memory {report['peak_mem_mb']} MB")
+    print(f"  {'phase':<10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for phase, values in report['phases_ms'].items():
+        print(f"  {phase:<10}" + ''.join(f"{str(values[k]):>10}" for k in ('p50', 'p90', 'p99')))
+
+
+def token_benchmark(scanner, base_url, requests_count, rate=1e6):
+    """Time token extraction from /loading over HTTP and in memory, for the full-body and streaming paths"""
+    checker = AccessibilityChecker(base_url=base_url, pool_size=1, rate_limits={'loading': (rate, rate)})
+
+    def full_body(website_url):
+        # The previous path: read and decode the whole body, then search the text
+        response = checker._api_get('loading', f"{base_url}/loading?website={quote(website_url, safe='')}")
+        return checker.extract_token_from_html(response.text), len(response.content)
+
+    def streamed(website_url):
+        checker._local.metrics = {}
+        return checker.get_loading_page(website_url), checker._local.metrics.get('bytes', 0)
+
+    if scanner is not None:
+        page = scanner.loading_page('https://example.edu/page/').encode('utf-8')
+    else:
+        website_url = quote('https://example.edu/page/', safe='')
+        page = checker._api_get('loading', f"{base_url}/loading?website={website_url}").content
+    chunks = [page[i:i + LOADING_CHUNK_BYTES] for i in range(0, len(page), LOADING_CHUNK_BYTES)]
+    in_memory = {
+        'full body': lambda: checker.extract_token_from_html(b''.join(chunks).decode('utf-8')),
+        'streamed': lambda: extract_token_from_stream(iter(chunks)),
+    }
+
+    print(f"\ntoken extraction, {requests_count} requests, {len(page)} byte /loading page:")
+    print(f"  {'path':<10}{'p50 ms':>10}{'p90 ms':>10}{'bytes/req':>12}{'peak KB':>10}{'in-memory us':>14}")
+    for name, fetch in (('full body', full_body), ('streamed', streamed)):
+        timings, total_bytes = [], 0
+        tracemalloc.start()
+        for i in range(requests_count):
+            started = time.perf_counter()
+            token, read = fetch(f"https://example.edu/page-{i}/")
+            timings.append(1000 * (time.perf_counter() - started))
+            assert token, 'no token found'
+            total_bytes += read
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        loops = 2000
+        started = time.perf_counter()
+        for _ in range(loops):
+            in_memory[name]()
+        parse_us = 1e6 * (time.perf_counter() - started) / loops
+        cuts = percentiles(timings, (50, 90))
+        print(f"  {name:<10}{cuts[50]:>10.2f}{cuts[90]:>10.2f}{total_bytes // requests_count:>12}"
+              f"{peak / 1024:>10.1f}{parse_us:>14.1f}")
+
+
+def print_comparison(off, on):
+    """Print how per-page scan time changes when screenshots are captured"""
+    print(f"\n{off['urls']} URLs, screenshots off -> on:")
+    for p in ('p50', 'p90'):
+        before, after = off['phases_ms']['total'][p], on['phases_ms']['total'][p]
+        if before and after:
+            print(f"  total {p}: {before} ms -> {after} ms ({after - before:+.1f} ms, {after / before - 1:+.1%})")
+    print(f"  throughput: {off['pages_per_min']} -> {on['pages_per_min']} pages/min")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scan engine against the local mock server")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 300, 10000])
+    parser.add_argument('--base-url', default=None,
+                        help='benchmark this scanner (e.g. the real acsbace.com) instead of the in-process mock')
+    parser.add_argument('--url-file', default=None,
+                        help='scan the first N URLs of this file (one per line) instead of synthetic ones')
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--rate', type=float, default=1000.0, help='requests per second allowed per endpoint')
+    parser.add_argument('--scan-latency', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--screenshot-latency', type=float, default=1.0,
+                        help='extra seconds the mock scanner spends on a screenshot')
+    parser.add_argument('--screenshots', choices=('off', 'on', 'both'), default='off',
+                        help='capture screenshots; "both" runs every size in each mode and compares them')
+    parser.add_argument('--loading-padding', type=int, default=20000, help='bytes of filler in /loading HTML')
+    parser.add_argument('--token-extraction', type=int, default=0, metavar='REQUESTS',
+                        help='only run the /loading token extraction micro-benchmark with this many requests')
+    parser.add_argument('--poll-initial-delay', type=float, default=0.4)
+    parser.add_argument('--poll-interval', type=float, default=0.1)
+    parser.add_argument('--json', dest='json_path', help='also write the reports to this JSON file')
+    parser.add_argument('--verbose', action='store_true', help='show the checker log')
+    args = parser.parse_args(argv)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.ERROR)
+
+    if args.base_url:
+        scanner, server, base_url = None, None, args.base_url.rstrip('/')
+    else:
+        scanner = MockScanner(scan_latency=args.scan_latency, error_rate=args.error_rate,
+                              throttle_rate=args.throttle_rate, retry_after=0,
+                              loading_padding=args.loading_padding, screenshot_latency=args.screenshot_latency,
+                              seed=1)
+        server, base_url = start_server(scanner)
+    reports = []
+    try:
+        if args.token_extraction:
+            token_benchmark(scanner, base_url, args.token_extraction, rate=args.rate if args.base_url else 1e6)
+            return
+        modes = {'off': [False], 'on': [True], 'both': [False, True]}[args.screenshots]
+        for size in args.sizes:
+            by_mode = {}
+            for screenshots in modes:
+                report = run_benchmark(size, base_url, args, screenshots)
+                if scanner is not None:
+                    report['server'] = dict(scanner.stats)
+                print_report(report)
+                reports.append(report)
+                by_mode[screenshots] = report
+            if len(by_mode) == 2:
+                print_comparison(by_mode[False], by_mode[True])
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
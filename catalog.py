@@ -0,0 +1,30 @@
+"""Program catalog: the page lists bundled in programs.json, or the refreshed copy written by discover.py."""
+import json
+import os
+import uuid
+
+from checker import DATA_DIR
+
+# Page lists shipped with the app
+BUNDLED_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'programs.json')
+# Refreshed program catalog written by discovery; used instead of the bundled one when present
+CATALOG_PATH = os.path.join(DATA_DIR, 'catalog.json')
+
+def load_catalog(path=None):
+    """Return the discovered program catalog if one has been written, else the bundled one"""
+    try:
+        with open(path or CATALOG_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        with open(BUNDLED_CATALOG_PATH, encoding='utf-8') as f:
+            return json.load(f)
+
+def write_catalog(catalog, path=None):
+    """Atomically write a program catalog in the programs.json layout"""
+    path = path or CATALOG_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,2002 @@
+"""Scanning client for the acsbace.com accessibility scanner and the local stores it writes to.
+
+AccessibilityChecker runs scans; run_checks drives a whole run over the
+result cache, run journal and retry passes. Nothing here imports Streamlit
+or pandas, so cli.py, worker.py and scripts start quickly.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, NewConnectionError, ReadTimeoutError
+from urllib3.util.retry import Retry
+import json
+import base64
+import gzip
+import hashlib
+import os
+import time
+import random
+import re
+import sqlite3
+import uuid
+from contextlib import closing, contextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import quote, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+from html.parser import HTMLParser
+import xml.etree.ElementTree as ElementTree
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Default number of pages scanned at the same time
+DEFAULT_MAX_WORKERS = 8
+
+# Scanner backend; override to point at a local stand-in (see mock_server.py)
+ACSBACE_BASE_URL = os.environ.get('ACSBACE_BASE_URL', 'https://acsbace.com')
+
+# Request budgets for the acsbace.com endpoints: (requests per second, burst size)
+DEFAULT_RATE_LIMITS = {
+    'loading': (0.5, 2),
+    'evaluate': (0.5, 2),
+    'details': (2.0, 4),
+}
+# Fraction of the budget added back after each successful request
+RATE_LIMIT_RECOVERY = 0.05
+# Retries of a request rejected with 429/5xx before giving up
+MAX_THROTTLE_RETRIES = 3
+
+# (connect, read) timeouts in seconds per endpoint; 'page' is the direct fetch used for change detection
+DEFAULT_TIMEOUTS = {
+    'loading': (5, 30),
+    'evaluate': (5, 30),
+    'details': (5, 30),
+    'page': (5, 20),
+}
+# Streaming token extraction from /loading: bytes per read, and the most read before giving up
+LOADING_CHUNK_BYTES = 16 * 1024
+LOADING_MAX_BYTES = 2 ** 20
+# Unread /loading bytes after the token up to which the body is drained to keep the
+# connection pooled; a longer rest is dropped together with the connection
+LOADING_DRAIN_BYTES = 64 * 1024
+# data-token attribute in the /loading HTML, matched on the raw bytes
+TOKEN_PATTERN = re.compile(rb'data-token="([^"]+)"')
+# Bytes kept from the previous chunk so a token split across two chunks is still found
+TOKEN_MAX_MATCH = 1024
+# Transport-level retries of connection and read errors for idempotent requests
+DEFAULT_TRANSPORT_RETRIES = 3
+# Scanner endpoints that start work server-side; a read error there is not retried,
+# since the request may already have been processed
+NON_IDEMPOTENT_ENDPOINTS = ('/evaluate',)
+DEFAULT_TRANSPORT_BACKOFF = 0.5
+# Consecutive backend failures that pause all scanning, and for how long (seconds)
+CIRCUIT_FAILURE_THRESHOLD = 8
+CIRCUIT_COOLDOWN = 60
+
+# Polling of get-scan-details (seconds unless noted)
+DEFAULT_POLL_INITIAL_DELAY = 10
+DEFAULT_POLL_INTERVAL = 3
+DEFAULT_POLL_BACKOFF = 1.5      # multiplier applied to the interval after each poll
+DEFAULT_POLL_MAX_INTERVAL = 20
+DEFAULT_POLL_JITTER = 0.25      # +/- fraction of the interval added at random
+DEFAULT_POLL_DEADLINE = 180
+# Fixed wait used when polling is disabled
+FIXED_SCAN_WAIT = 40
+# Ask the scanner to render a screenshot of every page; off for bulk runs
+DEFAULT_CAPTURE_SCREENSHOTS = False
+# gzip level of screenshots stored for pages opened in the UI
+SCREENSHOT_COMPRESSION = 6
+# gzip level of raw scan JSON blobs in the scan archive
+ARCHIVE_COMPRESSION = 6
+
+# Local storage for caches and run data
+DATA_DIR = os.environ.get('ACCESSIBILITY_DATA_DIR', '.accessibility_data')
+
+# Page discovery from each program's main_url
+DEFAULT_DISCOVERY_DEPTH = 2         # link hops followed from main_url
+DEFAULT_DISCOVERY_MAX_PAGES = 100   # pages kept per program
+DEFAULT_DISCOVERY_CONCURRENCY = 8
+DEFAULT_DISCOVERY_RATE = 5.0        # requests per second to the crawled site
+DISCOVERY_TIMEOUT = (5, 15)
+DISCOVERY_MAX_BYTES = 2 * 2 ** 20   # HTML read per page before links are extracted
+DISCOVERY_MAX_SITEMAPS = 20         # sitemap files read per site, including nested ones
+# Answers that mean a page is gone; anything else that fails (timeouts, 5xx, 403, ...) may pass
+DISCOVERY_DEAD_STATUSES = (404, 410)
+# Links that are never scan targets: feeds, WordPress internals and non-HTML files
+DISCOVERY_SKIP_PATTERN = re.compile(
+    r'/(feed|wp-json|wp-admin|wp-content|wp-includes|xmlrpc\.php|wp-login\.php)(/|$)'
+    r'|\.(pdf|jpe?g|png|gif|svg|webp|ico|css|js|json|xml|txt|zip|docx?|xlsx?|pptx?|mp[34]|mov)$',
+    re.IGNORECASE)
+# Scan-result cache defaults
+DEFAULT_CACHE_TTL_HOURS = 24
+DEFAULT_CACHE_MAX_ENTRIES = 5000
+
+# Work-queue leases: how long a worker owns a claimed URL (seconds) and attempts before giving up
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Per-phase timing columns added to every scanned result row
+PHASE_COLUMNS = {
+    'token': 'tokenFetchMs',
+    'evaluate': 'evaluationStartMs',
+    'wait': 'waitMs',
+    'details': 'detailsFetchMs',
+    'parse': 'parseMs',
+}
+# Histogram bucket bounds (seconds) for exported phase timings
+TIMING_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 300)
+
+# scanStatus values reported by get-scan-details once a scan has finished
+SCAN_COMPLETE_STATUSES = {'success'}
+SCAN_FAILED_STATUSES = {'failed', 'error'}
+
+# Failure causes worth another attempt in the retry pass that follows the main pass
+RETRYABLE_CAUSES = {'timeout', 'connection_error', 'throttled', 'server_error', 'token_missing',
+                    'json_decode', 'scan_failed', 'scan_timeout'}
+# Retry passes after the main pass, and the wait before the first one (seconds, doubled per pass)
+DEFAULT_RETRY_ATTEMPTS = 2
+DEFAULT_RETRY_BACKOFF = 30
+
+# Deadline-aware scheduling: weight of each page priority term (every term is scaled to 0..1)
+PRIORITY_WEIGHTS = {'staleness': 0.4, 'low_score': 0.3, 'failures': 0.2, 'main_url': 0.1}
+PRIORITY_STALE_DAYS = 7             # pages unscanned this long get the full staleness weight
+PRIORITY_FAILURE_WINDOW_DAYS = 7    # failures counted towards priority
+PRIORITY_MAX_FAILURES = 3           # failures in the window that give the full failure weight
+DEFAULT_PAGE_SECONDS = 45           # per-page scan time assumed until one has been measured
+LATENCY_SMOOTHING = 0.2             # weight of each newly measured scan time in the running estimate
+
+def normalize_url(url):
+    """Return a canonical form of ``url`` used to recognize the same page.
+
+    http is upgraded to https, the host is lowercased, and default ports,
+    fragments, repeated slashes and trailing slashes are dropped.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if scheme in ('http', 'https'):
+        if netloc.endswith(':80') or netloc.endswith(':443'):
+            netloc = netloc.rsplit(':', 1)[0]
+        scheme = 'https'
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/') or '/'
+    return urlunsplit((scheme, netloc, path, parts.query, ''))
+
+class PageIndex:
+    """Catalog pages grouped by normalized URL so each unique page is scanned once"""
+
+    def __init__(self, entries):
+        # entries: iterable of (program_name, url)
+        self.entries = []
+        self.unique_urls = []
+        self._positions = {}
+        self._programs = []
+        self._listings = []
+        for program, url in entries:
+            key = normalize_url(url)
+            position = self._positions.get(key)
+            if position is None:
+                position = self._positions[key] = len(self.unique_urls)
+                self.unique_urls.append(url)
+                self._programs.append([])
+                self._listings.append([])
+            elif url.startswith('https://') and not self.unique_urls[position].startswith('https://'):
+                # Prefer scanning the https variant of a page
+                self.unique_urls[position] = url
+            if program not in self._programs[position]:
+                self._programs[position].append(program)
+            self._listings[position].append((program, url))
+            self.entries.append((program, url, position))
+
+    @classmethod
+    def from_programs(cls, programs):
+        return cls((program["name"], page) for program in programs for page in program["pages"])
+
+    @property
+    def listed_pages(self):
+        """The ``(program_name, url)`` pairs the index was built from"""
+        return [(program, url) for program, url, _ in self.entries]
+
+    def programs_for(self, position):
+        """Return the names of the programs that list the unique page at ``position``"""
+        return list(self._programs[position])
+
+    def expand(self, position, result):
+        """Yield one copy of ``result`` per program entry listing the unique page at ``position``"""
+        for program, url in self._listings[position]:
+            row = dict(result)
+            row['program'] = program
+            row['website_url'] = url
+            row['accessibe_url'] = f"https://accessibe.com/accessscan?website={url}"
+            yield row
+
+    def fan_out(self, results):
+        """Expand per-unique-page results into one row per program entry, in catalog order"""
+        rows = []
+        for program, url, position in self.entries:
+            row = dict(results[position])
+            row['program'] = program
+            row['website_url'] = url
+            row['accessibe_url'] = f"https://accessibe.com/accessscan?website={url}"
+            rows.append(row)
+        return rows
+
+# Markup that changes on every request without changing the page itself
+_VOLATILE_MARKUP = [
+    (re.compile(r'<!--.*?-->', re.S), ''),
+    (re.compile(r'\snonce="[^"]*"'), ''),
+    (re.compile(r'([?&])ver=[\w.\-]+'), r'\1'),
+    (re.compile(r'\s+'), ' '),
+]
+
+def content_hash(html_content):
+    """Hash page markup after stripping comments, nonces, asset versions and extra whitespace"""
+    for pattern, replacement in _VOLATILE_MARKUP:
+        html_content = pattern.sub(replacement, html_content)
+    return hashlib.sha256(html_content.strip().encode('utf-8')).hexdigest()
+
+def extract_token_from_stream(chunks, max_bytes=LOADING_MAX_BYTES):
+    """Return ``(token, bytes_read)`` from an iterable of byte chunks, stopping at the first data-token.
+
+    Only the last TOKEN_MAX_MATCH bytes of earlier chunks are kept, so memory
+    stays flat however long the page is; reading stops after ``max_bytes``.
+    """
+    window = b''
+    read = 0
+    for chunk in chunks:
+        read += len(chunk)
+        window += chunk
+        match = TOKEN_PATTERN.search(window)
+        if match:
+            return match.group(1).decode('utf-8', errors='replace'), read
+        if read >= max_bytes:
+            break
+        window = window[-TOKEN_MAX_MATCH:]
+    return None, read
+
+def scan_failure(phase, cause, detail='', http_status=None):
+    """Describe a failed scan: the phase it failed in, a machine-readable cause and whether to retry"""
+    return {
+        'failurePhase': phase,
+        'failureCause': cause,
+        'failureDetail': str(detail)[:500],
+        'httpStatus': http_status,
+        'retryable': cause in RETRYABLE_CAUSES,
+    }
+
+def classify_request_error(error):
+    """Map a requests exception to ``(cause, http_status)``"""
+    if isinstance(error, requests.Timeout):
+        return 'timeout', None
+    # Timeouts that used up the transport retries reach us as ConnectionError(MaxRetryError(...))
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    # urllib3 derives NewConnectionError (e.g. connection refused) from ConnectTimeoutError
+    if isinstance(reason, (ReadTimeoutError, ConnectTimeoutError)) and not isinstance(reason, NewConnectionError):
+        return 'timeout', None
+    if isinstance(error, requests.ConnectionError):
+        return 'connection_error', None
+    response = getattr(error, 'response', None)
+    status = response.status_code if response is not None else None
+    if status == 429:
+        return 'throttled', status
+    if status is not None and status >= 500:
+        return 'server_error', status
+    if status is not None:
+        return 'http_error', status
+    return 'request_error', None
+
+def parse_retry_after(value):
+    """Return the delay in seconds requested by a Retry-After header, or ``None``"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class RateLimiter:
+    """Thread-safe token bucket that slows down on server pushback and recovers afterwards.
+
+    ``rate`` is the budget: after a slowdown the rate climbs back to it but never above.
+    """
+
+    def __init__(self, rate, burst=1, min_rate=None):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self):
+        """Additively speed back up towards the budget after a request the server accepted"""
+        with self._lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RATE_LIMIT_RECOVERY)
+
+    def on_throttle(self, retry_after=None):
+        """Halve the rate and pause all requests for ``retry_after`` seconds if given"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        logger.warning(f"Throttled by server; rate reduced to {self.rate:.2f} req/s"
+                       + (f", pausing {retry_after:.1f}s" if retry_after else ""))
+
+def build_rate_limiters(rate_limits=None):
+    """Return ``{endpoint: RateLimiter}`` for DEFAULT_RATE_LIMITS overridden by ``rate_limits``"""
+    limits = dict(DEFAULT_RATE_LIMITS, **(rate_limits or {}))
+    return {endpoint: RateLimiter(rate, burst) for endpoint, (rate, burst) in limits.items()}
+
+class CircuitBreaker:
+    """Pauses all requests to the scanner after repeated failures, then probes with one request"""
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait_until_closed(self):
+        """Block while the circuit is open; after the cooldown let a single trial request through"""
+        while True:
+            with self._lock:
+                if self.state == 'closed':
+                    return
+                wait = self._opened_at + self.cooldown - time.monotonic()
+                if self.state == 'open' and wait <= 0:
+                    self.state = 'half-open'
+                    return
+                if self.state == 'half-open':
+                    wait = 1.0
+            time.sleep(min(max(wait, 0.1), 5.0))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info("Scanner backend is responding again; resuming scans")
+            self.state = 'closed'
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half-open' or (self.state == 'closed' and self._failures >= self.failure_threshold):
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                logger.warning(f"Scanner backend appears to be down after {self._failures} consecutive failures; "
+                               f"pausing scans for {self.cooldown}s")
+
+def build_session(pool_size=DEFAULT_MAX_WORKERS, retries=DEFAULT_TRANSPORT_RETRIES,
+                  backoff=DEFAULT_TRANSPORT_BACKOFF, unsafe_prefixes=()):
+    """Create a keep-alive session whose connection pool fits ``pool_size`` concurrent scans"""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    })
+    mount_adapters(session, pool_size, retries, backoff, unsafe_prefixes)
+    return session
+
+def mount_adapters(session, pool_size, retries=DEFAULT_TRANSPORT_RETRIES, backoff=DEFAULT_TRANSPORT_BACKOFF,
+                   unsafe_prefixes=()):
+    """Mount pooled, retrying adapters; URLs under ``unsafe_prefixes`` only retry connect errors"""
+    # Status-code retries are left to the rate limiter so 429/5xx pushback stays visible to it
+    retry = Retry(total=retries, connect=retries, read=retries, status=0, backoff_factor=backoff,
+                  allowed_methods=frozenset(['GET', 'HEAD']), raise_on_status=False)
+    # Each scan may hold a connection to the scanner and one to the page being checked
+    pool_maxsize = max(10, 2 * pool_size)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # A connect error means the request never reached the server, so only that is safe to repeat
+    unsafe_retry = Retry(total=retries, connect=retries, read=0, other=0, status=0, backoff_factor=backoff,
+                         allowed_methods=frozenset(['GET', 'HEAD']), raise_on_status=False)
+    for prefix in unsafe_prefixes:
+        session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=unsafe_retry))
+
+class LinkExtractor(HTMLParser):
+    """Collects the href of every anchor in an HTML document"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self.links.append(href.strip())
+
+class SiteCrawler:
+    """Discovers the live pages of each program from its main_url, the site's sitemap and in-scope links.
+
+    A page is in scope for a program when it is on the same host as the
+    program's main_url and under its path. Pages are fetched at most once
+    per crawler, concurrently and under a per-site request rate, and a page
+    counts as alive when it answers 2xx with HTML after redirects.
+    """
+
+    def __init__(self, max_depth=DEFAULT_DISCOVERY_DEPTH, max_pages=DEFAULT_DISCOVERY_MAX_PAGES,
+                 concurrency=DEFAULT_DISCOVERY_CONCURRENCY, rate=DEFAULT_DISCOVERY_RATE,
+                 use_sitemap=True, respect_robots=True, session=None):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.use_sitemap = use_sitemap
+        self.respect_robots = respect_robots
+        self.session = session or build_session(pool_size=concurrency)
+        self.limiter = RateLimiter(rate, burst=max(1, int(rate)))
+        self._pages = {}      # normalized URL -> (final URL or None, links)
+        self._sitemaps = {}   # origin -> URLs listed in its sitemaps
+        self._robots = {}     # origin -> RobotFileParser or None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scope_of(main_url):
+        """Return the normalized prefix a URL must fall under to belong to a program"""
+        return normalize_url(main_url).rstrip('/')
+
+    @staticmethod
+    def in_scope(url, scope):
+        key = normalize_url(url)
+        return key == scope or key.startswith(scope + '/')
+
+    @staticmethod
+    def skipped(url):
+        """Whether ``url`` is a feed, WordPress internal or file rather than a scan target"""
+        return bool(DISCOVERY_SKIP_PATTERN.search(urlsplit(normalize_url(url)).path))
+
+    def _get(self, url, **kwargs):
+        self.limiter.acquire()
+        return self.session.get(url, timeout=DISCOVERY_TIMEOUT, allow_redirects=True, **kwargs)
+
+    def _allowed(self, url):
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            known = origin in self._robots
+        if not known:
+            robots = None
+            try:
+                response = self._get(f"{origin}/robots.txt")
+                if response.status_code == 200:
+                    robots = RobotFileParser()
+                    robots.parse(response.text.splitlines())
+            except requests.RequestException:
+                pass
+            with self._lock:
+                self._robots[origin] = robots
+        robots = self._robots[origin]
+        return robots is None or robots.can_fetch('*', url)
+
+    def fetch(self, url):
+        """Fetch a page once; returns ``(status, final_url, links)``.
+
+        ``status`` is 'live' for a page that answers with HTML, 'dead' for a
+        definitive answer that it is gone (404/410, or a 2xx that is not
+        HTML) and 'unreachable' when nothing definite is known (timeouts,
+        connection errors, other error statuses or robots.txt). final_url is
+        None unless the page is live.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            if key in self._pages:
+                return self._pages[key]
+        status, final_url, links = 'unreachable', None, []
+        if not self._allowed(url):
+            logger.info(f"Discovery: {url} is disallowed by robots.txt")
+        else:
+            try:
+                with self._get(url, stream=True) as response:
+                    content_type = response.headers.get('Content-Type', '')
+                    if response.ok and 'html' in content_type:
+                        status = 'live'
+                        final_url = response.url
+                        body = bytearray()
+                        for chunk in response.iter_content(64 * 1024):
+                            body.extend(chunk)
+                            if len(body) >= DISCOVERY_MAX_BYTES:
+                                break
+                        parser = LinkExtractor()
+                        parser.feed(body.decode(response.encoding or 'utf-8', errors='replace'))
+                        links = [urljoin(final_url, link).split('#')[0] for link in parser.links]
+                    else:
+                        if response.ok or response.status_code in DISCOVERY_DEAD_STATUSES:
+                            status = 'dead'
+                        logger.info(f"Discovery: {url} is not a live HTML page ({response.status_code} {content_type})")
+            except requests.RequestException as e:
+                logger.info(f"Discovery: {url} is unreachable: {str(e)}")
+        with self._lock:
+            self._pages[key] = (status, final_url, links)
+        return status, final_url, links
+
+    def sitemap_urls(self, url):
+        """Return the page URLs listed in the sitemap(s) of ``url``'s site, following sitemap indexes"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            if origin in self._sitemaps:
+                return self._sitemaps[origin]
+        pages, queue, read = [], [f"{origin}/sitemap.xml"], 0
+        while queue and read < DISCOVERY_MAX_SITEMAPS:
+            sitemap_url = queue.pop(0)
+            read += 1
+            try:
+                response = self._get(sitemap_url)
+                if not response.ok:
+                    continue
+                root = ElementTree.fromstring(response.content)
+            except (requests.RequestException, ElementTree.ParseError) as e:
+                logger.info(f"Discovery: could not read sitemap {sitemap_url}: {str(e)}")
+                continue
+            for element in root.iter():
+                if element.tag.rsplit('}', 1)[-1] != 'loc' or not element.text:
+                    continue
+                location = element.text.strip()
+                if root.tag.endswith('sitemapindex'):
+                    queue.append(location)
+                else:
+                    pages.append(location)
+        with self._lock:
+            self._sitemaps[origin] = pages
+        return pages
+
+    def crawl_program(self, program, executor):
+        """Return ``(live_pages, dead_pages, skipped_pages, unreachable_pages)`` for one catalog program.
+
+        Hand-listed pages are kept when alive even if they sit outside
+        main_url's path, and also when they could not be reached, since a
+        passing outage says nothing about them. Hand-listed pages matching
+        DISCOVERY_SKIP_PATTERN (e.g. a feed) are kept as they are without
+        being fetched; discovered ones are left out and returned as skipped.
+        """
+        scope = self.scope_of(program['main_url'])
+        kept = [url for url in program.get('pages', []) if self.skipped(url)]
+        listed = {normalize_url(url) for url in program.get('pages', []) if not self.skipped(url)}
+        frontier = [program['main_url']] + [url for url in program.get('pages', []) if normalize_url(url) in listed]
+        skipped = {}
+
+        def discovered(urls):
+            found = []
+            for url in urls:
+                if not self.in_scope(url, scope):
+                    continue
+                if self.skipped(url):
+                    skipped.setdefault(normalize_url(url), url)
+                else:
+                    found.append(url)
+            return found
+
+        if self.use_sitemap:
+            frontier += discovered(self.sitemap_urls(program['main_url']))
+
+        live, dead, unreachable, checked = {normalize_url(url): url for url in kept}, [], [], set()
+        for depth in range(self.max_depth + 1):
+            frontier = [url for url in dict.fromkeys(frontier) if normalize_url(url) not in checked]
+            if not frontier or len(live) >= self.max_pages:
+                break
+            checked.update(normalize_url(url) for url in frontier)
+            next_frontier = []
+            for url, (status, final_url, links) in zip(frontier, executor.map(self.fetch, frontier)):
+                if status == 'dead':
+                    dead.append(url)
+                    continue
+                if status == 'unreachable':
+                    unreachable.append(url)
+                    if normalize_url(url) in listed and len(live) < self.max_pages:
+                        live.setdefault(normalize_url(url), url)
+                    continue
+                if (self.in_scope(final_url, scope) or normalize_url(url) in listed) and len(live) < self.max_pages:
+                    live.setdefault(normalize_url(final_url), final_url)
+                if depth < self.max_depth:
+                    next_frontier.extend(discovered(links))
+            frontier = next_frontier
+        for url in kept:
+            skipped.pop(normalize_url(url), None)
+        return list(live.values()), dead, sorted(skipped.values()), unreachable
+
+    def refresh_catalog(self, catalog, progress_callback=None):
+        """Crawl every program of ``catalog`` and return ``(refreshed_catalog, report)``"""
+        programs, report = [], []
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='discovery') as executor:
+            for program in catalog['uf_education_programs']:
+                if progress_callback:
+                    progress_callback(f"Discovering pages of {program['name']}")
+                live, dead, skipped, unreachable = self.crawl_program(program, executor)
+                listed = {normalize_url(url) for url in program.get('pages', [])}
+                main_unreachable = self.scope_of(program['main_url']) in {self.scope_of(url) for url in unreachable}
+                if main_unreachable:
+                    # Nothing reliable was learned about the site, so its page list is kept as it was
+                    live, dead = list(program.get('pages', [])), []
+                # Keep main_url first and the hand-maintained order, then the newly found pages
+                order = {normalize_url(url): i for i, url in enumerate(program.get('pages', []))}
+                live.sort(key=lambda url: (normalize_url(url) != self.scope_of(program['main_url']),
+                                           order.get(normalize_url(url), len(order)), url))
+                programs.append(dict(program, pages=live))
+                report.append({
+                    'program': program['name'],
+                    'pages': len(live),
+                    'added': sorted(url for url in live if normalize_url(url) not in listed),
+                    'dead': sorted(dead),
+                    'skipped': skipped,
+                    'unreachable': sorted(unreachable),
+                    'unchanged': main_unreachable,
+                })
+        return dict(catalog, uf_education_programs=programs, discovered_at=time.time()), report
+
+class ScanCache:
+    """SQLite cache of parsed scan results keyed by normalized URL; raw JSON lives in ScanArchive"""
+
+    def __init__(self, path=None, ttl_hours=DEFAULT_CACHE_TTL_HOURS, max_entries=DEFAULT_CACHE_MAX_ENTRIES):
+        self.path = path or os.path.join(DATA_DIR, 'scan_cache.sqlite3')
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scan_cache ("
+                " url_key TEXT PRIMARY KEY,"
+                " website_url TEXT NOT NULL,"
+                " parsed_json TEXT NOT NULL,"
+                " scanned_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            if 'raw_json' in {row[1] for row in conn.execute("PRAGMA table_info(scan_cache)")}:
+                # Caches written before the archive existed also held a copy of the raw JSON
+                try:
+                    conn.execute("ALTER TABLE scan_cache DROP COLUMN raw_json")
+                    conn.execute("VACUUM")
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"Could not drop raw JSON from the scan cache yet: {str(e)}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_fingerprints ("
+                " url_key TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " content_hash TEXT,"
+                " checked_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30))
+
+    def get(self, website_url, max_age=None):
+        """Return the cached parsed result for ``website_url`` if it is fresh, else ``None``"""
+        max_age = self.ttl_seconds if max_age is None else max_age
+        key = normalize_url(website_url)
+        now = time.time()
+        with self._connect() as conn, conn:
+            row = conn.execute(
+                "SELECT parsed_json, scanned_at FROM scan_cache WHERE url_key = ?", (key,)
+            ).fetchone()
+            if not row or now - row[1] > max_age:
+                return None
+            conn.execute("UPDATE scan_cache SET last_access = ? WHERE url_key = ?", (now, key))
+        parsed_results = json.loads(row[0])
+        parsed_results['website_url'] = website_url
+        parsed_results['accessibe_url'] = f"https://accessibe.com/accessscan?website={website_url}"
+        return parsed_results
+
+    def latest(self, website_url):
+        """Return ``(parsed_result, age_seconds)`` for the newest stored result at any age, or ``None``"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT scanned_at FROM scan_cache WHERE url_key = ?", (normalize_url(website_url),)
+            ).fetchone()
+        parsed_results = self.get(website_url, max_age=float('inf')) if row else None
+        return (parsed_results, time.time() - row[0]) if parsed_results else None
+
+    def put(self, website_url, parsed_results):
+        """Store a scan result, evicting the least recently used entries over the size limit"""
+        now = time.time()
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scan_cache VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(website_url), website_url, json.dumps(parsed_results), now, now)
+            )
+            conn.execute(
+                "DELETE FROM scan_cache WHERE url_key IN ("
+                " SELECT url_key FROM scan_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def touch(self, website_url):
+        """Mark the stored result for ``website_url`` as freshly confirmed"""
+        now = time.time()
+        with self._connect() as conn, conn:
+            conn.execute(
+                "UPDATE scan_cache SET scanned_at = ?, last_access = ? WHERE url_key = ?",
+                (now, now, normalize_url(website_url))
+            )
+
+    def get_fingerprint(self, website_url):
+        """Return the page fingerprint recorded at the last successful scan, if any"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT etag, last_modified, content_hash FROM page_fingerprints WHERE url_key = ?",
+                (normalize_url(website_url),)
+            ).fetchone()
+        if not row:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'content_hash': row[2]}
+
+    def put_fingerprint(self, website_url, fingerprint):
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO page_fingerprints VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(website_url), fingerprint.get('etag'), fingerprint.get('last_modified'),
+                 fingerprint.get('content_hash'), time.time())
+            )
+
+    def clear(self):
+        with self._connect() as conn, conn:
+            conn.execute("DELETE FROM scan_cache")
+            conn.execute("DELETE FROM page_fingerprints")
+
+class ScreenshotStore:
+    """gzip-compressed page screenshots on disk, keyed by scan id"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(DATA_DIR, 'screenshots')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, scan_id):
+        return os.path.join(self.directory, f"{hashlib.sha256(scan_id.encode('utf-8')).hexdigest()[:32]}.gz")
+
+    def get(self, scan_id):
+        """Return the stored screenshot bytes of a scan, or None"""
+        try:
+            with gzip.open(self._path(scan_id), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, scan_id, data):
+        path = self._path(scan_id)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=SCREENSHOT_COMPRESSION))
+        os.replace(tmp_path, path)
+
+class ScanArchive:
+    """Content-addressed archive of raw get-scan-details JSON.
+
+    Every payload is stored once as a gzip-compressed blob named by the
+    SHA-256 of its canonical JSON, so identical responses share a blob. A
+    SQLite index maps each URL to the blobs archived for it and each run's
+    URLs to the blob of their result, which lets ``reparse.py`` rebuild
+    result tables offline.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(DATA_DIR, 'archive')
+        os.makedirs(os.path.join(self.directory, 'blobs'), exist_ok=True)
+        with self._connect() as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS archive_scans ("
+                " url_key TEXT NOT NULL,"
+                " blob TEXT NOT NULL,"
+                " website_url TEXT NOT NULL,"
+                " archived_at REAL NOT NULL,"
+                " PRIMARY KEY (url_key, blob))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS archive_runs ("
+                " run_id TEXT NOT NULL,"
+                " url_index INTEGER NOT NULL,"
+                " url_key TEXT NOT NULL,"
+                " blob TEXT NOT NULL,"
+                " PRIMARY KEY (run_id, url_index))"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'), timeout=30))
+
+    def blob_path(self, blob):
+        return os.path.join(self.directory, 'blobs', blob[:2], f"{blob}.json.gz")
+
+    def put(self, website_url, scan_data):
+        """Archive a raw scan payload for ``website_url`` and return its blob id"""
+        data = json.dumps(scan_data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        blob = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(blob)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=ARCHIVE_COMPRESSION))
+            os.replace(tmp_path, path)
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO archive_scans (url_key, blob, website_url, archived_at) VALUES (?, ?, ?, ?)",
+                (normalize_url(website_url), blob, website_url, time.time())
+            )
+        return blob
+
+    def get(self, blob):
+        """Return the raw scan payload stored under ``blob``"""
+        return read_archived_scan(self.blob_path(blob))
+
+    def link(self, run_id, url_index, website_url, blob):
+        """Record that a run's result for one URL came from ``blob``"""
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO archive_runs (run_id, url_index, url_key, blob) VALUES (?, ?, ?, ?)",
+                (run_id, url_index, normalize_url(website_url), blob)
+            )
+
+    def run_blobs(self, run_id):
+        """Return ``{url_index: blob}`` for the archived results of a run"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT url_index, blob FROM archive_runs WHERE run_id = ?", (run_id,)).fetchall()
+        return dict(rows)
+
+    def url_blobs(self, website_url):
+        """Return ``(archived_at, blob)`` of every payload archived for a URL, oldest first"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT archived_at, blob FROM archive_scans WHERE url_key = ? ORDER BY archived_at",
+                (normalize_url(website_url),)
+            ).fetchall()
+
+def read_archived_scan(path):
+    """Load one archived scan payload from its blob file"""
+    with gzip.open(path, 'rb') as f:
+        return json.load(f)
+
+def reparse_archived_scan(path):
+    """Re-parse one archived scan payload; runs in worker processes of reparse.py"""
+    return parse_scan_data(read_archived_scan(path))
+
+class RunMetrics:
+    """Run-level histograms of per-phase scan timings, retries and bytes transferred"""
+
+    def __init__(self):
+        self.timings = {phase: [] for phase in list(PHASE_COLUMNS) + ['total']}
+        self.server_scan_seconds = []
+        self.retries = 0
+        self.bytes_transferred = 0
+        self.scans = {}
+        self.failures = {}
+
+    def observe(self, result):
+        """Add one result row; rows not freshly scanned only count towards the status and failure totals"""
+        status = result.get('scanStatus') or 'unknown'
+        self.scans[status] = self.scans.get(status, 0) + 1
+        if result.get('failureCause'):
+            key = (result.get('failurePhase') or 'unknown', result['failureCause'])
+            self.failures[key] = self.failures.get(key, 0) + 1
+        if result.get('resultSource', 'scan') != 'scan' or 'totalMs' not in result:
+            return
+        for phase, column in list(PHASE_COLUMNS.items()) + [('total', 'totalMs')]:
+            if result.get(column) is not None:
+                self.timings[phase].append(result[column] / 1000)
+        self.retries += result.get('retryCount', 0)
+        self.bytes_transferred += result.get('bytesTransferred', 0)
+        try:
+            self.server_scan_seconds.append(float(result.get('timeToScan')))
+        except (TypeError, ValueError):
+            pass
+
+    def summary(self):
+        """Return one row per phase with count, mean, p50, p90 and max in milliseconds"""
+        rows = []
+        for phase, values in self.timings.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            rows.append({
+                'phase': phase,
+                'count': len(ordered),
+                'mean_ms': round(1000 * sum(ordered) / len(ordered), 1),
+                'p50_ms': round(1000 * ordered[int(0.5 * (len(ordered) - 1))], 1),
+                'p90_ms': round(1000 * ordered[int(0.9 * (len(ordered) - 1))], 1),
+                'max_ms': round(1000 * ordered[-1], 1),
+            })
+        return rows
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP accessibility_scan_phase_seconds Time spent in each phase of a page scan.',
+            '# TYPE accessibility_scan_phase_seconds histogram',
+        ]
+        for phase, values in self.timings.items():
+            for bound in TIMING_BUCKETS:
+                count = sum(1 for v in values if v <= bound)
+                lines.append(f'accessibility_scan_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {count}')
+            lines.append(f'accessibility_scan_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {len(values)}')
+            lines.append(f'accessibility_scan_phase_seconds_sum{{phase="{phase}"}} {sum(values):.6f}')
+            lines.append(f'accessibility_scan_phase_seconds_count{{phase="{phase}"}} {len(values)}')
+        lines += [
+            '# HELP accessibility_scan_server_seconds Scan time reported by the scanner (timeToScan).',
+            '# TYPE accessibility_scan_server_seconds summary',
+            f'accessibility_scan_server_seconds_sum {sum(self.server_scan_seconds):.6f}',
+            f'accessibility_scan_server_seconds_count {len(self.server_scan_seconds)}',
+            '# HELP accessibility_scan_retries_total Requests retried after 429/5xx responses.',
+            '# TYPE accessibility_scan_retries_total counter',
+            f'accessibility_scan_retries_total {self.retries}',
+            '# HELP accessibility_scan_bytes_total Response bytes received from the scanner.',
+            '# TYPE accessibility_scan_bytes_total counter',
+            f'accessibility_scan_bytes_total {self.bytes_transferred}',
+            '# HELP accessibility_scans_total Result rows by scan status.',
+            '# TYPE accessibility_scans_total counter',
+        ]
+        lines += [f'accessibility_scans_total{{status="{status}"}} {count}' for status, count in sorted(self.scans.items())]
+        lines += [
+            '# HELP accessibility_scan_failures_total Failed pages by the phase and cause of their final failure.',
+            '# TYPE accessibility_scan_failures_total counter',
+        ]
+        lines += [f'accessibility_scan_failures_total{{phase="{phase}",cause="{cause}"}} {count}'
+                  for (phase, cause), count in sorted(self.failures.items())]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path=None):
+        """Atomically write the metrics to a node_exporter text-file collector file"""
+        path = path or os.path.join(DATA_DIR, 'metrics', 'accessibility_scan.prom')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+class RunJournal:
+    """Durable SQLite journal of runs so an interrupted run can be resumed"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DATA_DIR, 'runs.sqlite3')
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " run_id TEXT PRIMARY KEY,"
+                " label TEXT NOT NULL,"
+                " urls_json TEXT NOT NULL,"
+                " started_at REAL NOT NULL,"
+                " finished_at REAL,"
+                " modified_at REAL)"
+            )
+            if 'modified_at' not in {row[1] for row in conn.execute("PRAGMA table_info(runs)")}:
+                conn.execute("ALTER TABLE runs ADD COLUMN modified_at REAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS run_results ("
+                " run_id TEXT NOT NULL,"
+                " url_index INTEGER NOT NULL,"
+                " website_url TEXT NOT NULL,"
+                " succeeded INTEGER NOT NULL,"
+                " result_json TEXT NOT NULL,"
+                " recorded_at REAL NOT NULL,"
+                " PRIMARY KEY (run_id, url_index))"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30))
+
+    def start_run(self, label, urls):
+        """Register a new run over ``urls`` and return its id"""
+        run_id = uuid.uuid4().hex
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT INTO runs (run_id, label, urls_json, started_at) VALUES (?, ?, ?, ?)",
+                (run_id, label, json.dumps(list(urls)), time.time())
+            )
+        return run_id
+
+    def find_unfinished_run(self, label, urls, exclude=()):
+        """Return the id of the latest unfinished run with the same label and URLs, if any.
+
+        Runs in ``exclude`` (e.g. ones another job is still scanning) are skipped.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT run_id FROM runs WHERE label = ? AND urls_json = ? AND finished_at IS NULL"
+                " ORDER BY started_at DESC",
+                (label, json.dumps(list(urls)))
+            ).fetchall()
+        return next((row[0] for row in rows if row[0] not in exclude), None)
+
+    def find_last_run(self, label, urls):
+        """Return the id of the latest run, finished or not, with the same label and URLs, if any"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT run_id FROM runs WHERE label = ? AND urls_json = ? ORDER BY started_at DESC LIMIT 1",
+                (label, json.dumps(list(urls)))
+            ).fetchone()
+        return row[0] if row else None
+
+    def recent_failures(self, since):
+        """Return ``{normalized_url: count}`` of failed results recorded since ``since``"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT website_url, COUNT(*) FROM run_results WHERE succeeded = 0 AND recorded_at >= ?"
+                " AND json_extract(result_json, '$.scanStatus') = 'failed' GROUP BY website_url",
+                (since,)
+            ).fetchall()
+        failures = {}
+        for url, count in rows:
+            key = normalize_url(url)
+            failures[key] = failures.get(key, 0) + count
+        return failures
+
+    def recent_scan_seconds(self, limit=200):
+        """Return the median wall time of the latest fresh scans in seconds, or None if none were recorded"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT json_extract(result_json, '$.totalMs') FROM run_results"
+                " WHERE succeeded = 1 AND json_extract(result_json, '$.resultSource') = 'scan'"
+                " ORDER BY recorded_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        values = sorted(row[0] for row in rows if row[0] is not None)
+        return values[len(values) // 2] / 1000 if values else None
+
+    def carry_over(self, source_run_id, run_id):
+        """Copy the successful results of one run into another so only its failures are scanned again"""
+        with self._connect() as conn, conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO run_results"
+                " SELECT ?, url_index, website_url, succeeded, result_json, recorded_at"
+                " FROM run_results WHERE run_id = ? AND succeeded = 1",
+                (run_id, source_run_id)
+            )
+        return cursor.rowcount
+
+    def record(self, run_id, url_index, website_url, result):
+        """Checkpoint the result for one URL of a run"""
+        now = time.time()
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO run_results VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, url_index, website_url, int(result.get('scanStatus') == 'success'),
+                 json.dumps(result), now)
+            )
+            conn.execute("UPDATE runs SET modified_at = ? WHERE run_id = ?", (now, run_id))
+
+    def replace_results(self, run_id, results):
+        """Overwrite recorded results of a run in one transaction; ``results`` maps url_index to result"""
+        with self._connect() as conn, conn:
+            conn.executemany(
+                "UPDATE run_results SET result_json = ?, succeeded = ? WHERE run_id = ? AND url_index = ?",
+                ((json.dumps(result), int(result.get('scanStatus') == 'success'), run_id, index)
+                 for index, result in results.items())
+            )
+            conn.execute("UPDATE runs SET modified_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def modified_at(self, run_id):
+        """Return when results of a run were last recorded or replaced, or its start time if never"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT COALESCE(modified_at, started_at) FROM runs WHERE run_id = ?",
+                               (run_id,)).fetchone()
+        return row[0] if row else None
+
+    def runs(self, label=None):
+        """Return ``(run_id, label)`` of recorded runs, oldest first, optionally only those with ``label``"""
+        with self._connect() as conn:
+            if label is None:
+                return conn.execute("SELECT run_id, label FROM runs ORDER BY started_at").fetchall()
+            return conn.execute("SELECT run_id, label FROM runs WHERE label = ? ORDER BY started_at",
+                                (label,)).fetchall()
+
+    def completed_results(self, run_id):
+        """Return ``{url_index: result}`` for URLs of a run that already succeeded"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url_index, result_json FROM run_results WHERE run_id = ? AND succeeded = 1",
+                (run_id,)
+            ).fetchall()
+        return {index: json.loads(result_json) for index, result_json in rows}
+
+    def results(self, run_id):
+        """Return ``{url_index: result}`` for every URL of a run recorded so far"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url_index, result_json FROM run_results WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return {index: json.loads(result_json) for index, result_json in rows}
+
+    def iter_results(self, run_id, batch_size=500):
+        """Yield ``(url_index, result)`` for a run in URL order without loading it all at once"""
+        last_index = -1
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT url_index, result_json FROM run_results WHERE run_id = ? AND url_index > ?"
+                    " ORDER BY url_index LIMIT ?",
+                    (run_id, last_index, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for index, result_json in rows:
+                yield index, json.loads(result_json)
+            last_index = rows[-1][0]
+
+    def finish_run(self, run_id):
+        with self._connect() as conn, conn:
+            conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+class WorkQueue:
+    """Durable SQLite work queue of URLs shared by any number of worker processes.
+
+    Workers claim URLs under a time-limited lease and must complete, fail or
+    renew them before it expires; URLs whose lease ran out (e.g. because the
+    worker crashed) can be claimed again until they have been leased
+    ``max_attempts`` times, after which they are marked failed. The rollback
+    journal is used rather than WAL so the file also works on storage shared
+    between hosts.
+    """
+
+    def __init__(self, path=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path or os.path.join(DATA_DIR, 'work_queue.sqlite3')
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS work_items ("
+                " item_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " queue TEXT NOT NULL,"
+                " url_key TEXT NOT NULL,"
+                " website_url TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " lease_owner TEXT,"
+                " lease_expires REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " result_json TEXT,"
+                " enqueued_at REAL NOT NULL,"
+                " finished_at REAL,"
+                " UNIQUE (queue, url_key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS work_items_by_status ON work_items (queue, status, lease_expires)")
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=60, isolation_level=None))
+
+    def enqueue(self, urls, queue='default', requeue=False):
+        """Add URLs to ``queue``; already-queued pages are skipped unless ``requeue`` is set.
+
+        Returns the number of URLs newly queued (or re-queued).
+        """
+        now = time.time()
+        added = 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for url in urls:
+                key = normalize_url(url)
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO work_items (queue, url_key, website_url, status, enqueued_at)"
+                    " VALUES (?, ?, ?, 'pending', ?)",
+                    (queue, key, url, now)
+                )
+                if not cursor.rowcount and requeue:
+                    cursor = conn.execute(
+                        "UPDATE work_items SET status = 'pending', lease_owner = NULL, lease_expires = NULL,"
+                        " attempts = 0, result_json = NULL, finished_at = NULL, enqueued_at = ?"
+                        " WHERE queue = ? AND url_key = ? AND status IN ('done', 'failed')",
+                        (now, queue, key)
+                    )
+                added += cursor.rowcount
+            conn.execute("COMMIT")
+        return added
+
+    def claim(self, worker_id, queue='default', limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Lease up to ``limit`` pending or expired URLs to ``worker_id``; returns ``[(item_id, url)]``"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # A URL whose leases keep running out (e.g. it crashes or hangs its worker) is given up on
+            exhausted = conn.execute(
+                "SELECT item_id, website_url, attempts FROM work_items WHERE queue = ? AND status = 'leased'"
+                " AND lease_expires < ? AND attempts >= ?",
+                (queue, now, self.max_attempts)
+            ).fetchall()
+            for item_id, url, attempts in exhausted:
+                logger.warning(f"Lease expired for {url} after {attempts} attempts; marking it failed")
+                failure = scan_failure('unknown', 'lease_expired', f"lease expired after {attempts} attempts")
+                conn.execute(
+                    "UPDATE work_items SET status = 'failed', result_json = ?, lease_owner = NULL,"
+                    " lease_expires = NULL, finished_at = ? WHERE item_id = ?",
+                    (json.dumps(failed_result(url, failure, attempts)), now, item_id)
+                )
+            rows = conn.execute(
+                "SELECT item_id, website_url, status FROM work_items WHERE queue = ? AND"
+                " (status = 'pending' OR (status = 'leased' AND lease_expires < ?))"
+                " ORDER BY item_id LIMIT ?",
+                (queue, now, limit)
+            ).fetchall()
+            for item_id, url, status in rows:
+                if status == 'leased':
+                    logger.warning(f"Lease expired for {url}; re-queuing it to {worker_id}")
+                conn.execute(
+                    "UPDATE work_items SET status = 'leased', lease_owner = ?, lease_expires = ?,"
+                    " attempts = attempts + 1 WHERE item_id = ?",
+                    (worker_id, now + lease_seconds, item_id)
+                )
+            conn.execute("COMMIT")
+        return [(item_id, url) for item_id, url, _ in rows]
+
+    def renew(self, item_ids, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Extend the leases ``worker_id`` holds on ``item_ids``"""
+        if not item_ids:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE work_items SET lease_expires = ? WHERE item_id = ? AND lease_owner = ? AND status = 'leased'",
+                [(time.time() + lease_seconds, item_id, worker_id) for item_id in item_ids]
+            )
+
+    def complete(self, item_id, worker_id, result):
+        """Store the result of a leased URL; ignored if the lease was lost to another worker"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE work_items SET status = 'done', result_json = ?, finished_at = ?, lease_expires = NULL"
+                " WHERE item_id = ? AND lease_owner = ? AND status = 'leased'",
+                (json.dumps(result), time.time(), item_id, worker_id)
+            )
+        return bool(cursor.rowcount)
+
+    def fail(self, item_id, worker_id, result, max_attempts=None):
+        """Release a failed URL for another attempt, or mark it failed once attempts run out"""
+        max_attempts = self.max_attempts if max_attempts is None else max_attempts
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE work_items SET"
+                " status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " result_json = ?, lease_owner = NULL, lease_expires = NULL,"
+                " finished_at = CASE WHEN attempts >= ? THEN ? ELSE NULL END"
+                " WHERE item_id = ? AND lease_owner = ? AND status = 'leased'",
+                (max_attempts, json.dumps(result), max_attempts, time.time(), item_id, worker_id)
+            )
+        return bool(cursor.rowcount)
+
+    def requeue_failed(self, queue='default'):
+        """Put every failed URL of ``queue`` back to pending with a fresh attempt budget"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE work_items SET status = 'pending', attempts = 0, finished_at = NULL"
+                " WHERE queue = ? AND status = 'failed'",
+                (queue,)
+            )
+        return cursor.rowcount
+
+    def counts(self, queue='default'):
+        """Return ``{status: count}`` for ``queue``"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM work_items WHERE queue = ? GROUP BY status", (queue,)
+            ).fetchall()
+        return dict(rows)
+
+    def iter_results(self, queue='default', batch_size=500):
+        """Yield stored results of finished URLs in ``queue`` without loading them all at once"""
+        last_id = 0
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT item_id, result_json FROM work_items WHERE queue = ? AND item_id > ?"
+                    " AND status IN ('done', 'failed') AND result_json IS NOT NULL ORDER BY item_id LIMIT ?",
+                    (queue, last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for item_id, result_json in rows:
+                yield json.loads(result_json)
+            last_id = rows[-1][0]
+
+def parse_scan_data(scan_data):
+    """Flatten a get-scan-details payload into a result row; also used to re-parse archived scans"""
+    if not scan_data or 'result' not in scan_data:
+        return {}
+
+    result = scan_data['result']
+    parsed_results = {
+        'scanStatus': scan_data.get('scanStatus', ''),
+        'verdict': result.get('verdict', ''),
+        'score': result.get('score'),
+        'detectedCMS': result.get('detectedCMS', ''),
+        'totalElements': result.get('totalElements'),
+        'timeToScan': result.get('timeToScan')
+    }
+
+    # Parse individual report categories
+    reports = result.get('reports', {})
+    for category, category_data in reports.items():
+        if isinstance(category_data, dict):
+            parsed_results[f'{category}_verdict'] = category_data.get('verdict', '')
+            parsed_results[f'{category}_score'] = category_data.get('score')
+
+            # Parse individual tests within each category
+            for test_name, test_data in category_data.items():
+                if isinstance(test_data, dict) and 'score' in test_data:
+                    parsed_results[f'{category}_{test_name}_score'] = test_data.get('score')
+                    parsed_results[f'{category}_{test_name}_failures'] = test_data.get('failures')
+                    parsed_results[f'{category}_{test_name}_successes'] = test_data.get('successes')
+
+    return parsed_results
+
+class AccessibilityChecker:
+    def __init__(self, poll=True, poll_initial_delay=DEFAULT_POLL_INITIAL_DELAY,
+                 poll_interval=DEFAULT_POLL_INTERVAL, poll_backoff=DEFAULT_POLL_BACKOFF,
+                 poll_max_interval=DEFAULT_POLL_MAX_INTERVAL, poll_jitter=DEFAULT_POLL_JITTER,
+                 poll_deadline=DEFAULT_POLL_DEADLINE, cache=None, rate_limits=None,
+                 base_url=None, pool_size=DEFAULT_MAX_WORKERS, timeouts=None, breaker=None,
+                 screenshots=DEFAULT_CAPTURE_SCREENSHOTS, archive=None, rate_limiters=None):
+        self.base_url = (base_url or ACSBACE_BASE_URL).rstrip('/')
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.breaker = breaker or CircuitBreaker()
+        self.cache = cache
+        self.archive = archive
+        self.poll = poll
+        self.poll_initial_delay = poll_initial_delay
+        self.poll_interval = poll_interval
+        self.poll_backoff = poll_backoff
+        self.poll_max_interval = poll_max_interval
+        self.poll_jitter = poll_jitter
+        self.poll_deadline = poll_deadline
+        self.screenshots = screenshots
+        self.pool_size = pool_size
+        self.unsafe_prefixes = [f"{self.base_url}{path}" for path in NON_IDEMPOTENT_ENDPOINTS]
+        self.session = build_session(pool_size, unsafe_prefixes=self.unsafe_prefixes)
+        self._local = threading.local()
+        # Checkers that share ``rate_limiters`` and ``breaker`` stay within one budget towards the scanner
+        self.rate_limiters = rate_limiters or build_rate_limiters(rate_limits)
+
+    @contextmanager
+    def _timed(self, phase):
+        """Add the time spent in the block to the current scan's ``phase`` timing"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics = getattr(self._local, 'metrics', None)
+            if metrics is not None:
+                metrics[phase] = metrics.get(phase, 0.0) + time.perf_counter() - started
+
+    def _count(self, name, amount=1):
+        metrics = getattr(self._local, 'metrics', None)
+        if metrics is not None:
+            metrics[name] = metrics.get(name, 0) + amount
+
+    def _fail(self, phase, cause, detail='', http_status=None):
+        self._local.failure = scan_failure(phase, cause, detail, http_status)
+
+    def _fail_request(self, phase, error):
+        cause, http_status = classify_request_error(error)
+        self._fail(phase, cause, error, http_status)
+
+    def last_failure(self):
+        """Return why the last check_single_website call on this thread failed, or None"""
+        return getattr(self._local, 'failure', None)
+
+    def _api_get(self, endpoint, url, stream=False):
+        """GET an acsbace.com endpoint within its rate budget, backing off on 429/5xx.
+
+        With ``stream``, the body is left unread for the caller, who also
+        counts the bytes it reads and closes the response.
+        """
+        limiter = self.rate_limiters[endpoint]
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            if attempt:
+                self._count('retries')
+            self.breaker.wait_until_closed()
+            limiter.acquire()
+            try:
+                response = self.session.get(url, timeout=self.timeouts[endpoint], stream=stream)
+            except requests.RequestException:
+                self.breaker.record_failure()
+                raise
+            if not stream:
+                self._count('bytes', len(response.content))
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if response.status_code != 429 and response.status_code < 500:
+                limiter.on_success()
+                break
+            limiter.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+            response.close()
+        response.raise_for_status()
+        return response
+
+    def extract_token_from_html(self, html_content):
+        """Extract data-token from HTML response"""
+        token_pattern = r'data-token="([^"]+)"'
+        match = re.search(token_pattern, html_content)
+        if match:
+            return match.group(1)
+        return None
+
+    def get_loading_page(self, website_url):
+        """Step 1: Get the loading page and extract token"""
+        encoded_url = quote(website_url, safe='')
+        loading_url = f"{self.base_url}/loading?website={encoded_url}&isPartner=false&embedder=accessibe.com"
+
+        try:
+            # Stop parsing as soon as the token has been seen
+            with self._api_get('loading', loading_url, stream=True) as response:
+                chunks = response.iter_content(LOADING_CHUNK_BYTES)
+                token, read = extract_token_from_stream(chunks)
+                unread = int(response.headers.get('Content-Length') or -1) - response.raw.tell()
+                if token and 0 < unread <= LOADING_DRAIN_BYTES:
+                    # Reconnecting costs more than reading a short rest; a drained response is pooled again
+                    read += sum(len(chunk) for chunk in chunks)
+            self._count('bytes', read)
+            if not token:
+                logger.error(f"Could not extract token for {website_url}")
+                if read >= LOADING_MAX_BYTES:
+                    self._fail('token', 'response_too_large', f"no data-token in the first {read} bytes of HTML")
+                else:
+                    self._fail('token', 'token_missing', f"no data-token in {read} bytes of HTML")
+                return None
+
+            logger.info(f"Token extracted for {website_url}: {token}")
+            return token
+
+        except requests.RequestException as e:
+            logger.error(f"Error getting loading page for {website_url}: {str(e)}")
+            self._fail_request('token', e)
+            return None
+
+    def start_evaluation(self, website_url, token):
+        """Step 2: Start the evaluation process"""
+        encoded_url = quote(website_url, safe='')
+        screenshot = 'true' if self.screenshots else 'false'
+        evaluate_url = f"{self.base_url}/evaluate?website={encoded_url}&screenshot={screenshot}&token={token}&isPartner=false&embedder=accessibe.com"
+
+        try:
+            # _api_get raises for error statuses, so reaching the log line means the scan started
+            self._api_get('evaluate', evaluate_url)
+
+            logger.info(f"Evaluation started for {website_url}")
+            return True
+
+        except requests.RequestException as e:
+            logger.error(f"Error starting evaluation for {website_url}: {str(e)}")
+            self._fail_request('evaluate', e)
+            return False
+
+    def get_scan_details(self, token):
+        """Step 3: Get detailed scan results"""
+        details_url = f"{self.base_url}/get-scan-details?scanId={token}&embedder=accessibe.com"
+
+        try:
+            with self._timed('details'):
+                response = self._api_get('details', details_url)
+
+            scan_data = response.json()
+            logger.info(f"Scan details retrieved for token: {token}")
+            return scan_data
+
+        except json.JSONDecodeError as e:
+            # Checked first: requests' own JSONDecodeError is also a RequestException
+            logger.error(f"Error parsing JSON response for token {token}: {str(e)}")
+            self._fail('details', 'json_decode', e)
+            return None
+        except requests.RequestException as e:
+            logger.error(f"Error getting scan details for token {token}: {str(e)}")
+            self._fail_request('details', e)
+            return None
+
+    def check_for_changes(self, website_url, fingerprint=None):
+        """Fetch a page directly and compare it with its fingerprint from the last scan.
+
+        Uses a conditional request (ETag / Last-Modified) and falls back to a
+        normalized content hash. Returns ``(changed, new_fingerprint)``;
+        ``new_fingerprint`` is ``None`` if the page could not be fetched.
+        """
+        headers = {}
+        if fingerprint:
+            if fingerprint.get('etag'):
+                headers['If-None-Match'] = fingerprint['etag']
+            if fingerprint.get('last_modified'):
+                headers['If-Modified-Since'] = fingerprint['last_modified']
+
+        try:
+            response = self.session.get(website_url, headers=headers, timeout=self.timeouts['page'])
+            if response.status_code == 304 and fingerprint:
+                logger.info(f"Page not modified since last scan: {website_url}")
+                return False, fingerprint
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(f"Error fetching {website_url} for change detection: {str(e)}")
+            return True, None
+
+        new_fingerprint = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': content_hash(response.text)
+        }
+        changed = not fingerprint or fingerprint.get('content_hash') != new_fingerprint['content_hash']
+        if not changed:
+            logger.info(f"Page content unchanged since last scan: {website_url}")
+        return changed, new_fingerprint
+
+    def find_unchanged_pages(self, urls, max_workers=DEFAULT_MAX_WORKERS):
+        """Run change detection for ``urls`` against the cache.
+
+        Returns ``(unchanged, fingerprints)``: the set of indexes into ``urls``
+        whose content has not changed since their last successful scan, and a
+        mapping from index to the fingerprint fetched for each page.
+        """
+        unchanged = set()
+        fingerprints = {}
+        if self.cache is None:
+            return unchanged, fingerprints
+
+        def detect(url):
+            previous = self.cache.get_fingerprint(url)
+            changed, fingerprint = self.check_for_changes(url, previous)
+            return changed, previous is not None, fingerprint
+
+        with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+            futures = {executor.submit(detect, url): i for i, url in enumerate(urls)}
+            for future in as_completed(futures):
+                i = futures[future]
+                changed, had_previous, fingerprint = future.result()
+                if fingerprint:
+                    fingerprints[i] = fingerprint
+                if had_previous and not changed:
+                    unchanged.add(i)
+        return unchanged, fingerprints
+
+    def wait_for_scan(self, token, website_url=None):
+        """Poll get-scan-details until the scan finishes or the deadline passes.
+
+        Returns ``(scan_data, polls)``. ``scan_data`` is ``None`` if the scan
+        failed, never completed before the deadline, or could not be fetched.
+        """
+        label = website_url or token
+        if not self.poll:
+            time.sleep(FIXED_SCAN_WAIT)
+            scan_data = self.get_scan_details(token)
+            if scan_data and scan_data.get('scanStatus', '') not in SCAN_COMPLETE_STATUSES:
+                self._fail('wait', 'scan_timeout', f"scanStatus '{scan_data.get('scanStatus', '')}' after {FIXED_SCAN_WAIT}s")
+                return None, 1
+            return scan_data, 1
+
+        deadline = time.monotonic() + self.poll_deadline
+        delay = self.poll_initial_delay
+        interval = self.poll_interval
+        polls = 0
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error(f"Scan for {label} did not complete within {self.poll_deadline}s ({polls} polls)")
+                last_error = self.last_failure()
+                self._fail('wait', 'scan_timeout', f"not complete after {self.poll_deadline}s and {polls} polls"
+                           + (f"; last poll: {last_error['failureDetail']}" if last_error else ''))
+                return None, polls
+            time.sleep(min(delay, remaining))
+
+            scan_data = self.get_scan_details(token)
+            polls += 1
+            status = scan_data.get('scanStatus', '') if scan_data else ''
+            if status in SCAN_COMPLETE_STATUSES:
+                logger.info(f"Scan for {label} completed after {polls} polls")
+                return scan_data, polls
+            if status in SCAN_FAILED_STATUSES:
+                logger.error(f"Scan for {label} finished with status '{status}'")
+                self._fail('wait', 'scan_failed', f"scanStatus '{status}'")
+                return None, polls
+
+            delay = interval * random.uniform(1 - self.poll_jitter, 1 + self.poll_jitter)
+            interval = min(interval * self.poll_backoff, self.poll_max_interval)
+
+    def parse_scan_results(self, scan_data):
+        """Parse the scan results and extract relevant information"""
+        return parse_scan_data(scan_data)
+
+    def check_single_website(self, website_url, progress_callback=None):
+        """Check accessibility for a single website"""
+        logger.info(f"Starting accessibility check for: {website_url}")
+        metrics = self._local.metrics = {}
+        self._local.failure = None
+        started = time.perf_counter()
+
+        if progress_callback:
+            progress_callback(f"Getting token for {website_url}")
+
+        # Step 1: Get token
+        with self._timed('token'):
+            token = self.get_loading_page(website_url)
+        if not token:
+            return None
+
+        if progress_callback:
+            progress_callback(f"Starting evaluation for {website_url}")
+
+        # Step 2: Start evaluation
+        with self._timed('evaluate'):
+            if not self.start_evaluation(website_url, token):
+                return None
+
+        # Step 3: Wait for the scan to complete and get scan details
+        if progress_callback:
+            progress_callback(f"Waiting for scan to complete for {website_url}")
+
+        with self._timed('wait'):
+            scan_data, polls = self.wait_for_scan(token, website_url)
+        if not scan_data:
+            return None
+
+        # Parse results
+        with self._timed('parse'):
+            parsed_results = self.parse_scan_results(scan_data)
+        if not parsed_results:
+            self._fail('parse', 'invalid_result', f"no 'result' in scan data with keys {sorted(scan_data)[:10]}")
+            return None
+        parsed_results['pollCount'] = polls
+        if self.screenshots:
+            # The screenshot itself is only fetched when the page is opened (fetch_screenshot)
+            parsed_results['scanId'] = token
+            scan_data.pop('screenshot', None)
+            scan_data['result'].pop('screenshot', None)
+        parsed_results['website_url'] = website_url
+        parsed_results['accessibe_url'] = f"https://accessibe.com/accessscan?website={website_url}"
+
+        # Record where the time went; waiting excludes the details fetches themselves
+        metrics['wait'] = metrics.get('wait', 0.0) - metrics.get('details', 0.0)
+        for phase, column in PHASE_COLUMNS.items():
+            parsed_results[column] = round(1000 * metrics.get(phase, 0.0), 1)
+        parsed_results['totalMs'] = round(1000 * (time.perf_counter() - started), 1)
+        parsed_results['retryCount'] = metrics.get('retries', 0)
+        parsed_results['bytesTransferred'] = metrics.get('bytes', 0)
+        self._local.metrics = None
+
+        if self.archive is not None:
+            try:
+                parsed_results['rawBlob'] = self.archive.put(website_url, scan_data)
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Could not archive the scan of {website_url}: {str(e)}")
+
+        if self.cache is not None:
+            self.cache.put(website_url, parsed_results)
+
+        return parsed_results
+
+    def fetch_screenshot(self, scan_id):
+        """Fetch the screenshot rendered for a scan started with screenshots on; returns image bytes or None"""
+        scan_data = self.get_scan_details(scan_id)
+        if not scan_data:
+            return None
+        screenshot = scan_data.get('screenshot') or (scan_data.get('result') or {}).get('screenshot')
+        if not screenshot:
+            return None
+        if screenshot.startswith('data:'):
+            return base64.b64decode(screenshot.split(',', 1)[1])
+        try:
+            response = self._api_get('details', urljoin(f"{self.base_url}/", screenshot))
+        except requests.RequestException as e:
+            logger.error(f"Error fetching screenshot for scan {scan_id}: {str(e)}")
+            return None
+        return response.content
+
+    def check_websites(self, urls, max_workers=DEFAULT_MAX_WORKERS):
+        """Check many websites concurrently.
+
+        ``urls`` may be any iterable and is consumed lazily, so only a bounded
+        number of scans are queued at once. Yields ``(index, url, result,
+        failure)`` tuples in completion order, where ``index`` is the position
+        of ``url`` in ``urls``, ``result`` is the output of
+        ``check_single_website`` (``None`` on failure) and ``failure`` is the
+        ``scan_failure`` description of a failed scan (``None`` on success).
+        """
+        def scan(url):
+            try:
+                result = self.check_single_website(url)
+            except Exception as e:
+                logger.error(f"Unexpected error checking {url}: {str(e)}")
+                self._fail('unknown', 'unexpected', f"{type(e).__name__}: {e}")
+                result = None
+            return result, None if result else (self.last_failure() or scan_failure('unknown', 'unexpected'))
+
+        max_workers = max(1, int(max_workers))
+        if max_workers > self.pool_size:
+            self.pool_size = max_workers
+            mount_adapters(self.session, max_workers, unsafe_prefixes=self.unsafe_prefixes)
+        url_iter = enumerate(urls)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = {}
+            try:
+                while True:
+                    # Keep the pool busy with a small backlog of queued scans
+                    for i, url in url_iter:
+                        in_flight[executor.submit(scan, url)] = (i, url)
+                        if len(in_flight) >= max_workers * 2:
+                            break
+                    if not in_flight:
+                        return
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        i, url = in_flight.pop(future)
+                        yield (i, url) + future.result()
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+class ScanScheduler:
+    """Orders pages by priority and admits scans only while they can finish within a wall-clock budget.
+
+    A page's priority combines the time since its last successful scan, a
+    low previous score, recent failures and whether it is a program's
+    main_url (PRIORITY_WEIGHTS). The per-page scan time starts from recent
+    runs in the journal and follows the scans of this run as they finish;
+    with ``budget_seconds`` set, a page is only started when it is expected
+    to finish before the budget runs out.
+    """
+
+    def __init__(self, budget_seconds=None, workers=DEFAULT_MAX_WORKERS, main_urls=(), history=None, journal=None):
+        self.budget_seconds = budget_seconds
+        self.workers = max(1, int(workers))
+        self.main_urls = {normalize_url(url) for url in main_urls}
+        self.history = history
+        self.journal = journal
+        self.page_seconds = (journal.recent_scan_seconds() if journal is not None else None) or DEFAULT_PAGE_SECONDS
+        self.started = time.monotonic()
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def priorities(self, urls):
+        """Return the priority of each URL, higher first"""
+        keys = [normalize_url(url) for url in urls]
+        now = time.time()
+        last_scans = self.history.last_scans(keys) if self.history is not None else {}
+        failures = (self.journal.recent_failures(now - PRIORITY_FAILURE_WINDOW_DAYS * 86400)
+                    if self.journal is not None else {})
+        priorities = []
+        for key in keys:
+            scanned_at, score = last_scans.get(key, (None, None))
+            terms = {
+                'staleness': 1.0 if scanned_at is None else min((now - scanned_at) / (PRIORITY_STALE_DAYS * 86400), 1.0),
+                'low_score': 0.5 if score is None else 1.0 - min(max(score, 0.0), 100.0) / 100,
+                'failures': min(failures.get(key, 0) / PRIORITY_MAX_FAILURES, 1.0),
+                'main_url': float(key in self.main_urls),
+            }
+            priorities.append(sum(PRIORITY_WEIGHTS[term] * value for term, value in terms.items()))
+        return priorities
+
+    def order(self, urls):
+        """Return the indexes of ``urls`` from highest to lowest priority"""
+        priorities = self.priorities(urls)
+        return sorted(range(len(priorities)), key=lambda i: -priorities[i])
+
+    def remaining(self):
+        """Seconds left in the budget, or None without a budget"""
+        if self.budget_seconds is None:
+            return None
+        return self.budget_seconds - (time.monotonic() - self.started)
+
+    def admit(self):
+        """Reserve a scan slot if a scan started now is expected to finish within the budget"""
+        with self._lock:
+            remaining = self.remaining()
+            if remaining is not None:
+                # Scans beyond the worker count wait for a slot before they start
+                waiting = max(0, self.in_flight - self.workers + 1)
+                if (waiting / self.workers + 1) * self.page_seconds > remaining:
+                    return False
+            self.in_flight += 1
+            return True
+
+    def observe(self, result):
+        """Release a scan slot and fold its measured wall time into the per-page estimate"""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if result and result.get('totalMs'):
+                seconds = result['totalMs'] / 1000
+                self.page_seconds += LATENCY_SMOOTHING * (seconds - self.page_seconds)
+
+    def estimated_seconds(self, pages):
+        """Estimated wall time to scan ``pages`` more pages at the current per-page estimate"""
+        return (self.in_flight + pages) / self.workers * self.page_seconds
+
+def run_checks(checker, urls, max_workers=DEFAULT_MAX_WORKERS, force_refresh=False,
+               detect_changes=True, progress_callback=None, journal=None, run_id=None,
+               retry_attempts=DEFAULT_RETRY_ATTEMPTS, retry_backoff=DEFAULT_RETRY_BACKOFF, scheduler=None):
+    """Produce a result row for every URL, scanning only what the cache cannot answer.
+
+    When ``journal`` and ``run_id`` are given, URLs that already succeeded in
+    that run are yielded first without rescanning and every new result is
+    checkpointed to the journal. Fresh cached rows follow, then previous
+    results for stale pages whose content has not changed, then scan results
+    as they finish. Yields ``(index, url, result)`` where ``result`` carries a
+    ``resultSource`` of ``'resumed'``, ``'cache'``, ``'reused'`` or
+    ``'scan'``; failed scans are reported with ``failed_result``.
+
+    Scans that fail for a retryable cause are checkpointed as failed but only
+    yielded once the retry passes after the main pass are done: up to
+    ``retry_attempts`` passes, the first after ``retry_backoff`` seconds and
+    each further one after twice the previous wait.
+
+    With a ``scheduler``, pages are scanned in its priority order and only
+    while they can finish within its budget; the rest are yielded as
+    ``deferred_result`` rows and the run is left unfinished, so resuming it
+    in the next window scans them.
+    """
+    cache = checker.cache
+    urls = list(urls)
+    pending = list(range(len(urls)))
+
+    def checkpoint(i, result):
+        if journal is not None and run_id is not None:
+            journal.record(run_id, i, urls[i], result)
+            if checker.archive is not None and result.get('rawBlob'):
+                checker.archive.link(run_id, i, urls[i], result['rawBlob'])
+        return i, urls[i], result
+
+    # Skip URLs that already succeeded earlier in a resumed run
+    if journal is not None and run_id is not None:
+        done = journal.completed_results(run_id)
+        for i, result in sorted(done.items()):
+            result['resultSource'] = 'resumed'
+            yield i, urls[i], result
+        pending = [i for i in pending if i not in done]
+
+    # Serve fresh cached rows instantly; only stale or missing URLs are scanned
+    if cache is not None and not force_refresh:
+        stale = []
+        for i in pending:
+            cached = cache.get(urls[i])
+            if cached:
+                cached['resultSource'] = 'cache'
+                yield checkpoint(i, cached)
+            else:
+                stale.append(i)
+        pending = stale
+
+    # Reuse previous results for stale pages whose content has not changed
+    fingerprints = {}
+    if pending and cache is not None and detect_changes and not force_refresh:
+        if progress_callback:
+            progress_callback(f"Checking {len(pending)} pages for changes...")
+        unchanged, found = checker.find_unchanged_pages([urls[i] for i in pending], max_workers=max_workers)
+        fingerprints = {pending[j]: fingerprint for j, fingerprint in found.items()}
+        reused = set()
+        for j in sorted(unchanged):
+            i = pending[j]
+            previous = cache.get(urls[i], max_age=float('inf'))
+            if previous:
+                previous['resultSource'] = 'reused'
+                cache.touch(urls[i])
+                reused.add(i)
+                yield checkpoint(i, previous)
+        pending = [i for i in pending if i not in reused]
+
+    if scheduler is not None:
+        order = scheduler.order([urls[i] for i in pending])
+        pending = [pending[j] for j in order]
+    if progress_callback:
+        message = f"Scanning {len(pending)} websites, up to {max_workers} at a time"
+        if scheduler is not None:
+            message += f"; estimated {scheduler.estimated_seconds(len(pending)) / 60:.1f} min"
+            if scheduler.remaining() is not None:
+                message += f" with {scheduler.remaining() / 60:.1f} min of budget left"
+        progress_callback(message)
+
+    unadmitted, deferred = [], []
+
+    def admitted(indexes):
+        # Hand out pages while the scheduler expects them to finish in time
+        for position, i in enumerate(indexes):
+            if scheduler is not None and not scheduler.admit():
+                unadmitted.extend(indexes[position:])
+                return
+            yield urls[i]
+
+    # Process URLs concurrently, collecting results as they finish
+    retry, held = {}, {}
+    for attempt in range(retry_attempts + 1):
+        if attempt:
+            if not retry:
+                break
+            delay = retry_backoff * 2 ** (attempt - 1)
+            remaining = scheduler.remaining() if scheduler is not None else None
+            if remaining is not None and delay + scheduler.page_seconds > remaining:
+                # No time left for another pass: report the failures as they are
+                for i in sorted(retry):
+                    yield i, urls[i], failed_result(urls[i], retry[i], attempts=attempt)
+                retry = {}
+                break
+            if progress_callback:
+                progress_callback(f"Retrying {len(retry)} failed websites in {delay:g}s "
+                                  f"(pass {attempt} of {retry_attempts})")
+            time.sleep(delay)
+            held, pending, retry = retry, sorted(retry), {}
+        for j, url, result, failure in checker.check_websites(admitted(pending), max_workers=max_workers):
+            i = pending[j]
+            if scheduler is not None:
+                scheduler.observe(result)
+            if result:
+                result['resultSource'] = 'scan'
+                result['attempts'] = attempt + 1
+                if i in fingerprints:
+                    cache.put_fingerprint(url, fingerprints[i])
+                yield checkpoint(i, result)
+                continue
+            result = failed_result(url, failure, attempts=attempt + 1)
+            if failure['retryable'] and attempt < retry_attempts:
+                # Keep the failure on record in case the run is interrupted before the retry
+                retry[i] = failure
+                checkpoint(i, result)
+            else:
+                yield checkpoint(i, result)
+        for i in unadmitted:
+            if attempt:
+                # Already checkpointed as failed by the previous pass
+                yield i, urls[i], failed_result(urls[i], held[i], attempts=attempt)
+            else:
+                deferred.append(i)
+                yield checkpoint(i, deferred_result(urls[i]))
+        unadmitted.clear()
+
+    if deferred and progress_callback:
+        progress_callback(f"Deferred {len(deferred)} websites that could not finish within the time budget")
+    if journal is not None and run_id is not None and not deferred:
+        journal.finish_run(run_id)
+
+def deferred_result(website_url):
+    """Build the result row recorded for a website left unscanned because the time budget ran out"""
+    return {
+        'website_url': website_url,
+        'accessibe_url': f"https://accessibe.com/accessscan?website={website_url}",
+        'scanStatus': 'deferred',
+        'resultSource': 'deferred',
+        'verdict': '',
+        'score': None
+    }
+
+def failed_result(website_url, failure=None, attempts=None):
+    """Build the result row recorded for a website that could not be scanned.
+
+    ``failure`` is a ``scan_failure`` dict; its phase, cause, detail and HTTP
+    status are copied into the row.
+    """
+    result = {
+        'website_url': website_url,
+        'accessibe_url': f"https://accessibe.com/accessscan?website={website_url}",
+        'scanStatus': 'failed',
+        'verdict': '',
+        'score': None
+    }
+    if failure:
+        result.update({key: value for key, value in failure.items() if key != 'retryable'})
+    if attempts is not None:
+        result['attempts'] = attempts
+    return result
@@ -0,0 +1,214 @@
+"""Headless batch entry point for the accessibility checker.
+
+Examples:
+    python cli.py all -o results.jsonl
+    python cli.py "Counselor Education" --workers 4
+    python cli.py --url-file urls.txt --force-refresh
+    python cli.py all -o results.jsonl --resume
+    python cli.py all -o retried.jsonl --retry-failures
+    python cli.py all --export results.xlsx
+    python cli.py all --budget 60 --resume         # nightly window of one hour
+
+Pages listed more than once (also under different programs or URL
+spellings) are checked once. One JSON object is written per unique page,
+with the programs listing it, as soon as it finishes, followed by a
+summary line on stderr. Exit code is 0 when every page succeeded, 1 when
+some pages failed and 2 on usage errors. Every result is also checkpointed
+to the run journal; with --resume, pages that already succeeded in the last
+unfinished run of the same target are skipped and not written again.
+Failed pages carry their failure phase and cause. Retryable failures are
+retried after the main pass (--retries, --retry-backoff); --retry-failures
+starts a new run that only rescans the pages that failed in the last run.
+Finished runs are added to the score history and score drops since the
+last run of the same target are reported on stderr.
+With --budget, pages are scanned from the highest priority down (stale,
+low-scoring, recently failing and program main pages first) and only while
+they are expected to finish within the budget; the rest are written as
+deferred and scanned by the next run with --resume.
+--export writes the whole run, one row per listed page, to an xlsx, csv,
+jsonl or parquet file (by extension), streamed from the journal.
+"""
+import argparse
+import json
+import sys
+import time
+
+from catalog import load_catalog
+from checker import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_POLL_DEADLINE,
+    DEFAULT_CACHE_TTL_HOURS,
+    DEFAULT_RETRY_ATTEMPTS,
+    DEFAULT_RETRY_BACKOFF,
+    AccessibilityChecker,
+    ScanCache,
+    RunJournal,
+    RunMetrics,
+    PageIndex,
+    ScanArchive,
+    ScanScheduler,
+    run_checks,
+)
+from export import export_format, write_export
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_USAGE = 2
+
+
+def collect_pages(target, url_file):
+    """Return a PageIndex for a program name or "all" from the catalog, or a file with one URL per line"""
+    if url_file:
+        with open(url_file, encoding='utf-8') as f:
+            return PageIndex(("", line.strip()) for line in f if line.strip() and not line.startswith('#'))
+
+    programs = load_catalog()["uf_education_programs"]
+    if target.lower() == 'all':
+        return PageIndex.from_programs(programs)
+    for program in programs:
+        if program["name"].lower() == target.lower():
+            return PageIndex.from_programs([program])
+    raise ValueError(f"Unknown program: {target}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run accessibility scans without the Streamlit UI")
+    parser.add_argument('target', nargs='?', default=None,
+                        help='program name from the catalog, or "all"')
+    parser.add_argument('--url-file', help='file with one URL per line (instead of a program)')
+    parser.add_argument('-o', '--output', default='-',
+                        help='JSONL output path (default: stdout); appended to if it exists')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS, help='concurrent scans')
+    parser.add_argument('--deadline', type=float, default=DEFAULT_POLL_DEADLINE,
+                        help='seconds to wait for each scan to complete')
+    parser.add_argument('--no-cache', action='store_true', help='do not read or write the result cache')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL_HOURS,
+                        help='cache TTL in hours')
+    parser.add_argument('--screenshots', action='store_true',
+                        help='have the scanner render page screenshots (slower; off by default)')
+    parser.add_argument('--no-archive', action='store_true',
+                        help='do not keep the raw scan JSON in the scan archive (see reparse.py)')
+    parser.add_argument('--force-refresh', action='store_true', help='rescan every page')
+    parser.add_argument('--no-change-detection', action='store_true',
+                        help='rescan stale pages even if their content did not change')
+    parser.add_argument('--metrics-file', default=None,
+                        help='Prometheus text-file path for run metrics (default: in the data directory)')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue the last unfinished run of the same target')
+    parser.add_argument('--retry-failures', action='store_true',
+                        help='rescan only the pages that failed in the last run of the same target')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRY_ATTEMPTS,
+                        help='retry passes for retryable failures after the main pass')
+    parser.add_argument('--retry-backoff', type=float, default=DEFAULT_RETRY_BACKOFF,
+                        help='seconds before the first retry pass, doubled for each further pass')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='wall-clock budget in minutes; pages that cannot finish in time are deferred')
+    parser.add_argument('--export', default=None,
+                        help='also export the run to this .xlsx, .csv, .jsonl or .parquet file')
+    parser.add_argument('--no-history', action='store_true',
+                        help='do not add this run to the score history or compare it with the last run')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if bool(args.target) == bool(args.url_file):
+        parser.print_usage(sys.stderr)
+        print("error: give either a program name / \"all\" or --url-file", file=sys.stderr)
+        return EXIT_USAGE
+    if args.export:
+        # Checked before scanning so a typo does not cost the whole run
+        try:
+            export_fmt = export_format(args.export)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return EXIT_USAGE
+
+    try:
+        page_index = collect_pages(args.target, args.url_file)
+    except (ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    urls = page_index.unique_urls
+    print(f"{len(page_index.entries)} pages listed, {len(urls)} unique pages to check", file=sys.stderr)
+
+    cache = None if args.no_cache else ScanCache(ttl_hours=args.cache_ttl)
+    checker = AccessibilityChecker(poll_deadline=args.deadline, cache=cache, pool_size=args.workers,
+                                   screenshots=args.screenshots, archive=None if args.no_archive else ScanArchive())
+
+    label = args.url_file or args.target
+    journal = RunJournal()
+    run_id = journal.find_unfinished_run(label, urls) if args.resume else None
+    if args.retry_failures:
+        last_run = journal.find_last_run(label, urls)
+        if last_run is None:
+            print(f"error: no earlier run of {label} to retry", file=sys.stderr)
+            return EXIT_USAGE
+        run_id = journal.start_run(label, urls)
+        journal.carry_over(last_run, run_id)
+    elif run_id is None:
+        run_id = journal.start_run(label, urls)
+
+    if args.no_history:
+        history = None
+    else:
+        # Imported here so runs without history never load pandas
+        from results import RunHistory
+        history = RunHistory()
+    scheduler = ScanScheduler(budget_seconds=args.budget * 60 if args.budget else None, workers=args.workers,
+                              main_urls=[program['main_url'] for program in load_catalog()['uf_education_programs']],
+                              history=history, journal=journal)
+    run_metrics = RunMetrics()
+    counts = {'success': 0, 'failed': 0, 'deferred': 0, 'cache': 0, 'reused': 0, 'resumed': 0}
+    started = time.monotonic()
+    out = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    try:
+        for i, _, result in run_checks(checker, urls, max_workers=args.workers,
+                                       force_refresh=args.force_refresh,
+                                       detect_changes=not args.no_change_detection,
+                                       journal=journal, run_id=run_id,
+                                       retry_attempts=args.retries, retry_backoff=args.retry_backoff,
+                                       scheduler=scheduler):
+            run_metrics.observe(result)
+            status = result.get('scanStatus')
+            counts[status if status in ('success', 'deferred') else 'failed'] += 1
+            if result.get('resultSource') in ('cache', 'reused', 'resumed'):
+                counts[result['resultSource']] += 1
+            if result.get('resultSource') == 'resumed':
+                continue
+            result['programs'] = [name for name in page_index.programs_for(i) if name]
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    regressions = None
+    if history is not None and not counts['deferred']:
+        history.record(run_id, label, (result for _, result in journal.iter_results(run_id)))
+        previous = history.previous_run(run_id)
+        if previous:
+            regressions = history.diff(previous, run_id)['regressions']
+            for row in regressions.head(20).itertuples():
+                where = f" {row.category}/{row.test}" if row.test else f" {row.category}" if row.category else ""
+                print(f"regression: {row.website_url}{where} {row.before:.1f} -> {row.after:.1f}", file=sys.stderr)
+
+    if args.export:
+        def export_rows():
+            for index, result in journal.iter_results(run_id):
+                yield from page_index.expand(index, result)
+        write_export(export_rows, export_fmt, args.export)
+
+    elapsed = time.monotonic() - started
+    run_metrics.write_prometheus(args.metrics_file)
+    for (phase, cause), count in sorted(run_metrics.failures.items(), key=lambda item: -item[1]):
+        print(f"failures: phase={phase} cause={cause} pages={count}", file=sys.stderr)
+    print(f"summary: total={len(urls)} success={counts['success']} failed={counts['failed']} "
+          f"deferred={counts['deferred']} cached={counts['cache']} reused={counts['reused']} resumed={counts['resumed']} "
+          f"regressions={0 if regressions is None else len(regressions)} elapsed={elapsed:.1f}s", file=sys.stderr)
+    return EXIT_FAILURES if counts['failed'] else EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Refresh the program catalog by discovering the live pages of each program.
+
+Starting from every program's main_url, the crawler reads the site's
+sitemap.xml and follows in-scope links (same host, under main_url's path)
+up to --depth hops. It checks that each page answers with HTML and writes
+a refreshed catalog. The UI, cli.py and worker.py then scan that catalog
+instead of the hand-maintained list, so new pages are covered and dead ones
+are skipped.
+
+    python discover.py                         # all programs -> data directory
+    python discover.py --program SITE --depth 1 --dry-run
+    python discover.py --catalog-file programs.json -o catalog.json
+
+The input catalog defaults to the last refreshed one (or the built-in list),
+so hand-listed and previously found pages are re-checked on every refresh.
+Feeds, WordPress internals and file links are not added; hand-listed ones
+are kept unchecked, and discovered ones are reported as skipped.
+
+Only a definitive answer (404/410, or a page that is not HTML) drops a
+page. Listed pages that time out or fail with another error are kept and
+reported as unreachable, and a program whose main_url cannot be reached
+keeps its page list unchanged, so an outage during a refresh loses nothing.
+"""
+import argparse
+import json
+import sys
+
+from catalog import CATALOG_PATH, load_catalog, write_catalog
+from checker import (
+    DEFAULT_DISCOVERY_CONCURRENCY,
+    DEFAULT_DISCOVERY_DEPTH,
+    DEFAULT_DISCOVERY_MAX_PAGES,
+    DEFAULT_DISCOVERY_RATE,
+    SiteCrawler,
+)
+from cli import EXIT_OK, EXIT_USAGE
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Discover live program pages and write a refreshed catalog")
+    parser.add_argument('--catalog-file', default=None,
+                        help='input catalog JSON (default: the current catalog)')
+    parser.add_argument('-o', '--output', default=CATALOG_PATH, help='where to write the refreshed catalog')
+    parser.add_argument('--program', action='append', default=[],
+                        help='only refresh this program (repeatable); others are copied unchanged')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DISCOVERY_DEPTH, help='link hops followed from main_url')
+    parser.add_argument('--max-pages', type=int, default=DEFAULT_DISCOVERY_MAX_PAGES, help='pages kept per program')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_DISCOVERY_CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=DEFAULT_DISCOVERY_RATE, help='requests per second to the site')
+    parser.add_argument('--no-sitemap', action='store_true', help='only follow links')
+    parser.add_argument('--ignore-robots', action='store_true', help='do not read robots.txt')
+    parser.add_argument('--report', default=None,
+                        help='also write the added, dead, unreachable and skipped pages per program as JSON')
+    parser.add_argument('--dry-run', action='store_true', help='report changes without writing the catalog')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.catalog_file:
+            with open(args.catalog_file, encoding='utf-8') as f:
+                catalog = json.load(f)
+        else:
+            catalog = load_catalog()
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    programs = catalog['uf_education_programs']
+    names = {program['name'].lower() for program in programs}
+    unknown = [name for name in args.program if name.lower() not in names]
+    if unknown:
+        print(f"error: Unknown program: {', '.join(unknown)}", file=sys.stderr)
+        return EXIT_USAGE
+    selected = {name.lower() for name in args.program} or names
+
+    crawler = SiteCrawler(max_depth=args.depth, max_pages=args.max_pages, concurrency=args.concurrency,
+                          rate=args.rate, use_sitemap=not args.no_sitemap, respect_robots=not args.ignore_robots)
+    refreshed, report = crawler.refresh_catalog(
+        dict(catalog, uf_education_programs=[p for p in programs if p['name'].lower() in selected]),
+        progress_callback=lambda message: print(message, file=sys.stderr))
+    by_name = {program['name']: program for program in refreshed['uf_education_programs']}
+    refreshed['uf_education_programs'] = [by_name.get(program['name'], program) for program in programs]
+
+    for entry in report:
+        if entry['unchanged']:
+            print(f"{entry['program']}: main_url unreachable, {entry['pages']} pages kept unchanged", file=sys.stderr)
+            continue
+        print(f"{entry['program']}: {entry['pages']} live pages, {len(entry['added'])} new, "
+              f"{len(entry['dead'])} dead, {len(entry['unreachable'])} unreachable, "
+              f"{len(entry['skipped'])} skipped", file=sys.stderr)
+        for url in entry['dead']:
+            print(f"  dead: {url}", file=sys.stderr)
+        for url in entry['unreachable']:
+            print(f"  unreachable: {url}", file=sys.stderr)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if not args.dry_run:
+        print(f"catalog written to {write_catalog(refreshed, args.output)}", file=sys.stderr)
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
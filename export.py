@@ -0,0 +1,107 @@
+"""Streaming export of result rows to XLSX, CSV, JSONL and Parquet; openpyxl and pyarrow load on first use."""
+import csv
+import json
+import os
+
+# Export formats and their MIME types
+EXPORT_FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+# Rows buffered per chunk when writing Parquet
+EXPORT_CHUNK_ROWS = 5000
+# Columns placed first in exports and the results table
+LEADING_COLUMNS = ['program', 'website_url', 'accessibe_url', 'scanStatus', 'verdict', 'score']
+
+def export_format(path):
+    """Return the export format implied by a file name; raises ValueError for an unknown extension"""
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"cannot export to '{path}': use a {', '.join(f'.{fmt}' for fmt in EXPORT_FORMATS)} file")
+    return extension
+
+def _export_value(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (list, tuple)):
+        return '; '.join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+def export_columns(rows):
+    """Scan rows once and return ``(columns, numeric_columns)`` in export order"""
+    seen = {}
+    for row in rows:
+        for key, value in row.items():
+            value = _export_value(value)
+            numeric = seen.get(key, True)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                numeric = False
+            seen[key] = numeric
+    leading = [column for column in LEADING_COLUMNS if column in seen]
+    columns = leading + sorted(column for column in seen if column not in LEADING_COLUMNS)
+    return columns, {column for column, numeric in seen.items() if numeric}
+
+def write_export(rows_source, fmt, path):
+    """Stream result rows to ``path`` as xlsx, csv, jsonl or parquet.
+
+    ``rows_source`` is a callable returning a fresh iterable of result dicts;
+    formats that need the full column list up front read it twice, so memory
+    use does not grow with the number of rows.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if fmt == 'jsonl':
+        with open(path, 'w', encoding='utf-8') as f:
+            for row in rows_source():
+                f.write(json.dumps(row) + '\n')
+        return path
+
+    columns, numeric_columns = export_columns(rows_source())
+    if fmt == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in rows_source():
+                writer.writerow(['' if (value := _export_value(row.get(column))) is None else value
+                                 for column in columns])
+    elif fmt == 'xlsx':
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Results')
+        sheet.append(columns)
+        for row in rows_source():
+            sheet.append([_export_value(row.get(column)) for column in columns])
+        workbook.save(path)
+    elif fmt == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export requires the pyarrow package") from e
+        schema = pa.schema([(column, pa.float64() if column in numeric_columns else pa.string())
+                            for column in columns])
+
+        def convert(row):
+            converted = {}
+            for column in columns:
+                value = _export_value(row.get(column))
+                if value is not None:
+                    value = float(value) if column in numeric_columns else str(value)
+                converted[column] = value
+            return converted
+
+        with pq.ParquetWriter(path, schema) as writer:
+            chunk = []
+            for row in rows_source():
+                chunk.append(convert(row))
+                if len(chunk) >= EXPORT_CHUNK_ROWS:
+                    writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                    chunk = []
+            if chunk:
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return path
@@ -0,0 +1,309 @@
+"""Background scan jobs shared by every session of the Streamlit app."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from catalog import load_catalog
+from checker import (
+    DATA_DIR,
+    DEFAULT_CAPTURE_SCREENSHOTS,
+    AccessibilityChecker,
+    CircuitBreaker,
+    PageIndex,
+    RunJournal,
+    RunMetrics,
+    ScanArchive,
+    ScanCache,
+    ScanScheduler,
+    ScreenshotStore,
+    build_rate_limiters,
+    failed_result,
+    logger,
+    normalize_url,
+    run_checks,
+)
+from export import write_export
+
+# Background scan jobs running at the same time, and how often the UI checks on them (seconds)
+DEFAULT_MAX_JOBS = 2
+JOB_POLL_INTERVAL = 2
+# Single-page rescans run on their own slots so spot checks never wait behind batch jobs
+DEFAULT_MAX_SPOT_CHECKS = 2
+# Stored single-page results younger than this (seconds) are not rescanned in the background
+REVALIDATE_MIN_AGE = 60
+# Export files kept for download; the least recently used beyond this are removed
+EXPORT_CACHE_MAX_FILES = 32
+
+class JobStore:
+    """Persistent SQLite table of background scan jobs"""
+
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DATA_DIR, 'jobs.sqlite3')
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " job_key TEXT NOT NULL,"
+                " label TEXT NOT NULL,"
+                " entries_json TEXT NOT NULL,"
+                " options_json TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " run_id TEXT,"
+                " done INTEGER NOT NULL DEFAULT 0,"
+                " total INTEGER NOT NULL DEFAULT 0,"
+                " message TEXT NOT NULL DEFAULT '',"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_by_key ON jobs (job_key, status)")
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30))
+
+    def create(self, job_key, label, entries, options):
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, job_key, label, entries_json, options_json, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                (job_id, job_key, label, json.dumps(list(entries)), json.dumps(options), time.time())
+            )
+        return job_id
+
+    def find_active(self, job_key):
+        """Return the id of a queued or running job with the same key, if any"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT job_id FROM jobs WHERE job_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (job_key,) + self.ACTIVE_STATUSES
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['entries'] = json.loads(job.pop('entries_json'))
+        job['options'] = json.loads(job.pop('options_json'))
+        return job
+
+    def update(self, job_id, **fields):
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._connect() as conn, conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", list(fields.values()) + [job_id])
+
+    def active_run_ids(self, exclude_job_id=None):
+        """Return the run ids of queued or running jobs other than ``exclude_job_id``"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT run_id FROM jobs WHERE status IN (?, ?) AND run_id IS NOT NULL AND job_id != ?",
+                self.ACTIVE_STATUSES + (exclude_job_id or '',)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def active_job_ids(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", self.ACTIVE_STATUSES
+            ).fetchall()
+        return [row[0] for row in rows]
+
+class ScanJobService:
+    """Runs scan jobs on a long-lived thread pool, independent of any UI session.
+
+    Identical requests submitted while a matching job is queued or running
+    are merged into that job. Jobs left unfinished by a restart are picked up
+    again and resume from their run journal. Every checker the service builds
+    shares one set of rate limiters and one circuit breaker, so concurrent
+    jobs stay within the configured request rate together.
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, store=None, journal=None, history=None):
+        self.store = store or JobStore()
+        self.journal = journal or RunJournal()
+        self._history = history
+        self.screenshots = ScreenshotStore()
+        self.archive = ScanArchive()
+        self.rate_limiters = build_rate_limiters()
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='scan-job')
+        self._spot_executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_SPOT_CHECKS, thread_name_prefix='spot-check')
+        for job_id in self.store.active_job_ids():
+            self._executor.submit(self._run, job_id)
+
+    @property
+    def history(self):
+        """The score history, opened on first use so pandas is only imported once results are needed"""
+        if self._history is None:
+            from results import RunHistory
+            self._history = RunHistory()
+        return self._history
+
+    def _checker(self, **kwargs):
+        return AccessibilityChecker(rate_limiters=self.rate_limiters, breaker=self.breaker, **kwargs)
+
+    def submit(self, label, entries, options):
+        """Queue a scan of ``entries`` (``(program, url)`` pairs) and return its job id"""
+        entries = [list(entry) for entry in entries]
+        job_key = hashlib.sha256(json.dumps([label, entries, options], sort_keys=True).encode('utf-8')).hexdigest()
+        return self._submit(job_key, label, entries, options, self._executor)
+
+    def revalidate(self, url, options):
+        """Queue a background rescan of one page and return its job id.
+
+        All requests for the same page share one in-flight job, whatever their
+        other options. Pages stored less than REVALIDATE_MIN_AGE seconds ago
+        are answered from the cache instead of being scanned again.
+        """
+        stored = ScanCache(ttl_hours=options['cache_ttl_hours']).latest(url) if options['use_cache'] else None
+        options = dict(options, resume=False, revalidate=True,
+                       force_refresh=stored is None or stored[1] >= REVALIDATE_MIN_AGE)
+        job_key = hashlib.sha256(json.dumps(['revalidate', normalize_url(url)]).encode('utf-8')).hexdigest()
+        return self._submit(job_key, f"Check One Website: {url}", [["", url]], options, self._spot_executor)
+
+    def _submit(self, job_key, label, entries, options, executor):
+        with self._lock:
+            job_id = self.store.find_active(job_key)
+            if job_id:
+                logger.info(f"Merging request for '{label}' into running job {job_id}")
+                return job_id
+            job_id = self.store.create(job_key, label, entries, options)
+        executor.submit(self._run, job_id)
+        return job_id
+
+    def retry_failures(self, job_id):
+        """Queue a new run of a finished job that rescans only the pages that failed; returns its job id"""
+        job = self.store.get(job_id)
+        options = dict(job['options'], resume=False, retry_of=job['run_id'])
+        return self.submit(job['label'], job['entries'], options)
+
+    def stored_result(self, job):
+        """Return ``(result, age_seconds)`` of the newest stored result of a revalidate job, or ``None``"""
+        if not job['options'].get('revalidate') or not job['options']['use_cache']:
+            return None
+        return ScanCache(ttl_hours=job['options']['cache_ttl_hours']).latest(PageIndex(job['entries']).unique_urls[0])
+
+    def _run(self, job_id):
+        job = self.store.get(job_id)
+        options = job['options']
+        urls = PageIndex(job['entries']).unique_urls
+        try:
+            # Claimed under the lock so two jobs with the same pages never resume the same run
+            with self._lock:
+                run_id = job['run_id']
+                if not run_id and options.get('resume'):
+                    run_id = self.journal.find_unfinished_run(job['label'], urls,
+                                                              exclude=self.store.active_run_ids(job_id))
+                if not run_id:
+                    run_id = self.journal.start_run(job['label'], urls)
+                    if options.get('retry_of'):
+                        # Retry failures only: earlier successes are resumed, everything else is scanned
+                        self.journal.carry_over(options['retry_of'], run_id)
+                self.store.update(job_id, status='running', run_id=run_id, total=len(urls), started_at=time.time())
+
+            cache = ScanCache(ttl_hours=options['cache_ttl_hours']) if options['use_cache'] else None
+            checker = self._checker(poll_deadline=options['poll_deadline'], cache=cache,
+                                    pool_size=options['max_workers'],
+                                    screenshots=options.get('screenshots', DEFAULT_CAPTURE_SCREENSHOTS),
+                                    archive=self.archive)
+            budget_minutes = options.get('budget_minutes')
+            scheduler = ScanScheduler(
+                budget_seconds=budget_minutes * 60 if budget_minutes else None, workers=options['max_workers'],
+                main_urls=[program['main_url'] for program in load_catalog()['uf_education_programs']],
+                history=self.history, journal=self.journal)
+            run_metrics = RunMetrics()
+            done = deferred = 0
+            for _, url, result in run_checks(checker, urls, max_workers=options['max_workers'],
+                                             force_refresh=options['force_refresh'],
+                                             detect_changes=options['detect_changes'],
+                                             progress_callback=lambda message: self.store.update(job_id, message=message),
+                                             journal=self.journal, run_id=run_id, scheduler=scheduler):
+                run_metrics.observe(result)
+                done += 1
+                deferred += result.get('scanStatus') == 'deferred'
+                self.store.update(job_id, done=done, message=f"Finished {url}")
+            run_metrics.write_prometheus()
+            if not deferred:
+                # Runs cut short by the time budget join the history once a resumed run completes them
+                self.history.record(run_id, job['label'],
+                                    (result for _, result in self.journal.iter_results(run_id)))
+            self.store.update(job_id, status='done', message='', finished_at=time.time())
+        except Exception as e:
+            logger.exception(f"Scan job {job_id} failed")
+            self.store.update(job_id, status='failed', error=str(e), finished_at=time.time())
+
+    def iter_export_rows(self, job_id):
+        """Yield one row per program entry of a finished job, streamed from the run journal"""
+        job = self.store.get(job_id)
+        page_index = PageIndex(job['entries'])
+        for index, result in self.journal.iter_results(job['run_id']):
+            yield from page_index.expand(index, result)
+
+    def export(self, job_id, fmt):
+        """Write a job's results to an export file and return its path.
+
+        The file is reused until the run's results change (a resumed scan or a
+        reparse), after which it is written again.
+        """
+        job = self.store.get(job_id)
+        version = int(self.journal.modified_at(job['run_id']) * 1e6)
+        directory = os.path.join(DATA_DIR, 'exports')
+        path = os.path.join(directory, f"{job_id}.{version}.{fmt}")
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            write_export(lambda: self.iter_export_rows(job_id), fmt, tmp_path)
+            os.replace(tmp_path, path)
+            self._prune_exports(directory, job_id, version)
+        return path
+
+    @staticmethod
+    def _prune_exports(directory, job_id, version):
+        """Remove older versions of a job's exports and the least recently used files over the limit"""
+        files = []
+        for entry in os.scandir(directory):
+            try:
+                if not entry.name.endswith('.tmp'):
+                    files.append((entry.stat().st_mtime, entry.name, entry.path))
+            except FileNotFoundError:
+                pass  # removed by another session meanwhile
+        files.sort(reverse=True)
+        outdated = [file for file in files if file[1].startswith(f"{job_id}.") and file[1].split('.')[1] != str(version)]
+        for _, _, path in outdated + files[EXPORT_CACHE_MAX_FILES:]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def screenshot(self, scan_id):
+        """Return a scan's screenshot, fetching and storing it the first time the page is opened"""
+        data = self.screenshots.get(scan_id)
+        if data is None:
+            data = self._checker(pool_size=1).fetch_screenshot(scan_id)
+            if data:
+                self.screenshots.put(scan_id, data)
+        return data
+
+    def results(self, job_id):
+        """Return one result row per unique page of a job, in catalog order"""
+        job = self.store.get(job_id)
+        urls = PageIndex(job['entries']).unique_urls
+        recorded = self.journal.results(job['run_id']) if job['run_id'] else {}
+        return [recorded.get(i) or failed_result(url) for i, url in enumerate(urls)]
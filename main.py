@@ -1,637 +1,52 @@
 import streamlit as st
-import requests
-import pandas as pd
-import json
+import importlib.util
+import os
 import time
-import re
-from urllib.parse import quote
-import logging
-from io import BytesIO
-import base64
-
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-# JSON data for UF Education Programs
-UF_PROGRAMS_DATA = {
-  "uf_education_programs": [
-    {
-      "name": "Computer Science Education",
-      "main_url": "https://education.ufl.edu/computer-science-education/",
-      "pages": [
-        "https://education.ufl.edu/computer-science-education/",
-        "https://education.ufl.edu/computer-science-education/program-faculty/",
-        "https://education.ufl.edu/computer-science-education/contact-us/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/online-mae/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/online-mae/faq/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/online-mae/application/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/online-ed-d/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/online-ed-d/faq/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/online-ed-d/online-ed-d-cohort/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/computer-science-k-12-teaching-graduate-certificate/application/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/computer-science-k-12-teaching-graduate-certificate/",
-        "https://education.ufl.edu/computer-science-education/prospective-students/computer-science-k-12-teaching-graduate-certificate/faq"
-      ]
-    },
-    {
-      "name": "SITE",
-      "main_url": "https://education.ufl.edu/site/",
-      "pages": [
-        "https://education.ufl.edu/site/",
-        "https://education.ufl.edu/site/admission-requirements/",
-        "https://education.ufl.edu/site/contact-us/",
-        "https://education.ufl.edu/site/degrees/",
-        "https://education.ufl.edu/site/faq/",
-        "https://education.ufl.edu/site/feed/",
-        "https://education.ufl.edu/site/student-experience/"
-      ]
-    },
-    {
-      "name": "ESOL/Bilingual Education",
-      "main_url": "https://education.ufl.edu/esol/",
-      "pages": [
-        "https://education.ufl.edu/esol/",
-        "https://education.ufl.edu/esol/contact/",
-        "https://education.ufl.edu/esol/degrees/",
-        "https://education.ufl.edu/esol/degrees/certificate",
-        "https://education.ufl.edu/esol/faq/",
-        "https://education.ufl.edu/esol/feed/",
-        "https://education.ufl.edu/esol/testimonials/"
-      ]
-    },
-    {
-      "name": "Counselor Education",
-      "main_url": "https://education.ufl.edu/counselor-education/",
-      "pages": [
-        "https://education.ufl.edu/counselor-education/",
-        "https://education.ufl.edu/counselor-education/comments/feed/",
-        "https://education.ufl.edu/counselor-education/contact-us/",
-        "https://education.ufl.edu/counselor-education/doctoral/",
-        "https://education.ufl.edu/counselor-education/feed/",
-        "https://education.ufl.edu/counselor-education/program-highlights/",
-        "https://education.ufl.edu/counselor-education/prospective-students/",
-        "https://education.ufl.edu/counselor-education/prospective-students/on-campus-ph-d/",
-        "https://education.ufl.edu/counselor-education/prospective-students/on-campus-ph-d/application/",
-        "https://education.ufl.edu/counselor-education/prospective-students/on-campus-ph-d/faq/"
-      ]
-    },
-    {
-      "name": "Early Childhood Education",
-      "main_url": "https://education.ufl.edu/early-childhood/",
-      "pages": [
-        "https://education.ufl.edu/early-childhood/",
-        "https://education.ufl.edu/early-childhood/admissions/",
-        "https://education.ufl.edu/early-childhood/bachelors/",
-        "https://education.ufl.edu/early-childhood/contact-us/",
-        "https://education.ufl.edu/early-childhood/degrees/",
-        "https://education.ufl.edu/early-childhood/early-childhood-certificate",
-        "https://education.ufl.edu/early-childhood/early-childhood-studies-undergrad-minor/",
-        "https://education.ufl.edu/early-childhood/feed/",
-        "https://education.ufl.edu/early-childhood/graduate-certificate",
-        "https://education.ufl.edu/early-childhood/minor",
-        "https://education.ufl.edu/early-childhood/traditional-early-childhood-masters-degree/",
-        "https://education.ufl.edu/etc/a-to-z-of-early-childhood/"
-      ]
-    },
-    {
-      "name": "Educational Technology",
-      "main_url": "https://education.ufl.edu/educational-technology/",
-      "pages": [
-        "https://education.ufl.edu/educational-technology/",
-        "https://education.ufl.edu/educational-technology/2024/03/07/composite-mentoring-for-graduate-students/",
-        "https://education.ufl.edu/educational-technology/2024/03/15/career-options/",
-        "https://education.ufl.edu/educational-technology/2024/05/06/student-education-technology-research/",
-        "https://education.ufl.edu/educational-technology/contact-us/",
-        "https://education.ufl.edu/educational-technology/prospective-students/",
-        "https://education.ufl.edu/educational-technology/prospective-students/baes-specialization/",
-        "https://education.ufl.edu/educational-technology/prospective-students/graduate-certificate/",
-        "https://education.ufl.edu/educational-technology/prospective-students/graduate-certificate/application",
-        "https://education.ufl.edu/educational-technology/prospective-students/graduate-certificate/faq",
-        "https://education.ufl.edu/educational-technology/prospective-students/on-campus-mae/",
-        "https://education.ufl.edu/educational-technology/prospective-students/on-campus-mae/application",
-        "https://education.ufl.edu/educational-technology/prospective-students/on-campus-mae/faq",
-        "https://education.ufl.edu/educational-technology/prospective-students/on-campus-phd/",
-        "https://education.ufl.edu/educational-technology/prospective-students/on-campus-phd/application",
-        "https://education.ufl.edu/educational-technology/prospective-students/on-campus-phd/faq/",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-edd/",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-edd/application",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-edd/faq",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-eds/",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-eds/application",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-eds/faq",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-edtech-41/",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-med/",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-med/application",
-        "https://education.ufl.edu/educational-technology/prospective-students/online-med/faq",
-        "https://education.ufl.edu/educational-technology/prospective-students/undergraduate-minor/"
-      ]
-    },
-    {
-      "name": "Educational Leadership",
-      "main_url": "https://education.ufl.edu/educational-leadership/",
-      "pages": [
-        "https://education.ufl.edu/educational-leadership/",
-        "https://education.ufl.edu/educational-leadership/contact-us/",
-        "https://education.ufl.edu/educational-leadership/program-highlight/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/blended-edd/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/ed-s/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/ed-s/application/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/ed-s/faq/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/on-campus-m-ed/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/on-campus-m-ed/application/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/on-campus-m-ed/faq/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/on-campus-ph-d/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/on-campus-ph-d/application",
-        "https://education.ufl.edu/educational-leadership/prospective-students/on-campus-ph-d/faq/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/online-ed-d/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/online-ed-d/application/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/online-ed-d/faq/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/online-m-ed-systems-leadership-track/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/online-m-ed/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/online-m-ed/application",
-        "https://education.ufl.edu/educational-leadership/prospective-students/online-m-ed/faq/",
-        "https://education.ufl.edu/educational-leadership/prospective-students/online-med/",
-        "https://education.ufl.edu/educational-leadership/webinar-uf-ed-leadership-and-policy/"
-      ]
-    },
-    {
-      "name": "Education Sciences",
-      "main_url": "http://education.ufl.edu/education-sciences",
-      "pages": [
-        "http://education.ufl.edu/education-sciences",
-        "https://education.ufl.edu/education-sciences/contact-us/",
-        "https://education.ufl.edu/education-sciences/program-highlights/",
-        "https://education.ufl.edu/education-sciences/prospective-students/",
-        "https://education.ufl.edu/education-sciences/prospective-students/on-campus-b-a/",
-        "https://education.ufl.edu/education-sciences/prospective-students/online-b-a/"
-      ]
-    },
-    {
-      "name": "Elementary Education",
-      "main_url": "https://education.ufl.edu/elementary-education/",
-      "pages": [
-        "https://education.ufl.edu/elementary-education/",
-        "https://education.ufl.edu/elementary-education/bachelors/",
-        "https://education.ufl.edu/elementary-education/contact/",
-        "https://education.ufl.edu/elementary-education/online-bae/"
-      ]
-    },
-    {
-      "name": "English Education",
-      "main_url": "https://education.ufl.edu/english-education/",
-      "pages": [
-        "https://education.ufl.edu/english-education/",
-        "https://education.ufl.edu/english-education/admissions/",
-        "https://education.ufl.edu/english-education/contact-us",
-        "https://education.ufl.edu/english-education/team/",
-        "https://education.ufl.edu/english-education/courses/",
-        "https://education.ufl.edu/english-education/degrees/",
-        "https://education.ufl.edu/english-education/degrees/certificate/",
-        "https://education.ufl.edu/english-education/degrees/doctorate/",
-        "https://education.ufl.edu/english-education/degrees/masters/",
-        "https://education.ufl.edu/english-education/degrees/specialist/",
-        "https://education.ufl.edu/english-education/degrees/teacher-certification/",
-        "https://education.ufl.edu/english-education/specializations/",
-        "https://education.ufl.edu/english-education/specializations/media-literacy-education/"
-      ]
-    },
-    {
-      "name": "Higher Education",
-      "main_url": "https://education.ufl.edu/higher-education",
-      "pages": [
-        "https://education.ufl.edu/higher-education",
-        "https://education.ufl.edu/higher-education/contact/",
-        "https://education.ufl.edu/higher-education/faculty-and-staff/",
-        "https://education.ufl.edu/higher-education/hybrid-ed-d-program-of-study/",
-        "https://education.ufl.edu/higher-education/program-highlights/",
-        "https://education.ufl.edu/higher-education/prospective-students/",
-        "https://education.ufl.edu/higher-education/prospective-students/hybrid-edd/",
-        "https://education.ufl.edu/higher-education/prospective-students/hybrid-edd/application-instructions/",
-        "https://education.ufl.edu/higher-education/prospective-students/hybrid-edd/faq/",
-        "https://education.ufl.edu/higher-education/prospective-students/on-campus-med/",
-        "https://education.ufl.edu/higher-education/prospective-students/on-campus-med/application-instructions/",
-        "https://education.ufl.edu/higher-education/prospective-students/on-campus-med/events/",
-        "https://education.ufl.edu/higher-education/prospective-students/on-campus-med/faq/",
-        "https://education.ufl.edu/higher-education/prospective-students/on-campus-med/on-campus-med-coursework/",
-        "https://education.ufl.edu/higher-education/prospective-students/on-campus-phd/",
-        "https://education.ufl.edu/higher-education/prospective-students/on-campus-phd/application-instructions/",
-        "https://education.ufl.edu/higher-education/prospective-students/on-campus-phd/faq/",
-        "https://education.ufl.edu/higher-education/prospective-students/online-med/",
-        "https://education.ufl.edu/higher-education/prospective-students/online-med/application-instructions/",
-        "https://education.ufl.edu/higher-education/prospective-students/online-med/faq/"
-      ]
-    },
-    {
-      "name": "Mathematics Education",
-      "main_url": "https://education.ufl.edu/math-education/",
-      "pages": [
-        "https://education.ufl.edu/math-education/",
-        "https://education.ufl.edu/math-education/certificate/",
-        "https://education.ufl.edu/math-education/contact/",
-        "https://education.ufl.edu/math-education/doctorate/",
-        "https://education.ufl.edu/math-education/doctorate/admissions",
-        "https://education.ufl.edu/math-education/doctorate/courses",
-        "https://education.ufl.edu/math-education/doctorate/dissertations/",
-        "https://education.ufl.edu/math-education/doctorate/recent-graduates/",
-        "https://education.ufl.edu/math-education/doctorate/research/",
-        "https://education.ufl.edu/math-education/faculty-contact/",
-        "https://education.ufl.edu/math-education/masters-2/",
-        "https://education.ufl.edu/math-education/students/"
-      ]
-    },
-    {
-      "name": "Reading and Literacy Education",
-      "main_url": "https://education.ufl.edu/reading-education/",
-      "pages": [
-        "https://education.ufl.edu/reading-education/",
-        "https://education.ufl.edu/reading-education/admissions/",
-        "https://education.ufl.edu/reading-education/contact-us/",
-        "https://education.ufl.edu/reading-education/course-registration/",
-        "https://education.ufl.edu/reading-education/doctorate/",
-        "https://education.ufl.edu/reading-education/masters/",
-        "https://education.ufl.edu/reading-education/reading-endorsement/",
-        "https://education.ufl.edu/reading-education/specialist/",
-        "https://education.ufl.edu/reading-education/testimonials/"
-      ]
-    },
-    {
-      "name": "Research and Evaluation Methodology",
-      "main_url": "https://education.ufl.edu/research-evaluation-methods/",
-      "pages": [
-        "https://education.ufl.edu/research-evaluation-methods/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/minor/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-mae/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-mae/application-instructions/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-mae/faq/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-mae/on-campus-mae-program-course-requirements/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-med/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-med/application-instructions/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-med/faq/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-med/on-campus-med-program-course-requirements/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-phd/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-phd/application-instructions/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-phd/faq/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-phd/qualitative-specialization/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/on-campus-phd/quantitative-specialization/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/online-mae/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/online-mae/application-instructions/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/online-mae/contact/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/online-mae/faq/",
-        "https://education.ufl.edu/research-evaluation-methods/prospective-students/online-med/",
-        "https://education.ufl.edu/research-evaluation-methods/research-and-evaluation-methodology-major/courses/",
-        "https://education.ufl.edu/research-evaluation-methods/resources/"
-      ]
-    },
-    {
-      "name": "School Psychology",
-      "main_url": "https://education.ufl.edu/school-psychology/",
-      "pages": [
-        "https://education.ufl.edu/school-psychology/",
-        "https://education.ufl.edu/school-psychology/accreditation/",
-        "https://education.ufl.edu/school-psychology/contact/",
-        "https://education.ufl.edu/school-psychology/faculty-and-staff/",
-        "https://education.ufl.edu/school-psychology/program-highlights/",
-        "https://education.ufl.edu/school-psychology/prospective-students/",
-        "https://education.ufl.edu/school-psychology/prospective-students/on-campus-eds",
-        "https://education.ufl.edu/school-psychology/prospective-students/on-campus-eds/",
-        "https://education.ufl.edu/school-psychology/prospective-students/on-campus-eds/application-instructions/",
-        "https://education.ufl.edu/school-psychology/prospective-students/on-campus-eds/faq/",
-        "https://education.ufl.edu/school-psychology/prospective-students/on-campus-phd",
-        "https://education.ufl.edu/school-psychology/prospective-students/on-campus-phd/",
-        "https://education.ufl.edu/school-psychology/prospective-students/on-campus-phd/application-instructions/",
-        "https://education.ufl.edu/school-psychology/prospective-students/on-campus-phd/faq/"
-      ]
-    },
-    {
-      "name": "Science Education",
-      "main_url": "https://education.ufl.edu/science-education/",
-      "pages": [
-        "https://education.ufl.edu/science-education/",
-        "https://education.ufl.edu/science-education/2020/07/14/new-nsf-funding-for-julie-browns-team-to-study-biology-instruction/",
-        "https://education.ufl.edu/science-education/2021/08/16/nsf-funding-for-julie-browns-team-to-study-culturally-responsive-practice-craft/",
-        "https://education.ufl.edu/science-education/certificate/",
-        "https://education.ufl.edu/science-education/contact-us/",
-        "https://education.ufl.edu/science-education/degree-programs/",
-        "https://education.ufl.edu/science-education/doctor-of-philosophy/",
-        "https://education.ufl.edu/science-education/education-specialist/",
-        "https://education.ufl.edu/science-education/frequently-asked-questions/",
-        "https://education.ufl.edu/science-education/master-of-arts/",
-        "https://education.ufl.edu/science-education/students/",
-        "https://education.ufl.edu/science-education/students/dissertations/",
-        "https://education.ufl.edu/science-education/students/testimonials/"
-      ]
-    },
-    {
-      "name": "Science or Mathematics Teaching Certificate",
-      "main_url": "https://education.ufl.edu/school-teaching-learning/science-or-mathematics-teaching-certificate/",
-      "pages": [
-        "https://education.ufl.edu/school-teaching-learning/science-or-mathematics-teaching-certificate/"
-      ]
-    },
-    {
-      "name": "Social Studies Education",
-      "main_url": "https://education.ufl.edu/social-studies-education/",
-      "pages": [
-        "https://education.ufl.edu/social-studies-education/",
-        "https://education.ufl.edu/social-studies-education/admissions/",
-        "https://education.ufl.edu/social-studies-education/contact-us/",
-        "https://education.ufl.edu/social-studies-education/degrees/doctorate/",
-        "https://education.ufl.edu/social-studies-education/degrees/epi-certification/",
-        "https://education.ufl.edu/social-studies-education/degrees/mae-online/",
-        "https://education.ufl.edu/social-studies-education/degrees/master-of-arts/",
-        "https://education.ufl.edu/social-studies-education/degrees/master-of-arts/mae-application-process/",
-        "https://education.ufl.edu/social-studies-education/faq/"
-      ]
-    },
-    {
-      "name": "Certificate Program in Secondary Teaching Preparation",
-      "main_url": "https://education.ufl.edu/school-teaching-learning/secondary-teaching-preparation/",
-      "pages": [
-        "https://education.ufl.edu/school-teaching-learning/secondary-teaching-preparation/"
-      ]
-    },
-    {
-      "name": "Special Education",
-      "main_url": "https://education.ufl.edu/special-education/",
-      "pages": [
-        "https://education.ufl.edu/special-education/",
-        "https://education.ufl.edu/special-education/contact-us/",
-        "https://education.ufl.edu/special-education/doctoral-programs/",
-        "https://education.ufl.edu/special-education/doctoral-programs/concentration",
-        "https://education.ufl.edu/special-education/dyslexia-graduate-certificate",
-        "https://education.ufl.edu/special-education/graduate-certificate-in-disabilities-in-society/",
-        "https://education.ufl.edu/special-education/online-edd/",
-        "https://education.ufl.edu/special-education/phd/",
-        "https://education.ufl.edu/special-education/program-highlight/",
-        "https://education.ufl.edu/special-education/programs/dyslexia/",
-        "https://education.ufl.edu/special-education/prospective-students/",
-        "https://education.ufl.edu/special-education/prospective-students/doctoral-programs-concentration/",
-        "https://education.ufl.edu/special-education/prospective-students/dyslexia-graduate-certificate/",
-        "https://education.ufl.edu/special-education/prospective-students/dyslexia-graduate-certificate/application",
-        "https://education.ufl.edu/special-education/prospective-students/dyslexia-graduate-certificate/faq",
-        "https://education.ufl.edu/special-education/prospective-students/graduate-certificate-in-disabilities-in-society/",
-        "https://education.ufl.edu/special-education/prospective-students/on-campus-phd/",
-        "https://education.ufl.edu/special-education/prospective-students/on-campus-phd/application/",
-        "https://education.ufl.edu/special-education/prospective-students/on-campus-phd/faq/",
-        "https://education.ufl.edu/special-education/prospective-students/on-campus-phd/ph-d-program-plan/",
-        "https://education.ufl.edu/special-education/prospective-students/online-edd/",
-        "https://education.ufl.edu/special-education/prospective-students/online-edd/application/",
-        "https://education.ufl.edu/special-education/prospective-students/online-edd/faq/",
-        "https://education.ufl.edu/special-education/prospective-students/online-eds/",
-        "https://education.ufl.edu/special-education/prospective-students/online-eds/application/",
-        "https://education.ufl.edu/special-education/prospective-students/online-eds/faq",
-        "https://education.ufl.edu/special-education/prospective-students/online-eds/special-education/prospective-students/online-eds",
-        "https://education.ufl.edu/special-education/prospective-students/online-med/",
-        "https://education.ufl.edu/special-education/prospective-students/online-med/application",
-        "https://education.ufl.edu/special-education/prospective-students/online-med/application/",
-        "https://education.ufl.edu/special-education/prospective-students/online-med/faq"
-      ]
-    },
-    {
-      "name": "School of Teaching and Learning",
-      "main_url": "https://education.ufl.edu/school-teaching-learning/",
-      "pages": [
-        "https://education.ufl.edu/school-teaching-learning/",
-        "http://education.ufl.edu/school-teaching-learning/secondary-teaching-preparation",
-        "https://education.ufl.edu/school-teaching-learning/academic-programs/",
-        "https://education.ufl.edu/school-teaching-learning/admission-information-for-certificate-programs/",
-        "https://education.ufl.edu/school-teaching-learning/admissions/",
-        "https://education.ufl.edu/school-teaching-learning/admissions/doctoral-degrees-phd-edd/",
-        "https://education.ufl.edu/school-teaching-learning/admissions/master-arts-education-admissions/",
-        "https://education.ufl.edu/school-teaching-learning/becoming-a-better-education-professional/",
-        "https://education.ufl.edu/school-teaching-learning/becoming-a-teacher/",
-        "https://education.ufl.edu/school-teaching-learning/education-specialist-students/",
-        "https://education.ufl.edu/school-teaching-learning/faculty-directory/",
-        "https://education.ufl.edu/school-teaching-learning/m-ed-students/",
-        "https://education.ufl.edu/school-teaching-learning/mae-students/",
-        "https://education.ufl.edu/school-teaching-learning/phd-edd-students/",
-        "https://education.ufl.edu/school-teaching-learning/pursuing-a-doctoral-degree/",
-        "https://education.ufl.edu/school-teaching-learning/recent-faculty-and-program-awards/",
-        "https://education.ufl.edu/school-teaching-learning/research/",
-        "https://education.ufl.edu/school-teaching-learning/science-or-mathematics-teaching-certificate/",
-        "https://education.ufl.edu/school-teaching-learning/secondary-teaching-preparation/",
-        "https://education.ufl.edu/school-teaching-learning/selected-funding-opportunities/",
-        "https://education.ufl.edu/school-teaching-learning/stl-docseminars/"
-      ]
-    },
-    {
-      "name": "School of Human Development and Organizational Studies in Education (HDOSE)",
-      "main_url": "https://education.ufl.edu/hdose/",
-      "pages": [
-        "https://education.ufl.edu/hdose/",
-        "https://education.ufl.edu/hdose/graduate-student-funding/",
-        "https://education.ufl.edu/hdose/programs/",
-        "https://education.ufl.edu/hdose/resources/",
-        "https://education.ufl.edu/hdose/staff/"
-      ]
-    },
-    {
-      "name": "School of Special Education, School Psychology, and Early Childhood Studies",
-      "main_url": "https://education.ufl.edu/sespecs/",
-      "pages": [
-        "https://education.ufl.edu/sespecs/",
-        "https://education.ufl.edu/sespecs/contact-us/",
-        "https://education.ufl.edu/sespecs/grants-projects/",
-        "https://education.ufl.edu/sespecs/the-team/"
-      ]
-    },
-    {
-      "name": "Teacher Leadership for School Improvement",
-      "main_url": "https://education.ufl.edu/tlsi/",
-      "pages": [
-        "https://education.ufl.edu/tlsi/"
-      ]
-    },
-    {
-      "name": "UF Teach",
-      "main_url": "https://education.ufl.edu/uf-teach/",
-      "pages": [
-        "https://education.ufl.edu/uf-teach/",
-        "https://education.ufl.edu/uf-teach/program-highlights/",
-        "https://education.ufl.edu/uf-teach/prospective-students/"
-      ]
-    },
-    {
-      "name": "Teachers, Schools, and Society",
-      "main_url": "https://education.ufl.edu/curriculum-teaching/",
-      "pages": [
-        "https://education.ufl.edu/curriculum-teaching/",
-        "https://education.ufl.edu/curriculum-teaching/contact-us/",
-        "https://education.ufl.edu/curriculum-teaching/edd/",
-        "https://education.ufl.edu/curriculum-teaching/edd/admission-requirements",
-        "https://education.ufl.edu/curriculum-teaching/edd/faq/",
-        "https://education.ufl.edu/curriculum-teaching/edd/key-features",
-        "https://education.ufl.edu/curriculum-teaching/edd/program-requirements",
-        "https://education.ufl.edu/curriculum-teaching/faculty",
-        "https://education.ufl.edu/curriculum-teaching/mae/",
-        "https://education.ufl.edu/curriculum-teaching/mae/admission-requirements/",
-        "https://education.ufl.edu/curriculum-teaching/mae/faq/",
-        "https://education.ufl.edu/curriculum-teaching/mae/program-requirements/",
-        "https://education.ufl.edu/curriculum-teaching/on-campus-ph-d/",
-        "https://education.ufl.edu/curriculum-teaching/on-campus-ph-d/phd/admission-requirements/",
-        "https://education.ufl.edu/curriculum-teaching/on-campus-ph-d/phd/program-study/",
-        "https://education.ufl.edu/curriculum-teaching/phd/faq/",
-        "https://education.ufl.edu/curriculum-teaching/phd/ph-d-students/",
-        "https://education.ufl.edu/curriculum-teaching/student-testimonials/"
-      ]
-    }
-  ]
-}
-class AccessibilityChecker:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-
-    def extract_token_from_html(self, html_content):
-        """Extract data-token from HTML response"""
-        token_pattern = r'data-token="([^"]+)"'
-        match = re.search(token_pattern, html_content)
-        if match:
-            return match.group(1)
+from datetime import datetime, timezone
+
+# pandas, NumPy and openpyxl are only imported (via results and export) once results are rendered
+from catalog import CATALOG_PATH, load_catalog
+from checker import (
+    DEFAULT_CACHE_TTL_HOURS,
+    DEFAULT_CAPTURE_SCREENSHOTS,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_POLL_DEADLINE,
+    PageIndex,
+    RunMetrics,
+)
+from export import EXPORT_FORMATS
+from jobs import JOB_POLL_INTERVAL, JobStore, ScanJobService
+
+# Runs shown in the score trend chart
+TREND_RUNS = 30
+
+@st.cache_resource
+def get_job_service():
+    """Return the scan job service shared by every session of this server"""
+    return ScanJobService()
+
+@st.cache_data(show_spinner=False)
+def cached_catalog(catalog_mtime):
+    """Load the program catalog and dropdown options once per process.
+
+    ``catalog_mtime`` is the modification time of the refreshed catalog, so
+    a catalog rewritten by discover.py is picked up on the next rerun.
+    """
+    catalog = load_catalog()
+    dropdown_options = ["Run All", "Check One Website"] + [program["name"] for program in catalog["uf_education_programs"]]
+    return catalog, dropdown_options
+
+def catalog_mtime():
+    try:
+        return os.path.getmtime(CATALOG_PATH)
+    except OSError:
         return None
 
-    def get_loading_page(self, website_url):
-        """Step 1: Get the loading page and extract token"""
-        encoded_url = quote(website_url, safe='')
-        loading_url = f"https://acsbace.com/loading?website={encoded_url}&isPartner=false&embedder=accessibe.com"
-
-        try:
-            response = self.session.get(loading_url)
-            response.raise_for_status()
-
-            token = self.extract_token_from_html(response.text)
-            if not token:
-                logger.error(f"Could not extract token for {website_url}")
-                return None
-
-            logger.info(f"Token extracted for {website_url}: {token}")
-            return token
-
-        except requests.RequestException as e:
-            logger.error(f"Error getting loading page for {website_url}: {str(e)}")
-            return None
-
-    def start_evaluation(self, website_url, token):
-        """Step 2: Start the evaluation process"""
-        encoded_url = quote(website_url, safe='')
-        evaluate_url = f"https://acsbace.com/evaluate?website={encoded_url}&screenshot=true&token={token}&isPartner=false&embedder=accessibe.com"
-
-        try:
-            response = self.session.get(evaluate_url)
-            response.raise_for_status()
-
-            logger.info(f"Evaluation started for {website_url}")
-            return True
-
-        except requests.RequestException as e:
-            logger.error(f"Error starting evaluation for {website_url}: {str(e)}")
-            return False
-
-    def get_scan_details(self, token):
-        """Step 3: Get detailed scan results"""
-        details_url = f"https://acsbace.com/get-scan-details?scanId={token}&embedder=accessibe.com"
-
-        try:
-            response = self.session.get(details_url)
-            response.raise_for_status()
-
-            scan_data = response.json()
-            logger.info(f"Scan details retrieved for token: {token}")
-            return scan_data
-
-        except requests.RequestException as e:
-            logger.error(f"Error getting scan details for token {token}: {str(e)}")
-            return None
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON response for token {token}: {str(e)}")
-            return None
-
-    def parse_scan_results(self, scan_data):
-        """Parse the scan results and extract relevant information"""
-        if not scan_data or 'result' not in scan_data:
-            return {}
-
-        result = scan_data['result']
-        parsed_results = {
-            'scanStatus': scan_data.get('scanStatus', ''),
-            'verdict': result.get('verdict', ''),
-            'score': result.get('score', ''),
-            'detectedCMS': result.get('detectedCMS', ''),
-            'totalElements': result.get('totalElements', ''),
-            'timeToScan': result.get('timeToScan', '')
-        }
-
-        # Parse individual report categories
-        reports = result.get('reports', {})
-        for category, category_data in reports.items():
-            if isinstance(category_data, dict):
-                parsed_results[f'{category}_verdict'] = category_data.get('verdict', '')
-                parsed_results[f'{category}_score'] = category_data.get('score', '')
-
-                # Parse individual tests within each category
-                for test_name, test_data in category_data.items():
-                    if isinstance(test_data, dict) and 'score' in test_data:
-                        parsed_results[f'{category}_{test_name}_score'] = test_data.get('score', '')
-                        parsed_results[f'{category}_{test_name}_failures'] = test_data.get('failures', '')
-                        parsed_results[f'{category}_{test_name}_successes'] = test_data.get('successes', '')
-
-        return parsed_results
-
-    def check_single_website(self, website_url, progress_callback=None):
-        """Check accessibility for a single website"""
-        logger.info(f"Starting accessibility check for: {website_url}")
-
-        if progress_callback:
-            progress_callback(f"Getting token for {website_url}")
-
-        # Step 1: Get token
-        token = self.get_loading_page(website_url)
-        if not token:
-            return None
-
-        if progress_callback:
-            progress_callback(f"Starting evaluation for {website_url}")
-
-        # Step 2: Start evaluation
-        if not self.start_evaluation(website_url, token):
-            return None
-
-        # Wait for scan to complete
-        if progress_callback:
-            progress_callback(f"Waiting for scan to complete for {website_url}")
-        
-        time.sleep(40)
-
-        if progress_callback:
-            progress_callback(f"Retrieving results for {website_url}")
-
-        # Step 3: Get scan details
-        scan_data = self.get_scan_details(token)
-        if not scan_data:
-            return None
-
-        # Parse results
-        parsed_results = self.parse_scan_results(scan_data)
-        parsed_results['website_url'] = website_url
-        parsed_results['accessibe_url'] = f"https://accessibe.com/accessscan?website={website_url}"
-
-        return parsed_results
-
-def get_download_link(df, filename="accessibility_results.xlsx"):
-    """Generate a download link for the DataFrame as Excel file"""
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Results')
-    
-    processed_data = output.getvalue()
-    b64 = base64.b64encode(processed_data).decode()
-    href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}">Download Excel file</a>'
-    return href
+@st.cache_data(show_spinner=False)
+def cached_rollups(run_key, _frame):
+    """compute_rollups over a result_frame, computed once per run (``_frame`` is not hashed)"""
+    from results import ResultTable, compute_rollups
+    return compute_rollups(ResultTable.from_frame(_frame))
 
 def main():
     st.set_page_config(page_title="Accessibility Checker", page_icon="🔍", layout="wide")
@@ -639,145 +54,329 @@ def main():
     st.title("🔍 Website Accessibility Checker")
     st.markdown("Check the accessibility compliance of UF Education Program websites using AccessiBe's scanner.")
     
-    # Create dropdown options
-    dropdown_options = ["Run All", "Check One Website"] + [program["name"] for program in UF_PROGRAMS_DATA["uf_education_programs"]]
+    # Create dropdown options from the discovered catalog, falling back to the bundled one
+    catalog, dropdown_options = cached_catalog(catalog_mtime())
     
     # Sidebar for controls
     st.sidebar.header("Options")
     selected_option = st.sidebar.selectbox("Select Program to Check:", dropdown_options)
+    max_workers = st.sidebar.number_input("Concurrent scans", min_value=1, max_value=64, value=DEFAULT_MAX_WORKERS)
+    poll_deadline = st.sidebar.number_input("Scan deadline (seconds)", min_value=30, max_value=900, value=DEFAULT_POLL_DEADLINE)
+    use_cache = st.sidebar.checkbox("Use cached results", value=True)
+    cache_ttl_hours = st.sidebar.number_input("Cache TTL (hours)", min_value=0.0, value=float(DEFAULT_CACHE_TTL_HOURS), disabled=not use_cache)
+    force_refresh = st.sidebar.checkbox("Force refresh (ignore cache for this run)", value=False, disabled=not use_cache)
+    detect_changes = st.sidebar.checkbox("Skip pages that have not changed", value=True, disabled=not use_cache or force_refresh)
+    resume = st.sidebar.checkbox("Resume the last unfinished run", value=True)
+    screenshots = st.sidebar.checkbox("Capture screenshots", value=DEFAULT_CAPTURE_SCREENSHOTS,
+                                      help="Slower scans; screenshots are only downloaded for pages you open")
+    budget_minutes = st.sidebar.number_input("Time budget (minutes, 0 = no limit)", min_value=0, value=0,
+                                             help="Scan the highest-priority pages first and defer those that cannot finish in time")
+    if catalog.get('discovered_at'):
+        discovered = datetime.fromtimestamp(catalog['discovered_at'], timezone.utc)
+        st.sidebar.caption(f"Page list discovered {discovered:%Y-%m-%d %H:%M} UTC (refresh with discover.py)")
     
     # Display selected option info
+    programs = catalog["uf_education_programs"]
+    page_index = None
     if selected_option == "Run All":
-        total_pages = sum(len(program["pages"]) for program in UF_PROGRAMS_DATA["uf_education_programs"])
-        st.info(f"Selected: **{selected_option}** - Will check all {total_pages} pages across all programs")
+        page_index = PageIndex.from_programs(programs)
+        st.info(f"Selected: **{selected_option}** - Will check all {len(page_index.entries)} pages across all programs "
+                f"({len(page_index.unique_urls)} unique pages)")
     elif selected_option == "Check One Website":
         st.info("Selected: **Check One Website** - Paste a page link below to check accessibility for a single website.")
         single_url = st.text_input("Paste website URL to check:")
     else:
-        selected_program = next(p for p in UF_PROGRAMS_DATA["uf_education_programs"] if p["name"] == selected_option)
-        st.info(f"Selected: **{selected_option}** - Will check {len(selected_program['pages'])} pages")
+        selected_program = next(p for p in programs if p["name"] == selected_option)
+        page_index = PageIndex.from_programs([selected_program])
+        st.info(f"Selected: **{selected_option}** - Will check {len(selected_program['pages'])} pages "
+                f"({len(page_index.unique_urls)} unique pages)")
         
         with st.expander("View Pages to be Checked"):
             for page in selected_program["pages"]:
                 st.write(f"- {page}")
     
+    service = get_job_service()
+    
     # Start button
     if st.sidebar.button("🚀 Start Accessibility Check", type="primary"):
-        # Collect URLs to process
-        urls_to_process = []
+        if selected_option == "Check One Website" and not single_url:
+            st.error("Please paste a website URL to check.")
+            return
         
-        if selected_option == "Run All":
-            for program in UF_PROGRAMS_DATA["uf_education_programs"]:
-                urls_to_process.extend(program["pages"])
-        elif selected_option == "Check One Website":
-            if single_url:
-                urls_to_process = [single_url]
-            else:
-                st.error("Please paste a website URL to check.")
-                return
+        # Hand the scan to the background job service; it keeps running across reruns
+        options = {
+            'max_workers': int(max_workers),
+            'poll_deadline': poll_deadline,
+            'use_cache': use_cache,
+            'cache_ttl_hours': cache_ttl_hours,
+            'force_refresh': force_refresh,
+            'detect_changes': detect_changes,
+            'resume': resume,
+            'budget_minutes': int(budget_minutes),
+            'screenshots': screenshots,
+        }
+        if selected_option == "Check One Website":
+            # Show the stored result right away and rescan in the background
+            st.query_params['job'] = service.revalidate(single_url, options)
+        else:
+            st.query_params['job'] = service.submit(selected_option, page_index.listed_pages, options)
+    
+    job_id = st.query_params.get('job')
+    if job_id:
+        show_job(service, job_id)
+
+def format_age(seconds):
+    """Return a short human-readable age such as '5 min' or '3 days'"""
+    for unit, size in (('day', 86400), ('h', 3600), ('min', 60)):
+        if seconds >= size:
+            count = int(seconds // size)
+            return f"{count} {unit}{'s' if unit == 'day' and count > 1 else ''}"
+    return f"{int(seconds)} s"
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def show_job_progress(service, job_id):
+    """Render an active job; only this fragment reruns until the job finishes"""
+    job = service.store.get(job_id)
+    if job['status'] not in JobStore.ACTIVE_STATUSES:
+        # Redraw the whole page once with the final results
+        st.rerun()
+    
+    options = job['options']
+    stored = service.stored_result(job) if options.get('revalidate') else None
+    if stored:
+        # Stale-while-revalidate: show the last stored result until the rescan replaces it
+        result, age = stored
+        if options['force_refresh']:
+            st.info(f"Showing the result stored {format_age(age)} ago; a fresh scan is running and will replace it.")
+        elif age < options['cache_ttl_hours'] * 3600:
+            st.info(f"Showing the result stored {format_age(age)} ago; it is recent, so it is not scanned again.")
+        elif options['detect_changes']:
+            st.info(f"Showing the result stored {format_age(age)} ago; the page is being checked for changes "
+                    f"and is rescanned only if it changed.")
         else:
-            selected_program = next(p for p in UF_PROGRAMS_DATA["uf_education_programs"] if p["name"] == selected_option)
-            urls_to_process = selected_program["pages"]
+            st.info(f"Showing the result stored {format_age(age)} ago; a fresh scan is running and will replace it.")
+        display_results(PageIndex(job['entries']).fan_out([dict(result, resultSource='stored')]), RunMetrics())
+    else:
+        total_urls = job['total'] or len(PageIndex(job['entries']).unique_urls)
+        st.progress(job['done'] / total_urls if total_urls else 0.0)
+        st.text(f"Processed {job['done']} of {total_urls} websites... ({job['label']})")
+        st.text(job['message'])
+
+def show_job(service, job_id):
+    """Render a job's progress while it runs, then its results"""
+    job = service.store.get(job_id)
+    if job is None:
+        return
+    
+    # Progress tracking
+    if job['status'] in JobStore.ACTIVE_STATUSES:
+        show_job_progress(service, job_id)
+        return
+    
+    if job['status'] == 'failed':
+        st.error(f"The scan job failed: {job['error']}")
+        return
+    
+    st.success(f"✅ Processing completed! ({job['label']})")
+    results = service.results(job_id)
+    run_metrics = RunMetrics()
+    for result in results:
+        run_metrics.observe(result)
+    
+    sources = [r.get('resultSource') for r in results]
+    served, reused = sources.count('cache'), sources.count('reused')
+    if served or reused:
+        st.info(f"Served {served} pages from the cache and reused {reused} unchanged pages")
+    
+    deferred = sum(1 for r in results if r.get('scanStatus') == 'deferred')
+    if deferred:
+        st.info(f"{deferred} pages were deferred because the time budget ran out; start the check again "
+                f"with resume enabled to scan them")
+    
+    failures = sum(1 for r in results if r.get('scanStatus') == 'failed')
+    if failures and st.button(f"🔁 Retry failures only ({failures} pages)"):
+        st.query_params['job'] = service.retry_failures(job_id)
+        st.rerun()
+    
+    # Give every program that lists a page its own row
+    display_results(PageIndex(job['entries']).fan_out(results), run_metrics, run_key=job_id,
+                    export=lambda fmt: service.export(job_id, fmt))
+    display_screenshots(service, results)
+    display_history(service.history, job['run_id'], job['label'])
+
+def display_results(results, run_metrics, run_key=None, export=None):
+    """Render the summary, table, downloads, charts and rollups for a finished run.
+
+    ``export`` is a callable taking a format name and returning the path of
+    the exported file; downloads are only offered when it is given.
+    """
+    import pandas as pd
+    from results import ResultTable, compute_rollups, result_frame
+    
+    # Build the typed wide table once; the long layout is only built when rollups are computed
+    if results:
+        pages = result_frame(results)
         
-        # Initialize checker
-        checker = AccessibilityChecker()
+        # Display summary
+        st.header("📊 Results Summary")
+        succeeded = pages['scanStatus'] == 'success'
+        successful_scans = int(succeeded.sum())
+        deferred_scans = int((pages['scanStatus'] == 'deferred').sum())
         
-        # Progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        current_processing = st.empty()
+        col1, col2, col3, col4 = st.columns(4)
         
-        results = []
-        total_urls = len(urls_to_process)
+        with col1:
+            st.metric("Total Pages", len(pages))
         
-        # Process each URL
-        for i, url in enumerate(urls_to_process):
-            # Update progress
-            progress_percentage = i / total_urls
-            progress_bar.progress(progress_percentage)
-            status_text.text(f"Processing {i + 1} of {total_urls} websites...")
-            
-            def update_current_status(message):
-                current_processing.text(message)
-            
-            # Check website
-            result = checker.check_single_website(url, update_current_status)
-            
-            if result:
-                results.append(result)
+        with col2:
+            st.metric("Successful Scans", successful_scans)
+        
+        with col3:
+            st.metric("Failed Scans", len(pages) - successful_scans - deferred_scans)
+        
+        with col4:
+            if successful_scans > 0:
+                avg_score = pages.loc[succeeded, 'score'].mean()
+                st.metric("Average Score", f"{avg_score:.1f}")
             else:
-                # Add failed entry
-                results.append({
-                    'website_url': url,
-                    'accessibe_url': f"https://accessibe.com/accessscan?website={url}",
-                    'scanStatus': 'failed',
-                    'verdict': '',
-                    'score': ''
-                })
-            
-            # Small delay between requests
-            if i < total_urls - 1:
-                time.sleep(2)
+                st.metric("Average Score", "N/A")
         
-        # Complete progress
-        progress_bar.progress(1.0)
-        status_text.text("✅ Processing completed!")
-        current_processing.text("")
+        # Why scans failed, by phase and cause
+        if 'failureCause' in pages.columns and not succeeded.all():
+            st.header("❌ Failures")
+            failed = pages.loc[~succeeded]
+            breakdown = (failed.groupby(['failurePhase', 'failureCause'], observed=True).size()
+                         .rename('pages').reset_index().sort_values('pages', ascending=False))
+            st.dataframe(breakdown, use_container_width=True, hide_index=True)
         
-        # Create and display results DataFrame
-        if results:
-            df_results = pd.DataFrame(results)
-            
-            # Reorder columns to have URL and AccessiBe URL first
-            columns_order = ['website_url', 'accessibe_url', 'scanStatus', 'verdict', 'score']
-            remaining_columns = [col for col in df_results.columns if col not in columns_order]
-            final_columns = columns_order + sorted(remaining_columns)
-            
-            df_results = df_results.reindex(columns=final_columns)
-            
-            # Display summary
-            st.header("📊 Results Summary")
-            
-            col1, col2, col3, col4 = st.columns(4)
+        # Reorder columns to have program, URL and AccessiBe URL first
+        df_results = pages
+        columns_order = ['program', 'website_url', 'accessibe_url', 'scanStatus', 'verdict', 'score']
+        remaining_columns = [col for col in df_results.columns if col not in columns_order]
+        final_columns = columns_order + sorted(remaining_columns)
+        
+        df_results = df_results.reindex(columns=final_columns)
+        
+        # Display results table
+        st.header("📋 Detailed Results")
+        st.dataframe(df_results, use_container_width=True, hide_index=True)
+        
+        # Download button
+        st.header("💾 Download Results")
+        if export is not None:
+            formats = [fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or importlib.util.find_spec('pyarrow')]
+            export_fmt = st.selectbox("Format", formats, format_func=str.upper)
             
-            with col1:
-                st.metric("Total Pages", len(df_results))
+            def export_data():
+                with open(export(export_fmt), 'rb') as f:
+                    return f.read()
             
-            with col2:
-                successful_scans = df_results[df_results['scanStatus'] == 'success'].shape[0]
-                st.metric("Successful Scans", successful_scans)
+            st.download_button(f"Download {export_fmt.upper()} file", data=export_data,
+                               file_name=f"accessibility_results.{export_fmt}", mime=EXPORT_FORMATS[export_fmt])
+        
+        # Where the time went during this run
+        timing_summary = run_metrics.summary()
+        if timing_summary:
+            st.header("⏱️ Timing Summary")
+            tcol1, tcol2, tcol3 = st.columns(3)
+            with tcol1:
+                server_times = run_metrics.server_scan_seconds
+                st.metric("Avg. Server Scan Time (timeToScan)",
+                          f"{sum(server_times) / len(server_times):.1f}s" if server_times else "N/A")
+            with tcol2:
+                waits = run_metrics.timings['wait']
+                st.metric("Avg. Time Spent Waiting", f"{sum(waits) / len(waits):.1f}s" if waits else "N/A")
+            with tcol3:
+                st.metric("Retries / MB Received",
+                          f"{run_metrics.retries} / {run_metrics.bytes_transferred / 2 ** 20:.1f}")
+            st.dataframe(pd.DataFrame(timing_summary), use_container_width=True, hide_index=True)
+        
+        # Additional analysis
+        if successful_scans > 0:
+            st.header("📈 Score Distribution")
             
-            with col3:
-                failed_scans = df_results[df_results['scanStatus'] != 'success'].shape[0]
-                st.metric("Failed Scans", failed_scans)
+            numeric_scores = pages.loc[succeeded, 'score'].dropna()
             
-            with col4:
-                if successful_scans > 0:
-                    avg_score = df_results[df_results['scanStatus'] == 'success']['score'].astype(float).mean()
-                    st.metric("Average Score", f"{avg_score:.1f}")
-                else:
-                    st.metric("Average Score", "N/A")
+            if not numeric_scores.empty:
+                st.bar_chart(numeric_scores.value_counts().sort_index())
             
-            # Display results table
-            st.header("📋 Detailed Results")
-            st.dataframe(df_results, use_container_width=True, hide_index=True)
+            # Per-program and per-category rollups
+            rollups = (cached_rollups(run_key, pages) if run_key
+                       else compute_rollups(ResultTable.from_frame(pages)))
+            st.header("🏫 Program Rollup")
+            st.dataframe(rollups['programs'], use_container_width=True, hide_index=True)
+            st.bar_chart(rollups['programs'].set_index('program')['mean'])
             
-            # Download button
-            st.header("💾 Download Results")
-            st.markdown(get_download_link(df_results), unsafe_allow_html=True)
+            if not rollups['categories'].empty:
+                st.header("🗂️ Category Rollup")
+                st.dataframe(rollups['categories'], use_container_width=True, hide_index=True)
+                st.dataframe(rollups['program_categories'], use_container_width=True)
             
-            # Additional analysis
-            if successful_scans > 0:
-                st.header("📈 Score Distribution")
-                
-                # Convert scores to numeric for plotting
-                numeric_scores = pd.to_numeric(df_results[df_results['scanStatus'] == 'success']['score'], errors='coerce')
-                
-                if not numeric_scores.empty:
-                    st.bar_chart(numeric_scores.value_counts().sort_index())
-        
+            st.header("⚠️ Lowest-Scoring Pages")
+            st.dataframe(rollups['worst_pages'], use_container_width=True, hide_index=True)
+    
+    else:
+        st.error("No results were generated. Please check the logs for errors.")
+
+def display_screenshots(service, results):
+    """Let the user open the screenshot of a page scanned with screenshots on"""
+    scan_ids = {r['website_url']: r['scanId'] for r in results if r.get('scanId')}
+    if not scan_ids:
+        return
+    
+    st.header("🖼️ Page Screenshots")
+    url = st.selectbox("Open a page", sorted(scan_ids), index=None, placeholder="Choose a scanned page")
+    if url:
+        with st.spinner("Fetching screenshot..."):
+            screenshot = service.screenshot(scan_ids[url])
+        if screenshot:
+            st.image(screenshot, caption=url)
+        else:
+            st.warning("The scanner has no screenshot for this page (it may have expired); rescan it to get one.")
+
+@st.cache_data(show_spinner=False)
+def cached_diff(before_run, after_run, _history):
+    """RunHistory.diff, computed once per pair of runs (``_history`` is not hashed)"""
+    return _history.diff(before_run, after_run)
+
+def display_history(history, run_id, label):
+    """Render score changes against an earlier run and the score trend of this selection"""
+    from results import REGRESSION_THRESHOLD
+    
+    runs = history.runs(label)
+    if run_id not in set(runs['run_id']):
+        return
+    
+    st.header("📉 Changes Over Time")
+    compare_with = st.radio("Compare with", ["Previous run", "Last 7 days", "Last 30 days"], horizontal=True)
+    if compare_with == "Previous run":
+        previous = history.previous_run(run_id)
+        diff = cached_diff(previous, run_id, history) if previous else None
+    else:
+        days = 7 if compare_with == "Last 7 days" else 30
+        diff = history.diff_window(time.time() - days * 86400, label=label)
+    
+    if diff is None or diff['pages']['before'].isna().all():
+        st.info("No earlier run of this selection to compare with yet.")
+    else:
+        pages = diff['pages']
+        dcol1, dcol2, dcol3 = st.columns(3)
+        with dcol1:
+            st.metric("Pages Improved", int((pages['delta'] > 0).sum()))
+        with dcol2:
+            st.metric("Pages Regressed", int((pages['delta'] <= -REGRESSION_THRESHOLD).sum()))
+        with dcol3:
+            st.metric("Newly Failing Scans", int((pages['status'] == 'newly failing').sum()))
+        regressions = diff['regressions']
+        if regressions.empty:
+            st.success(f"No page or test score dropped by {REGRESSION_THRESHOLD:g} points or more.")
         else:
-            st.error("No results were generated. Please check the logs for errors.")
+            st.warning(f"{len(regressions)} page or test scores dropped by {REGRESSION_THRESHOLD:g} points or more")
+            st.dataframe(regressions, use_container_width=True, hide_index=True)
+    
+    trend = runs.tail(TREND_RUNS)
+    if len(trend) > 1:
+        st.line_chart(trend.set_index('recorded_at')['mean_score'])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,261 @@
+"""Local stand-in for the acsbace.com scanner used for offline testing and benchmarks.
+
+Implements the endpoints AccessibilityChecker talks to:
+
+    /loading?website=...            HTML page carrying a data-token attribute
+    /evaluate?website=...&token=... starts a (simulated) scan; screenshot=true makes it slower
+    /get-scan-details?scanId=...    scan JSON, 'pending' until the scan finishes
+    /screenshot?scanId=...          PNG linked from the details of scans with a screenshot
+
+Run it standalone and point the checker at it:
+
+    python mock_server.py --port 8765 --scan-latency 2 --error-rate 0.01
+    ACSBACE_BASE_URL=http://127.0.0.1:8765 python cli.py all --no-cache
+"""
+import argparse
+import json
+import random
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Report categories and tests returned in the simulated scan results
+CATEGORIES = {
+    'clickables': ['buttonsLabeled', 'linksLabeled', 'newWindowLinks'],
+    'forms': ['inputsLabeled', 'requiredFieldsMarked', 'errorMessages'],
+    'graphics': ['imagesAlt', 'iconsHidden', 'svgTitles'],
+    'document': ['languageSet', 'pageTitle', 'skipLinks'],
+    'readability': ['headingStructure', 'fontSizes', 'lineHeight'],
+    'navigation': ['menusLabeled', 'landmarks', 'focusOrder'],
+    'contrast': ['textContrast', 'linkContrast'],
+    'tables': ['headersDefined', 'captions'],
+}
+
+
+def build_scan_result(website_url, time_to_scan, rng=random):
+    """Return a scan-details payload shaped like the real service response"""
+    reports = {}
+    scores = []
+    for category, tests in CATEGORIES.items():
+        category_data = {}
+        test_scores = []
+        for test in tests:
+            failures = rng.randint(0, 12)
+            successes = rng.randint(1, 60)
+            score = round(100 * successes / (successes + failures), 1)
+            test_scores.append(score)
+            category_data[test] = {'score': score, 'failures': failures, 'successes': successes}
+        category_score = round(sum(test_scores) / len(test_scores), 1)
+        category_data['score'] = category_score
+        category_data['verdict'] = 'compliant' if category_score >= 85 else 'not compliant'
+        reports[category] = category_data
+        scores.append(category_score)
+    score = round(sum(scores) / len(scores), 1)
+    return {
+        'scanStatus': 'success',
+        'url': website_url,
+        'result': {
+            'verdict': 'compliant' if score >= 85 else 'not compliant',
+            'score': score,
+            'detectedCMS': 'WordPress',
+            'totalElements': rng.randint(300, 3000),
+            'timeToScan': round(time_to_scan, 2),
+            'reports': reports,
+        },
+    }
+
+
+def build_screenshot(width=1280, height=800):
+    """Return a plain PNG image standing in for a rendered page"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    row = b'\x00' + b'\xf4\xf4\xf4' * width
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(row * height)) + chunk(b'IEND', b''))
+
+
+class MockScanner:
+    """In-memory scan state and failure injection shared by all request handlers"""
+
+    def __init__(self, scan_latency=2.0, latency_jitter=0.5, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, loading_padding=20000, response_delay=0.0, screenshot_latency=1.0, seed=None):
+        self.scan_latency = scan_latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.loading_padding = loading_padding
+        self.response_delay = response_delay
+        self.screenshot_latency = screenshot_latency
+        self.rng = random.Random(seed)
+        self.scans = {}
+        self.finished = {}  # results of scans with a screenshot, which can be fetched again
+        self.stats = {'loading': 0, 'evaluate': 0, 'details': 0, 'screenshot': 0, 'throttled': 0, 'errors': 0}
+        self._lock = threading.Lock()
+
+    def loading_page(self, website_url):
+        token = uuid.uuid4().hex
+        with self._lock:
+            self.scans[token] = {'website': website_url, 'started': None, 'latency': None, 'screenshot': False}
+        padding = '<div class="spinner"></div>\n' * (self.loading_padding // 28)
+        return (
+            '<!DOCTYPE html><html><head><title>Scanning...</title></head><body>\n'
+            f'{padding}<div id="app" data-token="{token}" data-website="{website_url}"></div>\n'
+            f'{padding}</body></html>'
+        )
+
+    def start(self, token, screenshot=False):
+        with self._lock:
+            scan = self.scans.get(token)
+            if scan is None:
+                return False
+            latency = self.scan_latency * self.rng.uniform(1 - self.latency_jitter, 1 + self.latency_jitter)
+            scan['started'] = time.monotonic()
+            scan['latency'] = max(0.0, latency) + (self.screenshot_latency if screenshot else 0.0)
+            scan['screenshot'] = screenshot
+        return True
+
+    def details(self, token):
+        with self._lock:
+            if token in self.finished:
+                return self.finished[token]
+            scan = self.scans.get(token)
+            if scan is None:
+                return None
+            if scan['started'] is None or time.monotonic() - scan['started'] < scan['latency']:
+                return {'scanStatus': 'pending'}
+            self.scans.pop(token)
+            data = build_scan_result(scan['website'], scan['latency'], self.rng)
+            if scan['screenshot']:
+                data['result']['screenshot'] = f"/screenshot?scanId={token}"
+                self.finished[token] = data
+            return data
+
+    def injected_failure(self):
+        """Return an (HTTP status, headers) pair to fail this request with, or None"""
+        with self._lock:
+            roll = self.rng.random()
+            if roll < self.throttle_rate:
+                self.stats['throttled'] += 1
+                return 429, {'Retry-After': str(self.retry_after)}
+            if roll < self.throttle_rate + self.error_rate:
+                self.stats['errors'] += 1
+                return 503, {}
+        return None
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients stop reading /loading once they have the token and drop the connection
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_handler(scanner):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=b'', content_type='text/plain', headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+            endpoint = {'/loading': 'loading', '/evaluate': 'evaluate',
+                        '/get-scan-details': 'details', '/screenshot': 'screenshot'}.get(parts.path)
+            if endpoint is None:
+                self._send(404, b'not found')
+                return
+
+            with scanner._lock:
+                scanner.stats[endpoint] += 1
+            if scanner.response_delay:
+                time.sleep(scanner.response_delay)
+            failure = scanner.injected_failure()
+            if failure:
+                status, headers = failure
+                self._send(status, b'try again later', headers=headers)
+                return
+
+            if endpoint == 'loading':
+                html = scanner.loading_page(params.get('website', ''))
+                self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8')
+            elif endpoint == 'evaluate':
+                if scanner.start(params.get('token', ''), params.get('screenshot') == 'true'):
+                    self._send(200, b'{"status": "started"}', 'application/json')
+                else:
+                    self._send(404, b'unknown token')
+            elif endpoint == 'screenshot':
+                if params.get('scanId') in scanner.finished:
+                    self._send(200, build_screenshot(), 'image/png')
+                else:
+                    self._send(404, b'unknown scan')
+            else:
+                data = scanner.details(params.get('scanId', ''))
+                if data is None:
+                    self._send(404, b'unknown scan')
+                else:
+                    self._send(200, json.dumps(data).encode('utf-8'), 'application/json')
+
+    return Handler
+
+
+def start_server(scanner=None, host='127.0.0.1', port=0):
+    """Start the mock server on a background thread; returns ``(server, base_url)``"""
+    scanner = scanner or MockScanner()
+    server = MockHTTPServer((host, port), make_handler(scanner))
+    server.scanner = scanner
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the acsbace.com scanner")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--scan-latency', type=float, default=2.0, help='mean seconds until a scan completes')
+    parser.add_argument('--latency-jitter', type=float, default=0.5, help='+/- fraction of the scan latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429')
+    parser.add_argument('--loading-padding', type=int, default=20000, help='bytes of filler in /loading HTML')
+    parser.add_argument('--screenshot-latency', type=float, default=1.0,
+                        help='extra seconds a scan takes when a screenshot is requested')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    scanner = MockScanner(scan_latency=args.scan_latency, latency_jitter=args.latency_jitter,
+                          error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                          retry_after=args.retry_after, loading_padding=args.loading_padding,
+                          screenshot_latency=args.screenshot_latency, seed=args.seed)
+    server = MockHTTPServer((args.host, args.port), make_handler(scanner))
+    print(f"Mock scanner listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Rebuild result tables from the archive of raw scan JSON, without rescanning.
+
+Every scan's raw get-scan-details response is kept in the scan archive
+(see ScanArchive). After parse_scan_data learns a new field, this command
+re-parses the archived responses of past runs on all cores, rewrites their
+results in the run journal and replaces their score-history snapshots, so
+the new columns show up in the UI, exports and cross-run comparisons.
+
+    python reparse.py --all
+    python reparse.py --label "Run All" --processes 8
+    python reparse.py 3f2c... --export reparsed.xlsx --dry-run
+
+Results with no archived response (failed scans, or runs from before the
+archive existed) are left as they are.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checker import RunJournal, ScanArchive, reparse_archived_scan
+from export import export_format, write_export
+from results import RunHistory
+from cli import EXIT_OK, EXIT_USAGE
+
+# Archived responses handed to a worker process at a time
+CHUNK_SIZE = 64
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Re-parse archived raw scan JSON into the stored results")
+    parser.add_argument('run_ids', nargs='*', help='runs to rebuild')
+    parser.add_argument('--label', default=None, help='rebuild every run with this label (program name, "Run All", ...)')
+    parser.add_argument('--all', action='store_true', help='rebuild every run in the journal')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='parser processes')
+    parser.add_argument('--export', default=None,
+                        help='also write the rebuilt rows of a single run to this .xlsx, .csv, .jsonl or .parquet file')
+    parser.add_argument('--dry-run', action='store_true', help='re-parse and report without writing anything back')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    journal = RunJournal()
+    labels = dict(journal.runs())
+    if args.all or args.label:
+        run_ids = [run_id for run_id, _ in journal.runs(args.label)]
+    else:
+        run_ids = args.run_ids
+    unknown = [run_id for run_id in run_ids if run_id not in labels]
+    if not run_ids or unknown:
+        parser.print_usage(sys.stderr)
+        print(f"error: unknown run: {', '.join(unknown)}" if unknown else "error: give run ids, --label or --all",
+              file=sys.stderr)
+        return EXIT_USAGE
+    if args.export and len(run_ids) != 1:
+        print("error: --export needs exactly one run", file=sys.stderr)
+        return EXIT_USAGE
+    if args.export:
+        try:
+            export_fmt = export_format(args.export)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return EXIT_USAGE
+
+    archive = ScanArchive()
+    history = RunHistory()
+    recorded = set(history.runs()['run_id'])
+    started = time.monotonic()
+    totals = {'runs': 0, 'pages': 0, 'blobs': 0}
+    new_columns = set()
+    with ProcessPoolExecutor(max_workers=max(1, args.processes)) as pool:
+        for run_id in run_ids:
+            results = journal.results(run_id)
+            blobs = archive.run_blobs(run_id)
+            for index, result in results.items():
+                if index not in blobs and result.get('rawBlob'):
+                    blobs[index] = result['rawBlob']
+
+            # Identical responses share a blob, so each one is parsed once
+            unique = sorted(set(blobs.values()))
+            parsed = dict(zip(unique, pool.map(reparse_archived_scan, [archive.blob_path(blob) for blob in unique],
+                                               chunksize=CHUNK_SIZE)))
+            rebuilt = {}
+            for index, blob in blobs.items():
+                if index in results and parsed[blob]:
+                    new_columns.update(key for key in parsed[blob] if key not in results[index])
+                    rebuilt[index] = dict(results[index], **parsed[blob])
+            results.update(rebuilt)
+
+            if not args.dry_run:
+                journal.replace_results(run_id, rebuilt)
+                if run_id in recorded:
+                    history.record(run_id, labels[run_id], results.values(), replace=True)
+            if args.export:
+                rows = [results[index] for index in sorted(results)]
+                write_export(lambda: iter(rows), export_fmt, args.export)
+
+            totals['runs'] += 1
+            totals['pages'] += len(rebuilt)
+            totals['blobs'] += len(unique)
+            print(f"{run_id} ({labels[run_id]}): re-parsed {len(rebuilt)} of {len(results)} results", file=sys.stderr)
+
+    if new_columns:
+        print(f"new columns: {', '.join(sorted(new_columns))}", file=sys.stderr)
+    print(f"summary: runs={totals['runs']} pages={totals['pages']} blobs={totals['blobs']} "
+          f"elapsed={time.monotonic() - started:.1f}s{' (dry run)' if args.dry_run else ''}", file=sys.stderr)
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
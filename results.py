@@ -0,0 +1,579 @@
+"""Typed result tables, rollups and the cross-run score history (pandas and NumPy)."""
+import functools
+import itertools
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from checker import DATA_DIR, PHASE_COLUMNS, normalize_url
+
+# Score at or above which a page counts as passing in rollups
+PASS_SCORE = 85
+# Lowest-scoring pages listed per rollup
+WORST_PAGES = 10
+# Score drop (in points) between runs that counts as a regression
+REGRESSION_THRESHOLD = 5.0
+# Results parsed at a time while a run's history snapshot is built
+HISTORY_CHUNK_ROWS = 2000
+
+class ResultSchema:
+    """Registry of report categories and tests with stable categorical codes.
+
+    Names are only ever appended, so codes of already registered names never
+    change and frames built at different times stay compatible.
+    """
+
+    METRICS = ('score', 'failures', 'successes')
+
+    def __init__(self):
+        self.categories = []
+        self.tests = ['']  # '' marks a category-level metric
+        self._category_codes = {}
+        self._test_codes = {'': 0}
+        self._lock = threading.Lock()
+
+    def register(self, category, test=''):
+        """Register a category/test pair and return its ``(category_code, test_code)``"""
+        with self._lock:
+            if category not in self._category_codes:
+                self._category_codes[category] = len(self.categories)
+                self.categories.append(category)
+            if test not in self._test_codes:
+                self._test_codes[test] = len(self.tests)
+                self.tests.append(test)
+            return self._category_codes[category], self._test_codes[test]
+
+    def dtypes(self):
+        """Return the (category, test, metric) categorical dtypes"""
+        with self._lock:
+            return (pd.CategoricalDtype(list(self.categories)), pd.CategoricalDtype(list(self.tests)),
+                    pd.CategoricalDtype(list(self.METRICS)))
+
+RESULT_SCHEMA = ResultSchema()
+
+# Dtypes of the per-page columns of a result table; unknown columns stay object
+RESULT_COLUMN_DTYPES = dict({
+    'program': 'category',
+    'failurePhase': 'category',
+    'failureCause': 'category',
+    'httpStatus': 'float32',
+    'attempts': 'float32',
+    'website_url': 'string',
+    'accessibe_url': 'string',
+    'scanStatus': 'category',
+    'verdict': 'category',
+    'score': 'float32',
+    'detectedCMS': 'category',
+    'totalElements': 'float32',
+    'timeToScan': 'float32',
+    'pollCount': 'float32',
+    'resultSource': 'category',
+    'totalMs': 'float32',
+    'retryCount': 'float32',
+    'bytesTransferred': 'float64',
+}, **{column: 'float32' for column in PHASE_COLUMNS.values()})
+
+class ResultTable:
+    """Typed, long-format storage of a run's results.
+
+    ``pages`` has one row per result with typed summary columns (index is the
+    page id). ``metrics`` has one row per present (page, category, test,
+    metric) value and ``verdicts`` one row per (page, category) verdict, all
+    with categorical keys and float32 values. It is built from the typed wide
+    ``result_frame`` (one ``{category}_{test}_{metric}`` column per value),
+    which the UI shows and exports as it is; rollups use the long layout.
+    """
+
+    def __init__(self, pages, metrics, verdicts, schema=RESULT_SCHEMA):
+        self.pages = pages
+        self.metrics = metrics
+        self.verdicts = verdicts
+        self.schema = schema
+
+    @classmethod
+    def from_rows(cls, rows, schema=RESULT_SCHEMA):
+        """Split parse_scan_results-style dicts into page, metric and verdict frames"""
+        return cls.from_frame(result_frame(rows, schema), schema)
+
+    @classmethod
+    def from_frame(cls, frame, schema=RESULT_SCHEMA):
+        """Build the long layout from a ``result_frame`` wide frame, without going back to the rows"""
+        layouts = _column_layouts(frame.columns, schema)
+        metric_columns = [column for column, layout in layouts.items() if layout and layout[0] == 'metric']
+        verdict_columns = [column for column, layout in layouts.items() if layout and layout[0] == 'verdict']
+        pages = frame.drop(columns=metric_columns + verdict_columns)
+        page_ids = frame.index.to_numpy()
+        category_dtype, test_dtype, metric_dtype = schema.dtypes()
+
+        # Stack the metric block into one row per present value
+        values = frame[metric_columns].to_numpy('float32')
+        page_pos, column_pos = np.nonzero(~np.isnan(values))
+        codes = np.array([layouts[column][1:] for column in metric_columns], dtype='int32').reshape(-1, 3)[column_pos]
+        metrics = pd.DataFrame({
+            'page_id': page_ids[page_pos].astype('int32'),
+            'category': pd.Categorical.from_codes(codes[:, 0], dtype=category_dtype),
+            'test': pd.Categorical.from_codes(codes[:, 1], dtype=test_dtype),
+            'metric': pd.Categorical.from_codes(codes[:, 2].astype('int8'), dtype=metric_dtype),
+            'value': values[page_pos, column_pos],
+        })
+
+        verdict_values = frame[verdict_columns].astype(object).to_numpy()
+        page_pos, column_pos = np.nonzero(pd.notna(verdict_values))
+        verdict_codes = np.array([layouts[column][1] for column in verdict_columns], dtype='int32')[column_pos]
+        verdicts = pd.DataFrame({
+            'page_id': page_ids[page_pos].astype('int32'),
+            'category': pd.Categorical.from_codes(verdict_codes, dtype=category_dtype),
+            'verdict': pd.Categorical(verdict_values[page_pos, column_pos]),
+        })
+        return cls(pages, metrics, verdicts, schema)
+
+    @staticmethod
+    def _key_layout(key, categories, schema):
+        category = next((c for c in categories if key.startswith(f'{c}_')), None)
+        if category is None:
+            return None
+        rest = key[len(category) + 1:]
+        if rest == 'verdict':
+            return ('verdict', schema.register(category)[0])
+        test, _, metric = rest.rpartition('_')
+        if metric not in ResultSchema.METRICS:
+            return None
+        category_code, test_code = schema.register(category, test)
+        return ('metric', category_code, test_code, ResultSchema.METRICS.index(metric))
+
+    def __len__(self):
+        return len(self.pages)
+
+    def category_scores(self):
+        """Category-level scores as rows of (page_id, category, value)"""
+        metrics = self.metrics
+        mask = (metrics['test'] == '') & (metrics['metric'] == 'score')
+        return metrics.loc[mask, ['page_id', 'category', 'value']]
+
+def _column_layouts(columns, schema=RESULT_SCHEMA):
+    """Map each flat column name to its long layout (see ResultTable._key_layout)"""
+    # Longest first so a category that prefixes another cannot steal its keys
+    categories = sorted((column[:-len('_verdict')] for column in columns
+                         if column.endswith('_verdict') and column != 'verdict'), key=len, reverse=True)
+    return {column: ResultTable._key_layout(column, categories, schema) for column in columns}
+
+def result_frame(rows, schema=RESULT_SCHEMA):
+    """Return parse_scan_results-style dicts as one typed, wide DataFrame.
+
+    Page columns get RESULT_COLUMN_DTYPES, metric columns float32 and verdict
+    columns category, so the frame can be shown as it is; ``ResultTable.from_frame``
+    turns it into the long layout when rollups need it.
+    """
+    frame = pd.DataFrame(list(rows))
+    if 'program' not in frame.columns:
+        frame['program'] = ''
+    typed = {}
+    for column, layout in _column_layouts(frame.columns, schema).items():
+        values = frame[column]
+        if layout is None:
+            dtype = RESULT_COLUMN_DTYPES.get(column)
+        else:
+            dtype = 'float32' if layout[0] == 'metric' else 'category'
+        if dtype is None:
+            typed[column] = values
+        elif dtype.startswith('float'):
+            if values.dtype == object:
+                # Older rows may hold '' or numeric strings
+                values = pd.to_numeric(values, errors='coerce')
+            typed[column] = values.astype(dtype)
+        else:
+            if dtype == 'category' and layout is not None:
+                values = values.replace('', None)
+            typed[column] = values.astype(dtype)
+    return pd.DataFrame(typed, index=frame.index)
+
+def compute_rollups(table, pass_score=PASS_SCORE, worst_pages=WORST_PAGES):
+    """Compute per-program and per-category statistics for a run in one vectorized pass.
+
+    ``table`` is a ResultTable. Returns a dict of DataFrames: ``programs``
+    (one row per program), ``categories`` (one row per report category),
+    ``program_categories`` (mean category score per program) and
+    ``worst_pages``.
+
+    A page listed under several programs counts once in the category
+    statistics and worst pages, and once per program in the program ones.
+    """
+    pages = table.pages
+    program = pages['program'].astype(str).replace('nan', '')
+    succeeded = pages['scanStatus'] == 'success'
+    page_key = pages['website_url'].astype(str).map(normalize_url)
+    unique = ~page_key.duplicated()
+
+    def describe(values, keys):
+        grouped = values.groupby(keys, observed=True)
+        stats = grouped.agg(['count', 'mean', 'median'])
+        stats['p10'] = grouped.quantile(0.1)
+        stats['p90'] = grouped.quantile(0.9)
+        stats['pass_rate'] = (values >= pass_score).groupby(keys, observed=True).mean()
+        return stats
+
+    programs = describe(pages.loc[succeeded, 'score'], program[succeeded]).reindex(program.unique())
+    programs['count'] = programs['count'].fillna(0).astype(int)
+    programs['failed_scans'] = (~succeeded).groupby(program).sum()
+    programs = programs.rename_axis('program').reset_index()
+
+    # Category-level scores of successful pages, already in long layout
+    scores = table.category_scores()
+    scores = scores.loc[succeeded.reindex(scores['page_id']).to_numpy()]
+    scores = scores.assign(program=program.reindex(scores['page_id']).to_numpy()).dropna(subset=['value'])
+    unique_scores = scores.loc[unique.reindex(scores['page_id']).to_numpy()]
+    category_stats = describe(unique_scores['value'], unique_scores['category']).rename_axis('category').reset_index()
+
+    # Failures per category: sum each page's test failures within the category
+    metrics = table.metrics
+    failures = metrics.loc[(metrics['metric'] == 'failures') & (metrics['test'] != '')]
+    failures = failures.loc[unique.reindex(failures['page_id']).to_numpy()]
+    if not failures.empty:
+        per_page = failures.groupby(['page_id', 'category'], observed=True)['value'].sum()
+        per_category = per_page.groupby(level='category', observed=True).agg(['mean', 'sum'])
+        category_stats['mean_failures'] = category_stats['category'].map(per_category['mean']).astype(float)
+        category_stats['total_failures'] = category_stats['category'].map(per_category['sum']).astype(float)
+
+    program_categories = scores.pivot_table(index='program', columns='category', values='value',
+                                            aggfunc='mean', observed=True)
+
+    worst = pages.loc[succeeded & unique].nsmallest(worst_pages, 'score')
+    if 'program' in worst.columns:
+        # Name every program that lists the page
+        listed_by = program[succeeded].groupby(page_key[succeeded]).agg(lambda names: ', '.join(dict.fromkeys(names)))
+        worst = worst.assign(program=page_key[worst.index].map(listed_by).to_numpy())
+    worst_columns = [col for col in ['program', 'website_url', 'score', 'verdict'] if col in worst.columns]
+
+    return {
+        'programs': programs,
+        'categories': category_stats,
+        'program_categories': program_categories,
+        'worst_pages': worst[worst_columns].reset_index(drop=True),
+    }
+
+class RunHistory:
+    """Append-only history of parsed run results for cross-run comparison.
+
+    Each recorded run is written once as a compressed NumPy snapshot (page
+    URLs and scores plus every metric in long layout) and indexed in SQLite
+    by run timestamp and, per page, by URL. Snapshots are never rewritten,
+    so loaded ones are cached for the life of the process.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DATA_DIR, 'history.sqlite3')
+        self.snapshot_dir = os.path.join(os.path.dirname(os.path.abspath(self.path)), 'history')
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with self._connect() as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history_runs ("
+                " run_id TEXT PRIMARY KEY,"
+                " label TEXT NOT NULL,"
+                " recorded_at REAL NOT NULL,"
+                " pages INTEGER NOT NULL,"
+                " succeeded INTEGER NOT NULL,"
+                " mean_score REAL,"
+                " snapshot TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS history_runs_by_time ON history_runs (label, recorded_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history_pages ("
+                " url_key TEXT NOT NULL,"
+                " recorded_at REAL NOT NULL,"
+                " run_id TEXT NOT NULL,"
+                " score REAL,"
+                " PRIMARY KEY (url_key, recorded_at, run_id))"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30))
+
+    def record(self, run_id, label, rows, recorded_at=None, replace=False):
+        """Store the results of a finished run; recording the same run twice is a no-op.
+
+        ``rows`` may be any iterable of result dicts, e.g. streamed from the
+        run journal; it is read HISTORY_CHUNK_ROWS at a time. With
+        ``replace``, an already recorded run gets a new snapshot built from
+        ``rows`` (e.g. re-parsed from the scan archive) and keeps its
+        original time; the old snapshot file is left in place.
+        """
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        with self._connect() as conn:
+            row = conn.execute("SELECT recorded_at FROM history_runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row and not replace:
+            return False
+        if row:
+            recorded_at = row[0]
+
+        # Built chunk by chunk, so only the compact snapshot arrays grow with the size of the run.
+        # Schema codes never change, so the field codes of different chunks can be combined.
+        urls, scores, succeeded = [], [], []
+        metric_page, metric_field, metric_value = [], [], []
+        field_ids = {}
+        rows = iter(rows)
+        offset = 0
+        while True:
+            chunk = list(itertools.islice(rows, HISTORY_CHUNK_ROWS))
+            if not chunk:
+                break
+            table = ResultTable.from_rows(chunk)
+            pages = table.pages
+            chunk_succeeded = ((pages['scanStatus'] == 'success').to_numpy(bool) if 'scanStatus' in pages
+                               else np.zeros(len(pages), bool))
+            urls.extend(normalize_url(url) for url in pages['website_url'].astype(str))
+            scores.append(pages['score'].to_numpy('float32') if 'score' in pages
+                          else np.full(len(pages), np.nan, 'float32'))
+            succeeded.append(chunk_succeeded)
+
+            metrics = table.metrics.loc[chunk_succeeded[table.metrics['page_id'].to_numpy()]]
+            metric_page.append(metrics['page_id'].to_numpy('int32') + offset)
+            codes = ((metrics['category'].cat.codes.to_numpy('int64') << 32)
+                     | (metrics['test'].cat.codes.to_numpy('int64') << 8)
+                     | metrics['metric'].cat.codes.to_numpy('int64'))
+            chunk_fields, chunk_index = np.unique(codes, return_inverse=True)
+            ids = np.array([field_ids.setdefault(code, len(field_ids)) for code in chunk_fields.tolist()], dtype='int32')
+            metric_field.append(ids[chunk_index])
+            metric_value.append(metrics['value'].to_numpy('float32'))
+            offset += len(pages)
+
+        urls = np.array(urls, dtype=str)
+        scores = np.concatenate(scores) if scores else np.zeros(0, 'float32')
+        succeeded = np.concatenate(succeeded) if succeeded else np.zeros(0, bool)
+        categories, tests, metric_names = (dtype.categories for dtype in RESULT_SCHEMA.dtypes())
+        field_names = [(categories[code >> 32], tests[(code >> 8) & 0xFFFFFF], metric_names[code & 0xFF])
+                       for code in field_ids]
+
+        # Replacements get a new file name, so loaded snapshots never change under their path
+        snapshot = os.path.join(self.snapshot_dir, f"{run_id}-{uuid.uuid4().hex[:8]}.npz" if row else f"{run_id}.npz")
+        tmp_path = f"{snapshot}.{uuid.uuid4().hex}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            urls=urls,
+            scores=scores,
+            succeeded=succeeded,
+            field_names=np.array(field_names, dtype=str).reshape(-1, 3),
+            metric_page=np.concatenate(metric_page) if metric_page else np.zeros(0, 'int32'),
+            metric_field=np.concatenate(metric_field) if metric_field else np.zeros(0, 'int32'),
+            metric_value=np.concatenate(metric_value) if metric_value else np.zeros(0, 'float32'),
+        )
+        os.replace(tmp_path, snapshot)
+
+        mean_score = float(np.nanmean(scores[succeeded])) if succeeded.any() else None
+        with self._connect() as conn, conn:
+            if row:
+                conn.execute("DELETE FROM history_runs WHERE run_id = ?", (run_id,))
+                conn.execute("DELETE FROM history_pages WHERE run_id = ?", (run_id,))
+            conn.execute(
+                "INSERT OR IGNORE INTO history_runs (run_id, label, recorded_at, pages, succeeded, mean_score, snapshot)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, label, recorded_at, len(urls), int(succeeded.sum()), mean_score, snapshot)
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO history_pages (url_key, recorded_at, run_id, score) VALUES (?, ?, ?, ?)",
+                ((url, recorded_at, run_id, None if np.isnan(score) else float(score))
+                 for url, score, ok in zip(urls, scores, succeeded) if ok)
+            )
+        return True
+
+    def runs(self, label=None, since=None, until=None):
+        """Return recorded runs, oldest first, optionally filtered by label and time window"""
+        query = "SELECT run_id, label, recorded_at, pages, succeeded, mean_score FROM history_runs WHERE 1 = 1"
+        params = []
+        if label is not None:
+            query += " AND label = ?"
+            params.append(label)
+        if since is not None:
+            query += " AND recorded_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND recorded_at <= ?"
+            params.append(until)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY recorded_at", params).fetchall()
+        runs = pd.DataFrame(rows, columns=['run_id', 'label', 'recorded_at', 'pages', 'succeeded', 'mean_score'])
+        runs['recorded_at'] = pd.to_datetime(runs['recorded_at'], unit='s', utc=True)
+        return runs
+
+    def last_scans(self, url_keys, batch_size=500):
+        """Return ``{url_key: (recorded_at, score)}`` of the latest recorded result of each page"""
+        url_keys = list(url_keys)
+        last = {}
+        with self._connect() as conn:
+            for start in range(0, len(url_keys), batch_size):
+                batch = url_keys[start:start + batch_size]
+                # SQLite returns the score of the row holding MAX(recorded_at)
+                rows = conn.execute(
+                    f"SELECT url_key, MAX(recorded_at), score FROM history_pages"
+                    f" WHERE url_key IN ({','.join('?' * len(batch))}) GROUP BY url_key",
+                    batch
+                ).fetchall()
+                last.update((key, (recorded_at, score)) for key, recorded_at, score in rows)
+        return last
+
+    def previous_run(self, run_id):
+        """Return the id of the last run with the same label recorded before ``run_id``, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT prev.run_id FROM history_runs AS cur JOIN history_runs AS prev"
+                " ON prev.label = cur.label AND prev.recorded_at < cur.recorded_at"
+                " WHERE cur.run_id = ? ORDER BY prev.recorded_at DESC LIMIT 1",
+                (run_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def page_trend(self, url):
+        """Return the recorded scores of one page over time"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT recorded_at, run_id, score FROM history_pages WHERE url_key = ? ORDER BY recorded_at",
+                (normalize_url(url),)
+            ).fetchall()
+        trend = pd.DataFrame(rows, columns=['recorded_at', 'run_id', 'score'])
+        trend['recorded_at'] = pd.to_datetime(trend['recorded_at'], unit='s', utc=True)
+        return trend
+
+    def _snapshot_path(self, run_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT snapshot FROM history_runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Run {run_id} is not in the history")
+        return row[0]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _load_snapshot(path):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    def diff(self, before_run, after_run, threshold=REGRESSION_THRESHOLD):
+        """Compare two recorded runs; see ``diff_snapshots`` for the result"""
+        return diff_snapshots(self._load_snapshot(self._snapshot_path(before_run)),
+                              self._load_snapshot(self._snapshot_path(after_run)), threshold)
+
+    def diff_window(self, since, until=None, label=None, threshold=REGRESSION_THRESHOLD):
+        """Compare each page's first and last successful result within a time window"""
+        runs = self.runs(label, since, until)
+        if runs.empty:
+            return None
+        snapshots = [self._load_snapshot(self._snapshot_path(run_id)) for run_id in runs['run_id']]
+        return diff_snapshots(merge_snapshots(snapshots, last=False), merge_snapshots(snapshots, last=True),
+                              threshold)
+
+def merge_snapshots(snapshots, last=True):
+    """Combine snapshots (oldest first) into one holding each page's first or last successful result"""
+    urls = pd.unique(np.concatenate([s['urls'][s['succeeded']] for s in snapshots]))
+    field_names = np.concatenate([s['field_names'] for s in snapshots])
+    field_keys = pd.unique(pd.Series(['\x1f'.join(name) for name in field_names], dtype=object))
+    url_index, field_index = pd.Index(urls), pd.Index(field_keys)
+
+    page_codes, page_scores, keys, values = [], [], [], []
+    for s in snapshots:
+        url_codes = url_index.get_indexer(s['urls'])
+        ok = s['succeeded']
+        page_codes.append(url_codes[ok])
+        page_scores.append(s['scores'][ok])
+        field_codes = field_index.get_indexer(['\x1f'.join(name) for name in s['field_names']])
+        keys.append(url_codes[s['metric_page']].astype('int64') * len(field_keys) + field_codes[s['metric_field']])
+        values.append(s['metric_value'])
+
+    def pick(codes, data):
+        codes, data = np.concatenate(codes), np.concatenate(data)
+        if last:
+            codes, data = codes[::-1], data[::-1]
+        unique, first = np.unique(codes, return_index=True)
+        return unique, data[first]
+
+    page_codes, page_scores = pick(page_codes, page_scores)
+    keys, values = pick(keys, values)
+    metric_page, metric_field = np.divmod(keys, len(field_keys))
+    # Re-number pages so the merged snapshot has the same shape as a recorded one
+    return {
+        'urls': urls[page_codes].astype(str),
+        'scores': page_scores,
+        'succeeded': np.ones(len(page_codes), bool),
+        'field_names': np.array([key.split('\x1f') for key in field_keys], dtype=str).reshape(-1, 3),
+        'metric_page': np.searchsorted(page_codes, metric_page).astype('int32'),
+        'metric_field': metric_field.astype('int32'),
+        'metric_value': values,
+    }
+
+def diff_snapshots(before, after, threshold=REGRESSION_THRESHOLD):
+    """Compute per-page and per-test score deltas between two run snapshots with vectorized joins.
+
+    Returns a dict of DataFrames: ``pages`` (one row per page in either run,
+    with before/after scores, delta and status), ``tests`` (one row per
+    page/category/test/metric present in both runs) and ``regressions`` (page
+    and test scores that dropped by at least ``threshold`` points).
+    """
+    # Shared URL vocabulary: pages of the first run, then pages only in the second
+    before_urls, after_urls = before['urls'], after['urls']
+    after_in_before = pd.Index(before_urls).get_indexer(after_urls)
+    only_after = after_in_before < 0
+    urls = np.concatenate([before_urls, after_urls[only_after]])
+    after_codes = after_in_before.copy()
+    after_codes[only_after] = len(before_urls) + np.arange(only_after.sum())
+
+    before_scores = np.full(len(urls), np.nan, dtype='float32')
+    after_scores = np.full(len(urls), np.nan, dtype='float32')
+    before_ok = np.zeros(len(urls), bool)
+    after_ok = np.zeros(len(urls), bool)
+    before_scores[:len(before_urls)] = before['scores']
+    before_ok[:len(before_urls)] = before['succeeded']
+    after_scores[after_codes] = after['scores']
+    after_ok[after_codes] = after['succeeded']
+    in_before = np.arange(len(urls)) < len(before_urls)
+    in_after = np.zeros(len(urls), bool)
+    in_after[after_codes] = True
+
+    status = np.select(
+        [~in_before, ~in_after, before_ok & ~after_ok, ~before_ok & after_ok],
+        ['new', 'removed', 'newly failing', 'recovered'], 'compared')
+    pages = pd.DataFrame({
+        'website_url': urls,
+        'before': before_scores,
+        'after': after_scores,
+        'delta': after_scores - before_scores,
+        'status': pd.Categorical(status),
+    })
+
+    # Shared field vocabulary, then one int64 key per (page, field) so the join is a sorted intersection
+    before_fields = ['\x1f'.join(name) for name in before['field_names']]
+    after_fields = ['\x1f'.join(name) for name in after['field_names']]
+    field_keys = pd.Index(pd.unique(pd.Series(before_fields + after_fields, dtype=object)))
+    before_field_codes = field_keys.get_indexer(before_fields)
+    after_field_codes = field_keys.get_indexer(after_fields)
+    before_keys = (before['metric_page'].astype('int64') * len(field_keys)
+                   + before_field_codes[before['metric_field']])
+    after_keys = (after_codes[after['metric_page']].astype('int64') * len(field_keys)
+                  + after_field_codes[after['metric_field']])
+    keys, before_at, after_at = np.intersect1d(before_keys, after_keys, assume_unique=True, return_indices=True)
+    page_codes, field_codes = np.divmod(keys, len(field_keys))
+
+    # Categoricals are built from codes over the small field vocabulary, never from per-row strings
+    names = np.array([key.split('\x1f') for key in field_keys], dtype=str).reshape(-1, 3)
+    columns = {'website_url': pd.Categorical.from_codes(page_codes, categories=pd.Index(urls, dtype=object))}
+    for position, column in enumerate(('category', 'test', 'metric')):
+        vocabulary, codes = np.unique(names[:, position], return_inverse=True)
+        columns[column] = pd.Categorical.from_codes(codes[field_codes], categories=pd.Index(vocabulary, dtype=object))
+    before_values = before['metric_value'][before_at]
+    after_values = after['metric_value'][after_at]
+    tests = pd.DataFrame(dict(columns, before=before_values, after=after_values,
+                              delta=after_values - before_values))
+
+    page_regressions = pages.loc[pages['delta'] <= -threshold, ['website_url', 'before', 'after', 'delta']]
+    test_regressions = tests.loc[(tests['metric'] == 'score') & (tests['delta'] <= -threshold)]
+    test_regressions = test_regressions.astype({'website_url': object, 'category': object, 'test': object})
+    regressions = pd.concat([page_regressions.assign(category='', test=''), test_regressions],
+                            ignore_index=True)[['website_url', 'category', 'test', 'before', 'after', 'delta']]
+    return {
+        'pages': pages,
+        'tests': tests,
+        'regressions': regressions.sort_values('delta', kind='stable').reset_index(drop=True),
+    }
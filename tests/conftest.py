@@ -0,0 +1,8 @@
+"""Test setup: import the scripts from the repository root and keep all data in a temporary directory."""
+import os
+import sys
+import tempfile
+
+# Must be set before checker is imported, since DATA_DIR is read at import time
+os.environ.setdefault('ACCESSIBILITY_DATA_DIR', tempfile.mkdtemp(prefix='accessibility-tests-'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
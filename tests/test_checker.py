@@ -0,0 +1,152 @@
+"""AccessibilityChecker transport, rate limiting and error classification against small local servers."""
+import collections
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ReadTimeoutError
+
+from checker import (AccessibilityChecker, RateLimiter, classify_request_error, extract_token_from_stream,
+                     parse_retry_after)
+
+@pytest.fixture
+def hangup_server():
+    """A server that reads each request and closes the connection without answering"""
+    hits = collections.Counter()
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                request = conn.recv(4096).decode('latin-1')
+                if request:
+                    hits[request.split(' ')[1].split('?')[0]] += 1
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}", hits
+    server.close()
+
+def test_evaluate_is_not_resent_after_a_read_error(hangup_server):
+    base_url, hits = hangup_server
+    checker = AccessibilityChecker(base_url=base_url)
+    assert not checker.start_evaluation('https://example.edu/', 'token')
+    assert checker.last_failure()['failurePhase'] == 'evaluate'
+    checker.get_scan_details('token')
+    # Reads of scan details are idempotent and keep their transport retries
+    assert hits == {'/evaluate': 1, '/get-scan-details': 4}
+
+def test_timeouts_after_transport_retries_are_classified_as_timeouts():
+    read_timeout = ReadTimeoutError(None, '/get-scan-details', 'Read timed out.')
+    assert classify_request_error(requests.ConnectionError(MaxRetryError(None, '/', read_timeout))) == ('timeout', None)
+    assert classify_request_error(requests.ReadTimeout()) == ('timeout', None)
+    refused = NewConnectionError(None, 'Connection refused')
+    assert classify_request_error(requests.ConnectionError(MaxRetryError(None, '/', refused))) == \
+        ('connection_error', None)
+
+def test_rate_limiter_slows_down_and_recovers_up_to_its_budget():
+    limiter = RateLimiter(2.0)
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.rate == 0.5
+    for _ in range(10):
+        limiter.on_throttle()
+    assert limiter.rate == limiter.min_rate == 2.0 / 16
+    for _ in range(200):
+        limiter.on_success()
+    assert limiter.rate == 2.0
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('') is None
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('-1') == 0.0
+    assert parse_retry_after('soon') is None
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= parse_retry_after(in_a_minute) <= 60
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+@pytest.fixture
+def throttling_server():
+    """A scanner that answers the first request with 429 and ``Retry-After: 1``"""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(time.monotonic())
+            if len(requests_seen) == 1:
+                self.send_response(429)
+                self.send_header('Retry-After', '1')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            else:
+                body = b'{"scanStatus": "pending"}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests_seen
+    server.shutdown()
+    server.server_close()
+
+def test_api_get_waits_out_retry_after_and_slows_down(throttling_server):
+    base_url, requests_seen = throttling_server
+    checker = AccessibilityChecker(base_url=base_url, rate_limits={'details': (50.0, 1)})
+    response = checker._api_get('details', f"{base_url}/get-scan-details?scanId=x")
+    assert response.json() == {'scanStatus': 'pending'}
+    assert len(requests_seen) == 2
+    assert requests_seen[1] - requests_seen[0] >= 0.9
+    assert checker.rate_limiters['details'].rate < 50.0
+
+def test_token_split_across_chunks_is_found():
+    html = b'<html>' + b'x' * 5000 + b'<div data-token="abc123"></div>' + b'y' * 5000
+    split = html.index(b'abc') + 1
+    chunks = [html[:split], html[split:split + 10], html[split + 10:]]
+    remaining = iter(chunks)
+    assert extract_token_from_stream(remaining) == ('abc123', split + 10)
+    # Reading stops at the chunk that completes the token
+    assert list(remaining) == chunks[2:]
+
+def test_token_search_stops_after_max_bytes():
+    remaining = iter([b'x' * 1024] * 100 + [b'data-token="late"'])
+    assert extract_token_from_stream(remaining, max_bytes=4096) == (None, 4096)
+    assert len(list(remaining)) == 97
+
+def polling_checker(statuses, **kwargs):
+    checker = AccessibilityChecker(base_url='http://127.0.0.1:9', poll_initial_delay=0, poll_interval=0.01,
+                                   poll_jitter=0, **kwargs)
+    responses = iter(statuses)
+    checker.get_scan_details = lambda token: next(responses)
+    return checker
+
+def test_wait_for_scan_polls_until_the_scan_completes():
+    checker = polling_checker([{'scanStatus': 'pending'}, None, {'scanStatus': 'success', 'score': 80}])
+    assert checker.wait_for_scan('token') == ({'scanStatus': 'success', 'score': 80}, 3)
+
+def test_wait_for_scan_stops_on_a_failed_scan():
+    checker = polling_checker([{'scanStatus': 'pending'}, {'scanStatus': 'failed'}])
+    assert checker.wait_for_scan('token') == (None, 2)
+    assert checker.last_failure()['failureCause'] == 'scan_failed'
+
+def test_wait_for_scan_gives_up_at_the_deadline():
+    checker = polling_checker(iter(lambda: {'scanStatus': 'pending'}, None), poll_deadline=0.1)
+    scan_data, polls = checker.wait_for_scan('token')
+    assert scan_data is None and polls >= 2
+    assert checker.last_failure()['failureCause'] == 'scan_timeout'
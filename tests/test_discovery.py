@@ -0,0 +1,115 @@
+"""SiteCrawler against a static site served by http.server from a temporary tree."""
+import functools
+import socket
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from checker import SiteCrawler, normalize_url
+
+SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>{base}/prog/from-sitemap/</loc></url>
+  <url><loc>{base}/elsewhere/</loc></url>
+</urlset>
+"""
+
+PAGES = {
+    'prog/index.html': ['/prog/a/', '/prog/missing/', '/elsewhere/', '/prog/wp-json/', '/prog/guide.pdf',
+                        'https://other.example/prog/'],
+    'prog/a/index.html': ['b/'],
+    'prog/a/b/index.html': ['c/'],
+    'prog/a/b/c/index.html': [],
+    'prog/from-sitemap/index.html': [],
+    'elsewhere/index.html': [],
+    'prog/notes.csv': None,
+}
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/prog/busy/'):
+            self.send_error(503)
+        else:
+            super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def site(tmp_path):
+    for path, links in PAGES.items():
+        page = tmp_path / path
+        page.parent.mkdir(parents=True, exist_ok=True)
+        if links is None:
+            page.write_text('a,b\n')
+        else:
+            page.write_text('<html><body>' + ''.join(f'<a href="{link}">x</a>' for link in links) + '</body></html>')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(tmp_path)))
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    (tmp_path / 'sitemap.xml').write_text(SITEMAP.format(base=base))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield base
+    server.shutdown()
+    server.server_close()
+
+def crawl(base, pages=(), **kwargs):
+    crawler = SiteCrawler(rate=1000, concurrency=4, **kwargs)
+    program = {'name': 'Prog', 'main_url': f"{base}/prog/", 'pages': [f"{base}{page}" for page in pages]}
+    catalog, report = crawler.refresh_catalog({'uf_education_programs': [program]})
+    live = {normalize_url(url).split('/', 3)[3] for url in catalog['uf_education_programs'][0]['pages']}
+    return live, report[0]
+
+def paths(base, urls):
+    return {url[len(base):] for url in urls}
+
+def test_follows_links_up_to_depth(site):
+    live, _ = crawl(site, max_depth=2, use_sitemap=False)
+    assert live == {'prog', 'prog/a', 'prog/a/b'}
+
+    live, _ = crawl(site, max_depth=0, use_sitemap=False)
+    assert live == {'prog'}
+
+def test_sitemap_pages_are_added_in_scope_only(site):
+    live, report = crawl(site, max_depth=0)
+    assert live == {'prog', 'prog/from-sitemap'}
+    assert paths(site, report['added']) == {'/prog/', '/prog/from-sitemap/'}
+
+def test_out_of_scope_links_are_not_followed(site):
+    live, _ = crawl(site, max_depth=3)
+    assert 'elsewhere' not in live
+    assert not any(page.startswith('other.example') for page in live)
+    assert 'prog/a/b/c' in live
+
+def test_dead_pages_are_dropped_and_reported(site):
+    live, report = crawl(site, pages=['/prog/', '/prog/gone/'], max_depth=1, use_sitemap=False)
+    assert 'prog/gone' not in live and 'prog/missing' not in live
+    assert paths(site, report['dead']) == {'/prog/gone/', '/prog/missing/'}
+    assert report['pages'] == len(live)
+
+def test_skipped_links_are_reported_and_hand_listed_ones_kept(site):
+    live, report = crawl(site, pages=['/prog/', '/prog/feed/'], max_depth=1, use_sitemap=False)
+    assert 'prog/feed' in live
+    assert 'prog/wp-json' not in live and 'prog/guide.pdf' not in live
+    assert paths(site, report['skipped']) == {'/prog/wp-json/', '/prog/guide.pdf'}
+    assert paths(site, report['dead']) == {'/prog/missing/'}
+
+def test_only_definitive_answers_make_a_page_dead(site):
+    live, report = crawl(site, pages=['/prog/', '/prog/notes.csv', '/prog/busy/'], max_depth=0, use_sitemap=False)
+    # A 2xx that is not HTML is gone for good; a 503 may pass, so the listed page is kept
+    assert paths(site, report['dead']) == {'/prog/notes.csv'}
+    assert paths(site, report['unreachable']) == {'/prog/busy/'}
+    assert live == {'prog', 'prog/busy'}
+    assert not report['unchanged']
+
+def test_unreachable_main_url_leaves_the_program_unchanged():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        closed = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    pages = ['/prog/', '/prog/a/', '/outside/listed/']
+    crawler = SiteCrawler(rate=1000, concurrency=4, max_depth=1)
+    program = {'name': 'Prog', 'main_url': f"{closed}/prog/", 'pages': [f"{closed}{page}" for page in pages]}
+    catalog, report = crawler.refresh_catalog({'uf_education_programs': [program]})
+    assert catalog['uf_education_programs'][0]['pages'] == program['pages']
+    assert report[0]['unchanged'] and report[0]['dead'] == []
@@ -0,0 +1,39 @@
+"""A full run_checks pass against the local mock scanner."""
+import pytest
+
+from checker import AccessibilityChecker, RunJournal, ScanArchive, ScanCache, run_checks
+from mock_server import CATEGORIES, MockScanner, start_server
+
+URLS = [f"https://example.edu/program-{n}/" for n in range(4)]
+
+@pytest.fixture
+def scanner():
+    server, base_url = start_server(MockScanner(scan_latency=0.2, latency_jitter=0, loading_padding=40000, seed=7))
+    yield server.scanner, base_url
+    server.shutdown()
+    server.server_close()
+
+def test_run_against_the_mock_scanner(scanner, tmp_path):
+    scanner, base_url = scanner
+    checker = AccessibilityChecker(base_url=base_url, poll_initial_delay=0.1, poll_interval=0.1,
+                                   rate_limits={'loading': (50.0, 4), 'evaluate': (50.0, 4)},
+                                   cache=ScanCache(str(tmp_path / 'cache.sqlite3')),
+                                   archive=ScanArchive(str(tmp_path / 'archive')))
+    journal = RunJournal(str(tmp_path / 'runs.sqlite3'))
+    run_id = journal.start_run('e2e', URLS)
+    results = {url: result for _, url, result in run_checks(checker, URLS, max_workers=4, detect_changes=False,
+                                                           journal=journal, run_id=run_id)}
+
+    assert set(results) == set(URLS)
+    for url, result in results.items():
+        assert result['scanStatus'] == 'success' and result['resultSource'] == 'scan'
+        assert result['website_url'] == url and 0 <= result['score'] <= 100
+        assert {f'{category}_score' for category in CATEGORIES} <= result.keys()
+    assert scanner.stats['evaluate'] == len(URLS)
+    assert journal.find_unfinished_run('e2e', URLS) is None
+    assert sorted(checker.archive.run_blobs(run_id)) == list(range(len(URLS)))
+
+    # A second run is answered from the cache without calling the scanner
+    again = [result for _, _, result in run_checks(checker, URLS, max_workers=4, detect_changes=False)]
+    assert {result['resultSource'] for result in again} == {'cache'}
+    assert scanner.stats['evaluate'] == len(URLS)
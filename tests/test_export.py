@@ -0,0 +1,45 @@
+"""Export formats and the cached export files of finished jobs."""
+import json
+import os
+
+import pytest
+
+import cli
+from checker import RunJournal
+from export import export_format
+from jobs import JobStore, ScanJobService
+
+URLS = ['https://example.edu/a/', 'https://example.edu/b/']
+
+def test_export_format_rejects_unknown_extensions():
+    assert export_format('Results.XLSX') == 'xlsx'
+    with pytest.raises(ValueError):
+        export_format('results.txt')
+
+def test_cli_rejects_an_unknown_export_extension_before_scanning(capsys):
+    assert cli.main(['all', '--export', 'results.xls']) == cli.EXIT_USAGE
+    assert 'results.xls' in capsys.readouterr().err
+
+def test_job_export_is_rebuilt_after_the_run_changes(tmp_path):
+    journal = RunJournal(str(tmp_path / 'runs.sqlite3'))
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    service = ScanJobService(store=store, journal=journal)
+    run_id = journal.start_run('Prog', URLS)
+    for i, url in enumerate(URLS):
+        journal.record(run_id, i, url, {'website_url': url, 'scanStatus': 'success', 'score': 70.0})
+    job_id = store.create('key', 'Prog', [['Prog', url] for url in URLS], {})
+    store.update(job_id, status='done', run_id=run_id)
+
+    def exported(path):
+        with open(path, encoding='utf-8') as f:
+            return [json.loads(line)['score'] for line in f]
+
+    path = service.export(job_id, 'jsonl')
+    assert exported(path) == [70.0, 70.0]
+    assert service.export(job_id, 'jsonl') == path
+
+    # A reparse rewrites the stored results: the next download reflects it and the old file is gone
+    journal.replace_results(run_id, {0: {'website_url': URLS[0], 'scanStatus': 'success', 'score': 95.0}})
+    rebuilt = service.export(job_id, 'jsonl')
+    assert rebuilt != path and not os.path.exists(path)
+    assert exported(rebuilt) == [95.0, 70.0]
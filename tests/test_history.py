@@ -0,0 +1,103 @@
+"""Score history snapshots: recording, diffs between runs and merged windows."""
+import numpy as np
+import pytest
+
+import results
+from results import RunHistory, diff_snapshots, merge_snapshots
+
+def page(url, score, forms=None, status='success'):
+    row = {'website_url': url, 'scanStatus': status, 'score': score if status == 'success' else None}
+    if forms is not None and status == 'success':
+        row.update({'forms_verdict': 'compliant', 'forms_score': forms,
+                    'forms_inputsLabeled_score': forms, 'forms_inputsLabeled_failures': 2.0})
+    return row
+
+@pytest.fixture
+def history(tmp_path):
+    return RunHistory(str(tmp_path / 'history.sqlite3'))
+
+def snapshot(urls, scores, succeeded, fields, metrics):
+    """A snapshot dict as recorded: ``metrics`` is a list of (page, field, value)"""
+    page_ids, field_ids, values = zip(*metrics) if metrics else ((), (), ())
+    return {
+        'urls': np.array(urls, dtype=str),
+        'scores': np.array(scores, dtype='float32'),
+        'succeeded': np.array(succeeded, dtype=bool),
+        'field_names': np.array(fields, dtype=str).reshape(-1, 3),
+        'metric_page': np.array(page_ids, dtype='int32'),
+        'metric_field': np.array(field_ids, dtype='int32'),
+        'metric_value': np.array(values, dtype='float32'),
+    }
+
+def test_diff_classifies_pages_and_finds_regressions(history):
+    history.record('r1', 'SITE', [page('https://e.edu/a/', 90, forms=95), page('https://e.edu/b/', 80),
+                                  page('https://e.edu/c/', 70), page('https://e.edu/d/', None, status='failed')],
+                   recorded_at=1)
+    history.record('r2', 'SITE', [page('http://e.edu/a', 80, forms=70), page('https://e.edu/b/', None, status='failed'),
+                                  page('https://e.edu/d/', 60), page('https://e.edu/e/', 50)],
+                   recorded_at=2)
+    assert history.previous_run('r2') == 'r1'
+
+    diff = history.diff('r1', 'r2')
+    status = dict(zip(diff['pages']['website_url'], diff['pages']['status'].astype(str)))
+    assert status == {'https://e.edu/a': 'compared', 'https://e.edu/b': 'newly failing', 'https://e.edu/c': 'removed',
+                      'https://e.edu/d': 'recovered', 'https://e.edu/e': 'new'}
+
+    regressions = diff['regressions']
+    assert list(zip(regressions['category'], regressions['test'], regressions['delta'])) == [
+        ('forms', '', -25.0), ('forms', 'inputsLabeled', -25.0), ('', '', -10.0)]
+    assert set(regressions['website_url']) == {'https://e.edu/a'}
+    # Failure counts are compared but never count as regressions
+    failures = diff['tests'].loc[diff['tests']['metric'] == 'failures']
+    assert failures['delta'].tolist() == [0.0]
+
+def test_regression_threshold(history):
+    history.record('r1', 'SITE', [page('https://e.edu/a/', 90)], recorded_at=1)
+    history.record('r2', 'SITE', [page('https://e.edu/a/', 86)], recorded_at=2)
+    assert history.diff('r1', 'r2')['regressions'].empty
+    assert len(history.diff('r1', 'r2', threshold=4)['regressions']) == 1
+
+def test_recording_in_chunks_gives_the_same_snapshot(history, monkeypatch):
+    rows = [page(f'https://e.edu/p{i}/', 50 + i, forms=60 + i) for i in range(7)]
+    rows[3] = page('https://e.edu/p3/', None, status='failed')
+    history.record('whole', 'SITE', rows, recorded_at=1)
+    monkeypatch.setattr(results, 'HISTORY_CHUNK_ROWS', 2)
+    history.record('chunked', 'SITE', iter(rows), recorded_at=2)
+
+    diff = history.diff('whole', 'chunked')
+    assert (diff['pages']['status'] == 'compared').all() and len(diff['pages']) == 7
+    assert len(diff['tests']) == 6 * 3
+    assert (diff['tests']['delta'] == 0).all()
+    assert diff['regressions'].empty
+
+def test_record_is_idempotent_unless_replaced(history):
+    assert history.record('r1', 'SITE', [page('https://e.edu/a/', 90)], recorded_at=1)
+    assert not history.record('r1', 'SITE', [page('https://e.edu/a/', 10)])
+    assert history.record('r1', 'SITE', [page('https://e.edu/a/', 70)], replace=True)
+    runs = history.runs('SITE')
+    assert runs['mean_score'].tolist() == [70.0]
+    assert runs['recorded_at'].iloc[0].timestamp() == 1
+
+def test_merge_snapshots_keeps_first_or_last_success():
+    fields = [('forms', '', 'score'), ('forms', 'inputsLabeled', 'score')]
+    older = snapshot(['a', 'b'], [90, 80], [True, True], fields[:1], [(0, 0, 91.0), (1, 0, 81.0)])
+    newer = snapshot(['b', 'a', 'c'], [60, 0, 70], [True, False, True], fields[::-1],
+                     [(0, 1, 61.0), (0, 0, 55.0), (2, 1, 71.0)])
+
+    last = merge_snapshots([older, newer], last=True)
+    scores = dict(zip(last['urls'], last['scores']))
+    # a failed in the newer run, so its older success is kept
+    assert scores == {'a': 90, 'b': 60, 'c': 70}
+    assert last['succeeded'].all()
+    values = {(last['urls'][p], tuple(last['field_names'][f])): v
+              for p, f, v in zip(last['metric_page'], last['metric_field'], last['metric_value'])}
+    # The newer snapshot lists its fields in the other order
+    assert values == {('a', fields[0]): 91.0, ('b', fields[0]): 61.0, ('b', fields[1]): 55.0, ('c', fields[0]): 71.0}
+
+    first = merge_snapshots([older, newer], last=False)
+    assert dict(zip(first['urls'], first['scores'])) == {'a': 90, 'b': 80, 'c': 70}
+
+    diff = diff_snapshots(first, last)
+    assert dict(zip(diff['pages']['website_url'], diff['pages']['delta'])) == {'a': 0, 'b': -20, 'c': 0}
+    assert diff['regressions']['delta'].tolist() == [-20.0, -20.0]
+    assert diff['regressions']['category'].tolist() == ['', 'forms']
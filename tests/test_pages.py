@@ -0,0 +1,64 @@
+"""URL normalization and de-duplication of catalog pages."""
+from checker import PageIndex, normalize_url
+
+def test_normalize_url_spellings_of_one_page():
+    spellings = [
+        'https://education.ufl.edu/site/',
+        'http://education.ufl.edu/site',
+        'https://Education.UFL.edu:443/site//',
+        'http://education.ufl.edu:80/site/#apply',
+        '  https://education.ufl.edu//site  ',
+    ]
+    assert {normalize_url(url) for url in spellings} == {'https://education.ufl.edu/site'}
+
+def test_normalize_url_keeps_what_changes_the_page():
+    assert normalize_url('https://example.edu/') == 'https://example.edu/'
+    assert normalize_url('https://example.edu/a?page=2') != normalize_url('https://example.edu/a?page=3')
+    assert normalize_url('https://example.edu:8443/a') == 'https://example.edu:8443/a'
+    assert normalize_url('https://example.edu/A') != normalize_url('https://example.edu/a')
+
+def test_page_index_scans_each_page_once():
+    index = PageIndex([
+        ('SITE', 'http://education.ufl.edu/site/'),
+        ('SITE', 'https://education.ufl.edu/site/faq/'),
+        ('Counselor Education', 'https://education.ufl.edu/site'),
+        ('SITE', 'https://education.ufl.edu/site/faq/#top'),
+    ])
+    # The https spelling is preferred for the scan
+    assert index.unique_urls == ['https://education.ufl.edu/site', 'https://education.ufl.edu/site/faq/']
+    assert index.programs_for(0) == ['SITE', 'Counselor Education']
+    assert index.programs_for(1) == ['SITE']
+    assert len(index.entries) == 4
+
+def test_page_index_fans_results_out_to_every_listing():
+    index = PageIndex.from_programs([
+        {'name': 'A', 'pages': ['https://example.edu/x/', 'https://example.edu/y/']},
+        {'name': 'B', 'pages': ['http://example.edu/x']},
+    ])
+    rows = index.fan_out([{'score': 90}, {'score': 70}])
+    assert [(row['program'], row['website_url'], row['score']) for row in rows] == [
+        ('A', 'https://example.edu/x/', 90),
+        ('A', 'https://example.edu/y/', 70),
+        ('B', 'http://example.edu/x', 90),
+    ]
+    assert rows[2]['accessibe_url'] == 'https://accessibe.com/accessscan?website=http://example.edu/x'
+    assert [row['program'] for row in index.expand(0, {'score': 90})] == ['A', 'B']
+
+def test_rollups_count_shared_pages_once_outside_program_stats():
+    from results import ResultTable, compute_rollups
+
+    index = PageIndex.from_programs([
+        {'name': 'A', 'pages': ['https://example.edu/x/', 'https://example.edu/y/']},
+        {'name': 'B', 'pages': ['http://example.edu/x']},
+    ])
+    results = [{'scanStatus': 'success', 'score': score, 'verdict': 'x', 'forms_verdict': 'x', 'forms_score': score,
+                'forms_labels_score': score, 'forms_labels_failures': failures}
+               for score, failures in [(40, 6), (80, 2)]]
+    rollups = compute_rollups(ResultTable.from_rows(index.fan_out(results)))
+    programs = rollups['programs'].set_index('program')
+    assert programs.loc['A', 'count'] == 2 and programs.loc['B', 'count'] == 1
+    forms = rollups['categories'].set_index('category').loc['forms']
+    assert forms['count'] == 2 and forms['mean'] == 60 and forms['total_failures'] == 8
+    worst = rollups['worst_pages']
+    assert list(worst['score']) == [40, 80]
+    assert worst.loc[0, 'program'] == 'A, B'
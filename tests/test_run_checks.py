@@ -0,0 +1,80 @@
+"""run_checks retry passes and time budgets, driven by a fake checker."""
+import collections
+
+import pytest
+
+from checker import RunJournal, ScanScheduler, run_checks, scan_failure
+
+URLS = ['https://example.edu/a/', 'https://example.edu/b/', 'https://example.edu/c/']
+
+class FakeChecker:
+    """Succeeds for every page except the planned failures, one per listed cause"""
+
+    cache = None
+    archive = None
+
+    def __init__(self, failures=None):
+        self.failures = {url: list(causes) for url, causes in (failures or {}).items()}
+        self.scans = collections.Counter()
+
+    def check_websites(self, urls, max_workers=1):
+        # Queue everything first, as the real thread pool keeps a backlog of admitted pages
+        for j, url in list(enumerate(urls)):
+            self.scans[url] += 1
+            causes = self.failures.get(url)
+            if causes:
+                yield j, url, None, scan_failure('details', causes.pop(0))
+            else:
+                yield j, url, {'website_url': url, 'scanStatus': 'success', 'score': 90.0, 'totalMs': 1000}, None
+
+@pytest.fixture
+def journal(tmp_path):
+    return RunJournal(str(tmp_path / 'runs.sqlite3'))
+
+def run(checker, journal, **kwargs):
+    run_id = journal.start_run('test', URLS)
+    results = {url: result for _, url, result in run_checks(checker, URLS, max_workers=1, detect_changes=False,
+                                                           journal=journal, run_id=run_id, retry_backoff=0, **kwargs)}
+    return run_id, results
+
+def test_retryable_failure_is_scanned_again_after_the_main_pass(journal):
+    checker = FakeChecker({URLS[1]: ['timeout'], URLS[2]: ['http_error']})
+    run_id, results = run(checker, journal)
+    assert checker.scans == {URLS[0]: 1, URLS[1]: 2, URLS[2]: 1}
+    assert results[URLS[1]]['scanStatus'] == 'success' and results[URLS[1]]['attempts'] == 2
+    # Not retryable: reported after the first attempt
+    assert results[URLS[2]]['failureCause'] == 'http_error' and results[URLS[2]]['attempts'] == 1
+    assert journal.find_unfinished_run('test', URLS) is None
+
+def test_retries_stop_after_the_last_pass(journal):
+    checker = FakeChecker({URLS[0]: ['server_error'] * 5})
+    _, results = run(checker, journal, retry_attempts=2)
+    assert checker.scans[URLS[0]] == 3
+    assert results[URLS[0]]['failureCause'] == 'server_error' and results[URLS[0]]['attempts'] == 3
+
+def test_pages_beyond_the_budget_are_deferred_and_the_run_left_unfinished(journal):
+    scheduler = ScanScheduler(budget_seconds=15, workers=1)
+    scheduler.page_seconds = 10
+    checker = FakeChecker()
+    run_id, results = run(checker, journal, scheduler=scheduler)
+    assert sum(checker.scans.values()) == 1
+    assert sorted(result['scanStatus'] for result in results.values()) == ['deferred', 'deferred', 'success']
+    assert journal.find_unfinished_run('test', URLS) == run_id
+
+    # Resuming the run in the next window scans only the deferred pages
+    resumed = list(run_checks(checker, URLS, max_workers=1, detect_changes=False, journal=journal, run_id=run_id))
+    assert sorted(result['resultSource'] for _, _, result in resumed) == ['resumed', 'scan', 'scan']
+    assert checker.scans == {url: 1 for url in URLS}
+    assert journal.find_unfinished_run('test', URLS) is None
+
+def test_scheduler_admits_scans_that_can_finish_within_the_budget():
+    scheduler = ScanScheduler(budget_seconds=25, workers=2)
+    scheduler.page_seconds = 10
+    # Two run at once, the next two wait for a slot and still finish in 20s; a fifth would need 25s
+    assert [scheduler.admit() for _ in range(5)] == [True, True, True, True, False]
+    scheduler.observe({'totalMs': 10000})
+    assert scheduler.in_flight == 3
+    assert scheduler.admit()
+
+    unbudgeted = ScanScheduler(workers=1)
+    assert all(unbudgeted.admit() for _ in range(100))
@@ -0,0 +1,62 @@
+"""WorkQueue leases: expiry, stale completions and attempt limits."""
+import json
+import sqlite3
+
+import pytest
+
+from checker import WorkQueue
+
+URL = 'https://example.edu/page/'
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite3'), max_attempts=3)
+    queue.enqueue([URL])
+    return queue
+
+def item(queue):
+    with sqlite3.connect(queue.path) as conn:
+        return conn.execute("SELECT status, lease_owner, attempts, result_json FROM work_items").fetchone()
+
+def test_enqueue_skips_pages_already_queued(queue):
+    assert queue.enqueue([URL, 'http://example.edu/page']) == 0
+    assert queue.counts() == {'pending': 1}
+
+def test_leased_url_is_not_claimed_twice(queue):
+    assert queue.claim('a') == [(1, URL)]
+    assert queue.claim('b') == []
+    assert queue.complete(1, 'a', {'score': 90})
+    assert queue.counts() == {'done': 1}
+    assert list(queue.iter_results()) == [{'score': 90}]
+
+def test_expired_lease_is_claimed_again_and_stale_complete_ignored(queue):
+    assert queue.claim('a', lease_seconds=-1) == [(1, URL)]
+    assert queue.claim('b') == [(1, URL)]
+    # The worker that lost its lease cannot overwrite the new owner's result
+    assert not queue.complete(1, 'a', {'score': 10})
+    assert not queue.fail(1, 'a', {'scanStatus': 'failed'})
+    assert item(queue)[:3] == ('leased', 'b', 2)
+    assert queue.complete(1, 'b', {'score': 90})
+    assert json.loads(item(queue)[3]) == {'score': 90}
+
+def test_renew_keeps_the_lease(queue):
+    queue.claim('a', lease_seconds=-1)
+    queue.renew([1], 'a', lease_seconds=60)
+    assert queue.claim('b') == []
+
+def test_url_whose_leases_keep_expiring_is_failed(queue):
+    for _ in range(3):
+        assert queue.claim('a', lease_seconds=-1) == [(1, URL)]
+    assert queue.claim('b') == []
+    status, _, attempts, result_json = item(queue)
+    assert (status, attempts) == ('failed', 3)
+    assert json.loads(result_json)['failureCause'] == 'lease_expired'
+    assert queue.requeue_failed() == 1
+    assert queue.claim('b') == [(1, URL)]
+
+def test_failed_attempts_are_retried_until_the_limit(queue):
+    for attempt in range(1, 4):
+        assert queue.claim('a') == [(1, URL)]
+        assert queue.fail(1, 'a', {'scanStatus': 'failed', 'attempt': attempt})
+    assert queue.counts() == {'failed': 1}
+    assert list(queue.iter_results()) == [{'scanStatus': 'failed', 'attempt': 3}]
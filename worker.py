@@ -0,0 +1,225 @@
+"""Work-queue mode: enqueue URLs once, then scan them with any number of workers.
+
+Workers on one host or on several hosts sharing the queue file claim URLs
+under a lease, scan them with AccessibilityChecker and write results back.
+If a worker dies its leases expire and the URLs are claimed by another one.
+
+    python worker.py enqueue all
+    python worker.py enqueue --url-file urls.txt --queue nightly
+    python worker.py work --processes 4 --threads 8     # run on every host
+    python worker.py status
+    python worker.py retry-failures                     # queue failed URLs again
+    python worker.py results -o results.jsonl
+    python worker.py results -o results.xlsx            # or .csv / .parquet
+
+The queue lives in the data directory (ACCESSIBILITY_DATA_DIR) unless
+--queue-file points elsewhere, e.g. at shared storage.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import uuid
+
+from checker import (
+    DEFAULT_LEASE_SECONDS,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_POLL_DEADLINE,
+    DEFAULT_CACHE_TTL_HOURS,
+    AccessibilityChecker,
+    ScanArchive,
+    ScanCache,
+    WorkQueue,
+    failed_result,
+    scan_failure,
+    logger,
+)
+from export import export_format, write_export
+from cli import collect_pages, EXIT_OK, EXIT_FAILURES, EXIT_USAGE
+
+# Seconds an idle worker waits before looking for new work again
+IDLE_POLL_INTERVAL = 5
+
+
+class Worker:
+    """Claims URLs from the queue and scans them on a few threads"""
+
+    def __init__(self, queue, queue_name='default', threads=4, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, checker=None, exit_when_empty=False):
+        self.queue = queue
+        self.queue_name = queue_name
+        self.threads = threads
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.checker = checker or AccessibilityChecker(pool_size=threads)
+        self.exit_when_empty = exit_when_empty
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._held = set()
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _heartbeat(self):
+        # Renew leases well before they expire while scans are in progress
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._held_lock:
+                held = list(self._held)
+            self.queue.renew(held, self.worker_id, self.lease_seconds)
+
+    def _process(self, item_id, url):
+        cached = self.checker.cache.get(url) if self.checker.cache is not None else None
+        if cached:
+            cached['resultSource'] = 'cache'
+            self.queue.complete(item_id, self.worker_id, cached)
+            return
+        try:
+            result = self.checker.check_single_website(url)
+            failure = self.checker.last_failure()
+        except Exception as e:
+            logger.error(f"Unexpected error checking {url}: {str(e)}")
+            result, failure = None, scan_failure('unknown', 'unexpected', f"{type(e).__name__}: {e}")
+        if result:
+            result['resultSource'] = 'scan'
+            self.queue.complete(item_id, self.worker_id, result)
+        else:
+            failure = failure or scan_failure('unknown', 'unexpected')
+            # Failures that another attempt cannot fix are given up on straight away
+            self.queue.fail(item_id, self.worker_id, failed_result(url, failure),
+                            self.max_attempts if failure['retryable'] else 0)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            claimed = self.queue.claim(self.worker_id, self.queue_name, limit=1, lease_seconds=self.lease_seconds)
+            if not claimed:
+                counts = self.queue.counts(self.queue_name)
+                if self.exit_when_empty and not counts.get('pending') and not counts.get('leased'):
+                    return
+                self._stop.wait(IDLE_POLL_INTERVAL)
+                continue
+            item_id, url = claimed[0]
+            with self._held_lock:
+                self._held.add(item_id)
+            try:
+                self._process(item_id, url)
+            finally:
+                with self._held_lock:
+                    self._held.discard(item_id)
+
+    def run(self):
+        logger.info(f"Worker {self.worker_id} started with {self.threads} threads")
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._loop, name=f"scan-{i}") for i in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            logger.info(f"Worker {self.worker_id} stopping; in-flight leases will expire")
+        finally:
+            self._stop.set()
+
+
+def run_worker(args):
+    queue = WorkQueue(args.queue_file, max_attempts=args.max_attempts)
+    cache = None if args.no_cache else ScanCache(ttl_hours=args.cache_ttl)
+    checker = AccessibilityChecker(poll_deadline=args.deadline, cache=cache, pool_size=args.threads,
+                                   screenshots=args.screenshots, archive=None if args.no_archive else ScanArchive())
+    Worker(queue, args.queue, threads=args.threads, lease_seconds=args.lease,
+           max_attempts=args.max_attempts, checker=checker, exit_when_empty=args.exit_when_empty).run()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scan URLs from a shared durable work queue")
+    parser.add_argument('--queue-file', default=None, help='queue database path (default: in the data directory)')
+    parser.add_argument('--queue', default='default', help='queue name')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = commands.add_parser('enqueue', help='add URLs to the queue')
+    enqueue.add_argument('target', nargs='?', default=None, help='program name from the catalog, or "all"')
+    enqueue.add_argument('--url-file', help='file with one URL per line')
+    enqueue.add_argument('--requeue', action='store_true', help='queue finished URLs again')
+
+    work = commands.add_parser('work', help='claim and scan URLs until stopped')
+    work.add_argument('--processes', type=int, default=1, help='worker processes to start on this host')
+    work.add_argument('--threads', type=int, default=4, help='concurrent scans per process')
+    work.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS, help='lease duration in seconds')
+    work.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    work.add_argument('--deadline', type=float, default=DEFAULT_POLL_DEADLINE,
+                      help='seconds to wait for each scan to complete')
+    work.add_argument('--screenshots', action='store_true', help='have the scanner render page screenshots')
+    work.add_argument('--no-archive', action='store_true', help='do not keep the raw scan JSON in the scan archive')
+    work.add_argument('--no-cache', action='store_true', help='do not read or write the result cache')
+    work.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL_HOURS, help='cache TTL in hours')
+    work.add_argument('--exit-when-empty', action='store_true', help='stop once no work is left')
+
+    commands.add_parser('status', help='show queue counts')
+    commands.add_parser('retry-failures', help='queue URLs that failed again with a fresh attempt budget')
+
+    results = commands.add_parser('results', help='write finished results')
+    results.add_argument('-o', '--output', default='-',
+                         help='output path; the extension picks xlsx, csv, jsonl or parquet (default: JSONL on stdout)')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == 'enqueue':
+        if bool(args.target) == bool(args.url_file):
+            print("error: give either a program name / \"all\" or --url-file", file=sys.stderr)
+            return EXIT_USAGE
+        try:
+            page_index = collect_pages(args.target, args.url_file)
+        except (ValueError, OSError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        added = WorkQueue(args.queue_file).enqueue(page_index.unique_urls, args.queue, requeue=args.requeue)
+        print(f"queued {added} of {len(page_index.unique_urls)} unique pages", file=sys.stderr)
+        return EXIT_OK
+
+    if args.command == 'work':
+        if args.processes <= 1:
+            run_worker(args)
+            return EXIT_OK
+        processes = [multiprocessing.Process(target=run_worker, args=(args,)) for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.join()
+        return EXIT_OK if all(process.exitcode == 0 for process in processes) else EXIT_FAILURES
+
+    if args.command == 'retry-failures':
+        requeued = WorkQueue(args.queue_file).requeue_failed(args.queue)
+        print(f"queued {requeued} failed URLs again", file=sys.stderr)
+        return EXIT_OK
+
+    if args.command == 'status':
+        counts = WorkQueue(args.queue_file).counts(args.queue)
+        print(' '.join(f"{status}={counts.get(status, 0)}" for status in ('pending', 'leased', 'done', 'failed')))
+        return EXIT_OK
+
+    queue = WorkQueue(args.queue_file)
+    if args.output != '-':
+        try:
+            output_fmt = export_format(args.output)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        write_export(lambda: queue.iter_results(args.queue), output_fmt, args.output)
+        return EXIT_OK
+    for result in queue.iter_results(args.queue):
+        sys.stdout.write(json.dumps(result) + '\n')
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())